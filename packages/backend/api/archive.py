@@ -0,0 +1,205 @@
+"""
+Archivage à froid des sessions terminées.
+
+Les sessions COMPLETED terminées depuis plus de SESSION_ARCHIVE_AFTER_DAYS
+jours quittent les tables chaudes (Participant, Answer) : leurs lignes sont
+écrites dans SESSION_ARCHIVE_DIR/session_<id>.json.gz puis supprimées. La
+session reste en base (listes, recherche) avec un résumé SessionArchive
+(participants, réponses, scores, tailles).
+
+restore_session() réinsère les lignes à l'identique (mêmes ids, mêmes
+dates), à la demande de l'enseignant (POST /api/sessions/{id}/restore/) ou
+via manage.py archive_sessions --restore ; les lectures (détail,
+classement) ne restaurent jamais. Une session restaurée repart en archive
+au passage suivant du job.
+
+Tant qu'elle est archivée, une session reste visible de ses participants
+(SessionArchive.users) mais n'apparaît plus dans leur historique (qui passe
+par Participant).
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Avg, Max
+from django.utils import timezone
+
+from .models import QuizSession, Participant, Answer, SessionArchive, User, Question, QuestionOption
+
+FORMAT_VERSION = 2
+PARTICIPANT_FIELDS = ('id', 'user_id', 'joined_at', 'score', 'question_index', 'deadline', 'completed_at')
+# Colonnes absentes des archives de version 1 (progression des sessions en autonomie)
+PARTICIPANT_DEFAULTS = {'question_index': 0, 'deadline': None, 'completed_at': None}
+ANSWER_FIELDS = (
+    'id', 'participant_id', 'question_id', 'selected_option_id',
+    'text_answer', 'is_correct', 'response_time', 'answered_at',
+)
+
+
+def archive_path(session_id):
+    return Path(settings.SESSION_ARCHIVE_DIR) / f'session_{int(session_id)}.json.gz'
+
+
+def archivable_sessions(older_than_days=None):
+    """Sessions terminées depuis plus de `older_than_days` jours et pas encore archivées"""
+    if older_than_days is None:
+        older_than_days = settings.SESSION_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return QuizSession.objects.filter(
+        status=QuizSession.Status.COMPLETED, ended_at__lt=cutoff, archived_at__isnull=True
+    ).order_by('ended_at')
+
+
+def _encode(value):
+    # Dates complètes (DjangoJSONEncoder tronque à la milliseconde)
+    return value.isoformat()
+
+
+def _write(path, payload):
+    """Écriture atomique (fichier temporaire + rename) ; renvoie (taille brute, taille compressée)"""
+    raw = json.dumps(payload, default=_encode, separators=(',', ':')).encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(gzip.compress(raw, compresslevel=6))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(raw), path.stat().st_size
+
+
+def load_archive(session_id):
+    """Contenu d'une archive : {'participants': [dict...], 'answers': [dict...], ...}"""
+    with gzip.open(archive_path(session_id), 'rb') as f:
+        payload = json.load(f)
+    for table, fields in (('participants', PARTICIPANT_FIELDS), ('answers', ANSWER_FIELDS)):
+        payload[table] = [dict(zip(fields, row)) for row in payload[table]]
+    payload['participants'] = [{**PARTICIPANT_DEFAULTS, **p} for p in payload['participants']]
+    return payload
+
+
+def archive_session(session_id):
+    """
+    Archive une session terminée ; renvoie le SessionArchive créé, ou None
+    si elle n'est plus archivable (déjà archivée, rouverte...).
+    """
+    with transaction.atomic():
+        session = QuizSession.objects.select_for_update().filter(
+            pk=session_id, status=QuizSession.Status.COMPLETED, archived_at__isnull=True
+        ).first()
+        if session is None:
+            return None
+
+        participants = Participant.objects.filter(session=session).order_by('id')
+        answers = Answer.objects.filter(participant__session=session).order_by('id')
+        payload = {
+            'version': FORMAT_VERSION,
+            'session': session.pk,
+            'participants': list(participants.values_list(*PARTICIPANT_FIELDS)),
+            'answers': list(answers.values_list(*ANSWER_FIELDS)),
+        }
+        path = archive_path(session.pk)
+        raw_size, compressed_size = _write(path, payload)
+
+        scores = participants.aggregate(top=Max('score'), average=Avg('score'))
+        summary = SessionArchive.objects.create(
+            session=session,
+            path=str(path),
+            participant_count=len(payload['participants']),
+            answer_count=len(payload['answers']),
+            top_score=scores['top'] or 0,
+            average_score=scores['average'] or 0,
+            raw_size=raw_size,
+            compressed_size=compressed_size,
+        )
+        user_column = PARTICIPANT_FIELDS.index('user_id')
+        summary.users.add(*{row[user_column] for row in payload['participants']})
+        answers.delete()
+        participants.delete()
+        session.archived_at = summary.archived_at
+        session.save(update_fields=['archived_at'])
+    return summary
+
+
+def _insert(model, field_names, rows):
+    """
+    INSERT direct avec les valeurs d'origine : bulk_create réécrirait
+    joined_at / answered_at (auto_now_add).
+    """
+    if not rows:
+        return
+    fields = [model._meta.get_field(name) for name in field_names]
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        qn(model._meta.db_table),
+        ', '.join(qn(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    params = [
+        [field.get_db_prep_save(field.to_python(row[field.attname]), connection) for field in fields]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def restore_session(session):
+    """
+    Réinsère participants et réponses d'une session archivée puis supprime
+    l'archive. Les lignes dont l'utilisateur ou la question ont disparu
+    depuis sont ignorées. Renvoie False si la session n'était pas archivée.
+    """
+    with transaction.atomic():
+        locked = QuizSession.objects.select_for_update().filter(
+            pk=session.pk, archived_at__isnull=False
+        ).first()
+        if locked is None:
+            return False
+
+        payload = load_archive(session.pk)
+        users = set(User.objects.filter(
+            pk__in={p['user_id'] for p in payload['participants']}
+        ).values_list('pk', flat=True))
+        participants = [p for p in payload['participants'] if p['user_id'] in users]
+        kept = {p['id'] for p in participants}
+
+        questions = set(Question.objects.filter(quiz_id=locked.quiz_id).values_list('pk', flat=True))
+        options = set(QuestionOption.objects.filter(question_id__in=questions).values_list('pk', flat=True))
+        answers = []
+        for answer in payload['answers']:
+            if answer['participant_id'] not in kept or answer['question_id'] not in questions:
+                continue
+            if answer['selected_option_id'] not in options:
+                answer['selected_option_id'] = None
+            answers.append(answer)
+
+        _insert(Participant, ('session_id',) + PARTICIPANT_FIELDS,
+                [{**p, 'session_id': locked.pk} for p in participants])
+        _insert(Answer, ANSWER_FIELDS, answers)
+        SessionArchive.objects.filter(session=locked).delete()
+        QuizSession.objects.filter(pk=locked.pk).update(archived_at=None)
+
+    session.archived_at = None
+    return True
+
+
+def table_sizes():
+    """
+    Taille des tables chaudes : octets sur disque (tables + index + TOAST)
+    sous PostgreSQL, nombre de lignes sinon.
+    """
+    tables = {model._meta.db_table: model for model in (Participant, Answer)}
+    sizes = {}
+    with connection.cursor() as cursor:
+        for table, model in tables.items():
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+                size = cursor.fetchone()[0]
+            else:
+                size = None
+            sizes[table] = {'rows': model.objects.count(), 'bytes': size}
+    return sizes
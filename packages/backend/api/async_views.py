@@ -0,0 +1,341 @@
+"""
+Variantes async des endpoints chauds d'une session (servies via core.asgi).
+
+Mêmes règles métier et mêmes réponses que QuizSessionViewSet, mais les
+lectures passent par l'ORM async de Django : pendant qu'une requête attend
+la base, le worker ASGI continue de servir les autres. La validation et
+l'écriture réutilisent les sérialiseurs DRF (synchrones) via sync_to_async.
+
+URLs : /api/async/sessions/join/, /api/async/sessions/{id}/,
+       /api/async/sessions/{id}/answer/, /api/async/sessions/{id}/leaderboard/,
+       /api/async/sessions/{id}/wait/ (long-poll, cf. api.waiters)
+
+Comme les vues DRF, JSON par défaut et MessagePack si le client envoie
+`Accept: application/msgpack` (cf. api.renderers).
+"""
+import functools
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from . import idempotency, live_engine, event_log, self_paced, waiters
+from .db_routing import apin_to_primary, aread_alias_for
+from .parsers import unpackb
+from .renderers import MSGPACK_MEDIA_TYPE, packb
+from .models import QuizSession, Participant, Answer, User
+from .throttling import SessionPollThrottle, AnswerSubmitThrottle, SessionAnswerThrottle
+from .serializers import (
+    ParticipantJoinSerializer, AnswerSubmitSerializer, AnswerReadSerializer,
+    LeaderboardEntrySerializer
+)
+from .views import leaderboard_queryset, build_leaderboard, session_joined
+
+jwt_authentication = JWTAuthentication()
+
+
+def wants_msgpack(request):
+    return MSGPACK_MEDIA_TYPE in request.headers.get('Accept', '')
+
+
+def respond(request, data, status=200):
+    """Réponse JSON, ou MessagePack si le client l'a demandé"""
+    if wants_msgpack(request):
+        return HttpResponse(packb(data), status=status, content_type=MSGPACK_MEDIA_TYPE)
+    return JsonResponse(data, status=status, safe=False)
+
+
+def parse_body(request):
+    """Corps JSON ou MessagePack selon Content-Type ; ValueError si invalide"""
+    if request.content_type == MSGPACK_MEDIA_TYPE:
+        return unpackb(request.body)
+    return json.loads(request.body)
+
+
+async def authenticate(request):
+    """Valide le JWT (sans I/O) puis charge l'utilisateur avec l'ORM async"""
+    header = jwt_authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = jwt_authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    token = jwt_authentication.get_validated_token(raw_token)
+    try:
+        user = await User.objects.aget(pk=token['user_id'])
+    except (KeyError, User.DoesNotExist):
+        raise InvalidToken("Utilisateur introuvable.")
+    if not user.is_active:
+        raise InvalidToken("Utilisateur inactif.")
+    return user
+
+
+class _ThrottleView:
+    """Ce que les throttles DRF lisent de la vue"""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+
+
+async def check_throttles(request, kwargs, throttle_classes):
+    """Réponse 429 (avec Retry-After) si un des seaux est vide, sinon None"""
+    view = _ThrottleView(kwargs)
+    waits = []
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not await sync_to_async(throttle.allow_request)(request, view):
+            waits.append(throttle.wait())
+    if not waits:
+        return None
+    exc = Throttled(max(waits))
+    response = respond(request, {"detail": str(exc.detail)}, status=exc.status_code)
+    response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+def async_api_view(*methods, throttle_classes=(), replay=None):
+    """
+    Équivalent minimal de @api_view pour une vue async : méthode HTTP,
+    authentification JWT obligatoire, throttles et corps JSON dans request.data.
+    `replay(request, pk)` (synchrone) peut servir une réponse déjà connue avant
+    l'authentification et les throttles (cf. idempotency.lookup).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return respond(request, {"detail": f"Méthode « {request.method} » non autorisée."}, status=405)
+            request.data = {}
+            if request.body:
+                try:
+                    request.data = parse_body(request)
+                except ValueError:
+                    return respond(request, {"detail": "Corps de requête invalide."}, status=400)
+            if replay is not None:
+                replayed = await sync_to_async(replay)(request, kwargs.get('pk'))
+                if replayed is not None:
+                    status_code, data = replayed
+                    return respond(request, data, status=status_code)
+
+            try:
+                user = await authenticate(request)
+            except (InvalidToken, TokenError) as exc:
+                return respond(request, {"detail": str(exc)}, status=401)
+            if user is None:
+                return respond(request, {"detail": "Informations d'authentification non fournies."}, status=401)
+            request.user = user
+
+            if throttle_classes:
+                throttled = await check_throttles(request, kwargs, throttle_classes)
+                if throttled is not None:
+                    return throttled
+
+            response = await view(request, *args, **kwargs)
+            if request.method != 'GET' and response.status_code < 400:
+                await apin_to_primary(user)
+            return response
+
+        # Authentification par JWT uniquement (pas de cookie), comme les APIView DRF.
+        # csrf_exempt() ne préserve pas les vues async en Django 4.2.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def get_visible_session(user, pk):
+    return await QuizSession.objects.visible_to(user).filter(pk=pk).afirst()
+
+
+def not_found(request):
+    return respond(request, {"detail": "Pas trouvé."}, status=404)
+
+
+@async_api_view('POST')
+async def join(request):
+    """POST /api/async/sessions/join/ body: { "access_code": "XY123" }"""
+    serializer = ParticipantJoinSerializer(data=request.data, context={'request': request})
+
+    def validate_and_save():
+        if serializer.is_valid():
+            participant = serializer.save()
+            event_log.record_join(participant)
+            session_joined(participant)
+            return participant
+        return None
+
+    participant = await sync_to_async(validate_and_save)()
+    if participant is None:
+        return respond(request, serializer.errors, status=400)
+    return respond(request, {
+        "message": "Session rejointe avec succès",
+        "session_id": participant.session_id,
+        "participant_id": participant.id
+    }, status=201)
+
+
+async def build_session_state(session, user):
+    current_question = None
+    has_answered = False
+    question_index = session.current_question_index
+    if session.is_self_paced:
+        # Question courante du participant (cf. api.self_paced)
+        progress = await sync_to_async(self_paced.progress)(session.pk, user)
+        if progress is not None:
+            current_question = progress['current_question']
+            question_index = progress['question_index']
+    elif session.status == QuizSession.Status.IN_PROGRESS:
+        question = await session.aget_current_question()
+        if question:
+            current_question = {
+                "id": question.id,
+                "text": question.text,
+                "time_limit": question.time_limit,
+                "options": [
+                    {"id": opt.id, "text": opt.text, "order": opt.order}
+                    async for opt in question.options.order_by('order')
+                ]
+            }
+            has_answered = await Answer.objects.filter(
+                question=question,
+                participant__session=session,
+                participant__user=user
+            ).aexists()
+
+    return {
+        "id": session.id,
+        "status": session.status,
+        "state_version": session.state_version,
+        "access_code": session.access_code,
+        "mode": session.mode,
+        "current_question_index": question_index,
+        "participant_count": await session.participants.acount(),
+        "current_question": current_question,
+        "has_answered": has_answered,
+    }
+
+
+@async_api_view('GET', throttle_classes=[SessionPollThrottle])
+async def session_state(request, pk):
+    """
+    État courant d'une session, allégé pour le polling : statut, version,
+    question courante (sans les bonnes réponses) et réponse déjà donnée ou non.
+    """
+    session = await get_visible_session(request.user, pk)
+    if session is None:
+        return not_found(request)
+    return respond(request, await build_session_state(session, request.user))
+
+
+@async_api_view('GET', throttle_classes=[SessionPollThrottle])
+async def wait_for_change(request, pk):
+    """
+    GET /api/async/sessions/{id}/wait/?since=<state_version>[&timeout=<s>]
+
+    Long-poll : répond dès que state_version dépasse `since` (transition,
+    arrivée d'un participant), sinon après le délai (SESSION_WAIT_TIMEOUT au
+    plus) avec l'état inchangé. Même réponse que l'état de session ; le
+    client relance avec la state_version reçue.
+    """
+    try:
+        since = int(request.GET.get('since', -1))
+        timeout = float(request.GET.get('timeout', settings.SESSION_WAIT_TIMEOUT))
+    except ValueError:
+        return respond(request, {"detail": "since et timeout doivent être numériques."}, status=400)
+    deadline = time.monotonic() + max(0.0, min(timeout, settings.SESSION_WAIT_TIMEOUT))
+
+    with waiters.watch(pk) as waiter:
+        session = await get_visible_session(request.user, pk)
+        if session is None:
+            return not_found(request)
+        while session.state_version <= since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await waiter.wait(remaining):
+                break
+            session = await get_visible_session(request.user, pk)
+            if session is None:
+                return not_found(request)
+    return respond(request, await build_session_state(session, request.user))
+
+
+@async_api_view('POST', throttle_classes=[AnswerSubmitThrottle, SessionAnswerThrottle], replay=idempotency.lookup)
+async def submit_answer(request, pk):
+    """POST /api/async/sessions/{id}/answer/ (en-tête Idempotency-Key : cf. api.idempotency)"""
+    token, replay = await sync_to_async(idempotency.begin)(request, pk)
+    if replay is not None:
+        status_code, data = replay
+        return respond(request, data, status=status_code)
+    try:
+        status_code, data = await _submit_answer(request, pk)
+    except BaseException:
+        await sync_to_async(idempotency.abandon)(token)
+        raise
+    await sync_to_async(idempotency.finish)(token, status_code, data)
+    return respond(request, data, status=status_code)
+
+
+async def _submit_answer(request, pk):
+    """(statut, corps) de la réponse"""
+    if await sync_to_async(self_paced.is_self_paced)(pk):
+        return await sync_to_async(self_paced.submit)(pk, request.user, request.data)
+
+    if live_engine.enabled():
+        engine = live_engine.get_engine(pk, create=False) or await sync_to_async(live_engine.get_engine)(pk)
+        if engine is not None:
+            # Hors de la boucle : deck (ORM si absent), journal et bus sont synchrones
+            return await sync_to_async(engine.submit)(request.user.pk, request.data)
+
+    session = await get_visible_session(request.user, pk)
+    if session is None:
+        return 404, {"detail": "Pas trouvé."}
+
+    participant = await Participant.objects.filter(session=session, user=request.user).afirst()
+    if participant is None:
+        return 404, {"detail": "Pas trouvé."}
+
+    current_question = await session.aget_current_question()
+    if not current_question:
+        return 400, {"error": "Aucune question active"}
+
+    context = {
+        'request': request,
+        'question': current_question,
+        'participant': participant
+    }
+    serializer = AnswerSubmitSerializer(data=request.data, context=context)
+
+    def validate_and_save():
+        if serializer.is_valid():
+            return AnswerReadSerializer(serializer.save()).data
+        return None
+
+    data = await sync_to_async(validate_and_save)()
+    if data is None:
+        return 400, serializer.errors
+    return 201, data
+
+
+@async_api_view('GET', throttle_classes=[SessionPollThrottle])
+async def leaderboard(request, pk):
+    """GET /api/async/sessions/{id}/leaderboard/"""
+    engine = live_engine.get_engine(pk, create=False)
+    if engine is not None and engine.can_view(request.user):
+        return respond(request, LeaderboardEntrySerializer(engine.leaderboard(), many=True).data)
+
+    session = await get_visible_session(request.user, pk)
+    if session is None:
+        return not_found(request)
+    if session.archived_at is not None:
+        return respond(request, {
+            "error": f"Session archivée : l'enseignant peut la restaurer (POST /api/sessions/{session.pk}/restore/).",
+            "archived_at": session.archived_at.isoformat(),
+        }, status=409)
+
+    alias = await aread_alias_for(request.user)
+    participants = [p async for p in leaderboard_queryset(session).using(alias)]
+    entries = build_leaderboard(participants)
+    return respond(request, LeaderboardEntrySerializer(entries, many=True).data)
@@ -0,0 +1,240 @@
+"""
+Bus d'événements entre les workers (publication / abonnement).
+
+Un changement fait dans un processus (la session passe à la question
+suivante, un quiz est modifié) doit atteindre les autres workers : moteur
+en mémoire de la session, decks en cache, requêtes en attente...
+
+    bus.subscribe(SESSION, callback)            # callback(payload) dans chaque processus
+    bus.publish(SESSION, {"id": 12, ...})       # après le commit, vers tous les processus
+    bus.publish_coalesced(channel, 12, {...})   # événements fréquents : le dernier par clé,
+                                                # envoyés par lots toutes les
+                                                # EVENT_BUS_COALESCE_INTERVAL secondes,
+                                                # eux aussi après le commit
+
+Backends (EVENT_BUS_BACKEND) :
+- 'postgres' : NOTIFY sur EVENT_BUS_CHANNEL ; chaque processus écoute (LISTEN)
+  sur une connexion dédiée, dans un thread. Aucun service en plus.
+- 'inprocess' : livraison directe, un seul processus (tests, runserver, SQLite).
+
+Le processus qui publie livre à ses propres abonnés sans attendre PostgreSQL,
+et ignore l'écho de ses notifications. Après une reconnexion de l'écoute, les
+abonnés de RESYNC sont appelés : des notifications ont pu être perdues.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+SESSION = 'session'
+QUIZ = 'quiz'
+RESYNC = 'resync'
+
+# Statut publié sur SESSION quand une session est supprimée (cf. api.deletion)
+SESSION_DELETED = 'DELETED'
+
+# Une notification PostgreSQL fait moins de 8000 octets
+MAX_NOTIFY_BYTES = 7900
+
+_subscribers = {}
+_bus = None
+_bus_lock = threading.Lock()
+# Connexions héritées d'un fork : jamais utilisées ni fermées par l'enfant
+_inherited = []
+
+
+def subscribe(channel, callback):
+    _subscribers.setdefault(channel, []).append(callback)
+
+
+def dispatch(channel, payloads):
+    for callback in _subscribers.get(channel, ()):
+        for payload in payloads:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Abonné %r du canal %s en échec", callback, channel)
+
+
+class InProcessBus:
+    """Livraison dans le processus courant ; base des autres backends"""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.flusher = None
+        self.wake = threading.Event()
+
+    def start(self):
+        pass
+
+    def publish(self, channel, payload):
+        transaction.on_commit(lambda: self.send(channel, [payload]))
+
+    def publish_coalesced(self, channel, key, payload):
+        transaction.on_commit(lambda: self._enqueue(channel, key, payload))
+
+    def _enqueue(self, channel, key, payload):
+        with self.pending_lock:
+            self.pending[(channel, key)] = payload
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(target=self._flush_loop, name='event-bus-flusher', daemon=True)
+                self.flusher.start()
+        self.wake.set()
+
+    def flush(self):
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+        by_channel = {}
+        for (channel, _), payload in pending.items():
+            by_channel.setdefault(channel, []).append(payload)
+        for channel, payloads in by_channel.items():
+            self.send(channel, payloads)
+
+    def _flush_loop(self):
+        while True:
+            self.wake.wait()
+            # Regroupe tout ce qui arrive pendant l'intervalle
+            time.sleep(settings.EVENT_BUS_COALESCE_INTERVAL)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Envoi groupé du bus en échec")
+
+    def send(self, channel, payloads):
+        dispatch(channel, payloads)
+
+    def release(self):
+        """Abandon après un fork (les threads n'existent plus dans l'enfant)"""
+
+
+class PostgresNotifyBus(InProcessBus):
+
+    def __init__(self):
+        super().__init__()
+        self.channel = settings.EVENT_BUS_CHANNEL
+        self.listener = None
+        self.listen_connection = None
+        self.publish_connection = None
+        self.publish_lock = threading.Lock()
+        self.start_lock = threading.Lock()
+
+    def connect(self):
+        import psycopg
+        params = connections['default'].get_connection_params()
+        return psycopg.connect(**params, autocommit=True)
+
+    def start(self):
+        if self.listener is None or not self.listener.is_alive():
+            with self.start_lock:
+                if self.listener is None or not self.listener.is_alive():
+                    self.listener = threading.Thread(target=self._listen_loop, name='event-bus-listener',
+                                                     daemon=True)
+                    self.listener.start()
+
+    def send(self, channel, payloads):
+        dispatch(channel, payloads)
+        for chunk in self._chunks(channel, payloads):
+            self._notify(chunk)
+
+    def _chunks(self, channel, payloads):
+        message = json.dumps({'o': self.origin, 'c': channel, 'p': payloads}, separators=(',', ':'))
+        if len(message.encode()) <= MAX_NOTIFY_BYTES:
+            yield message
+        elif len(payloads) > 1:
+            middle = len(payloads) // 2
+            yield from self._chunks(channel, payloads[:middle])
+            yield from self._chunks(channel, payloads[middle:])
+        else:
+            logger.error("Événement %s trop gros pour NOTIFY, ignoré : %.200s", channel, message)
+
+    def _notify(self, message):
+        with self.publish_lock:
+            for attempt in (1, 2):
+                try:
+                    if self.publish_connection is None or self.publish_connection.closed:
+                        self.publish_connection = self.connect()
+                    self.publish_connection.execute('SELECT pg_notify(%s, %s)', (self.channel, message))
+                    return
+                except Exception:
+                    self.publish_connection = None
+                    if attempt == 2:
+                        logger.exception("NOTIFY sur %s en échec", self.channel)
+
+    def _listen_loop(self):
+        from psycopg import sql
+        delay = 0.5
+        connected_once = False
+        while True:
+            try:
+                self.listen_connection = self.connect()
+                self.listen_connection.execute(sql.SQL('LISTEN {}').format(sql.Identifier(self.channel)))
+                delay = 0.5
+                if connected_once:
+                    dispatch(RESYNC, [{}])
+                connected_once = True
+                for notify in self.listen_connection.notifies():
+                    self._receive(notify.payload)
+            except Exception:
+                logger.exception("Écoute du bus interrompue, reconnexion dans %.1f s", delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 10)
+            finally:
+                if self.listen_connection is not None and not self.listen_connection.closed:
+                    self.listen_connection.close()
+
+    def _receive(self, raw):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.warning("Notification illisible ignorée : %.200s", raw)
+            return
+        if message.get('o') != self.origin:
+            dispatch(message.get('c'), message.get('p') or [])
+
+    def release(self):
+        _inherited.extend(c for c in (self.listen_connection, self.publish_connection) if c is not None)
+
+
+def get_bus():
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                postgres = (settings.EVENT_BUS_BACKEND == 'postgres'
+                            and connections['default'].vendor == 'postgresql')
+                _bus = PostgresNotifyBus() if postgres else InProcessBus()
+    return _bus
+
+
+def start():
+    """Démarre l'écoute dans ce processus (appelé à chaque requête, sans effet la plupart du temps)"""
+    get_bus().start()
+
+
+def publish(channel, payload):
+    get_bus().publish(channel, payload)
+
+
+def publish_coalesced(channel, key, payload):
+    get_bus().publish_coalesced(channel, key, payload)
+
+
+def _reset_after_fork():
+    global _bus
+    if _bus is not None:
+        _bus.release()
+    _bus = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,120 @@
+"""
+Routage des lectures lourdes vers un réplica en lecture seule.
+
+Par défaut tout passe par 'default'. Une vue (ou un bloc `with use_replica()`)
+peut envoyer ses lectures vers settings.DATABASE_REPLICA_ALIAS ; les écritures
+restent toujours sur 'default'.
+
+Lecture de ses propres écritures : après une requête d'écriture réussie,
+l'utilisateur est "épinglé" sur 'default' pendant
+DATABASE_REPLICA_STICKY_SECONDS (marqueur dans le cache partagé), le temps
+que le réplica rattrape son retard.
+
+Pour essayer en local, déclarer un second alias dans DATABASES, par exemple
+une autre base SQLite/PostgreSQL alimentée par `migrate --database replica`
+et une copie des données, ou `'TEST': {'MIRROR': 'default'}` en test.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import permissions
+
+_read_alias = ContextVar('db_read_alias', default=None)
+
+
+def replica_alias():
+    """Alias du réplica s'il est configuré, sinon None"""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def _pin_key(user):
+    return f'db:pin:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Force les lectures de l'utilisateur sur 'default' pendant la fenêtre de rattrapage"""
+    if replica_alias():
+        cache.set(_pin_key(user), 1, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+async def apin_to_primary(user):
+    if replica_alias():
+        await cache.aset(_pin_key(user), 1, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def read_alias_for(user):
+    """Alias à utiliser pour les lectures lourdes de cet utilisateur"""
+    alias = replica_alias()
+    if alias is None or (user.is_authenticated and cache.get(_pin_key(user))):
+        return 'default'
+    return alias
+
+
+async def aread_alias_for(user):
+    alias = replica_alias()
+    if alias is None or (user.is_authenticated and await cache.aget(_pin_key(user))):
+        return 'default'
+    return alias
+
+
+@contextmanager
+def use_replica(alias=None):
+    """Envoie les lectures du bloc vers le réplica (ou l'alias donné)"""
+    token = _read_alias.set(alias or replica_alias())
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Routeur Django : lectures vers l'alias du contexte courant, écritures sur 'default'"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Le réplica contient les mêmes données que 'default'
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Pour les ViewSets : les actions listées dans `replica_actions` lisent sur
+    le réplica (sauf utilisateur épinglé) ; toute écriture réussie épingle
+    l'utilisateur sur 'default'.
+    """
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and request.method in permissions.SAFE_METHODS:
+            alias = read_alias_for(request.user)
+            if alias != 'default':
+                self._replica_token = _read_alias.set(alias)
+
+    def read_from_primary(self):
+        """Lectures restantes de la requête sur 'default' (après une écriture en cours de lecture)"""
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        pin_to_primary(self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+
+        if (request.method not in permissions.SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,127 @@
+"""
+Jeux de questions ("decks") en mémoire.
+
+Un deck est la version figée, prête à corriger, des questions d'un quiz :
+ordre, temps limite, options et bonnes réponses. Il est chargé une fois par
+processus (2 requêtes) puis partagé par toutes les sessions du quiz ;
+toute modification du quiz, d'une question ou d'une option l'invalide
+(cf. api.signals).
+"""
+import threading
+
+from .matching import compile_matcher
+from .models import Question, QuestionOption, answer_points
+
+_decks = {}
+# Incrémenté à chaque invalidation : un chargement commencé avant une
+# invalidation n'est pas mis en cache
+_generations = {}
+_decks_lock = threading.Lock()
+
+
+class DeckOption:
+    __slots__ = ('id', 'text', 'order', 'is_correct')
+
+    def __init__(self, id, text, order, is_correct):
+        self.id = id
+        self.text = text
+        self.order = order
+        self.is_correct = is_correct
+
+
+class DeckQuestion:
+    __slots__ = ('id', 'index', 'text', 'question_type', 'time_limit', 'options', 'option_ids',
+                 'correct_option_ids', 'matcher')
+
+    def __init__(self, id, index, text, question_type, time_limit, options, fuzzy_matching=False):
+        self.id = id
+        self.index = index
+        self.text = text
+        self.question_type = question_type
+        self.time_limit = time_limit
+        self.options = options
+        self.option_ids = frozenset(opt.id for opt in options)
+        self.correct_option_ids = frozenset(opt.id for opt in options if opt.is_correct)
+        self.matcher = compile_matcher([opt.text for opt in options if opt.is_correct], fuzzy_matching)
+
+    @property
+    def uses_options(self):
+        return self.question_type in (Question.QuestionType.MULTIPLE_CHOICE, Question.QuestionType.TRUE_FALSE)
+
+    def grade(self, selected_option_id=None, text_answer=''):
+        """Même règle que Answer.save, sans requête"""
+        if self.uses_options:
+            return selected_option_id in self.correct_option_ids
+        if self.question_type == Question.QuestionType.SHORT_ANSWER:
+            return self.matcher.matches(text_answer)
+        return False
+
+    def points(self, is_correct, response_time):
+        return answer_points(self.time_limit, response_time) if is_correct else 0
+
+    def public_payload(self):
+        """Question courante telle qu'envoyée aux joueurs (sans les bonnes réponses)"""
+        return {
+            "id": self.id,
+            "text": self.text,
+            "time_limit": self.time_limit,
+            "options": [{"id": opt.id, "text": opt.text, "order": opt.order} for opt in self.options]
+        }
+
+
+class QuestionDeck:
+    __slots__ = ('quiz_id', 'questions', 'by_id')
+
+    def __init__(self, quiz_id, questions):
+        self.quiz_id = quiz_id
+        self.questions = questions
+        self.by_id = {q.id: q for q in questions}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def at(self, index):
+        """Question à l'index donné (comme QuizSession.get_current_question)"""
+        if 0 <= index < len(self.questions):
+            return self.questions[index]
+        return None
+
+    @classmethod
+    def load(cls, quiz_id, using=None):
+        questions = list(
+            Question.objects.using(using).filter(quiz_id=quiz_id).order_by('order')
+            .values_list('id', 'text', 'question_type', 'time_limit', 'fuzzy_matching')
+        )
+        options = {}
+        for row in (QuestionOption.objects.using(using).filter(question__quiz_id=quiz_id)
+                    .order_by('order').values_list('question_id', 'id', 'text', 'order', 'is_correct')):
+            options.setdefault(row[0], []).append(DeckOption(*row[1:]))
+        return cls(quiz_id, [
+            DeckQuestion(id, index, text, question_type, time_limit, options.get(id, []), fuzzy_matching)
+            for index, (id, text, question_type, time_limit, fuzzy_matching) in enumerate(questions)
+        ])
+
+
+def get_deck(quiz_id):
+    """Deck du quiz, chargé au premier accès puis gardé en mémoire"""
+    deck = _decks.get(quiz_id)
+    if deck is None:
+        generation = _generations.get(quiz_id, 0)
+        deck = QuestionDeck.load(quiz_id)
+        with _decks_lock:
+            if _generations.get(quiz_id, 0) == generation:
+                deck = _decks.setdefault(quiz_id, deck)
+    return deck
+
+
+def invalidate_deck(quiz_id):
+    with _decks_lock:
+        _decks.pop(quiz_id, None)
+        _generations[quiz_id] = _generations.get(quiz_id, 0) + 1
+
+
+def invalidate_all_decks():
+    with _decks_lock:
+        for quiz_id in _decks:
+            _generations[quiz_id] = _generations.get(quiz_id, 0) + 1
+        _decks.clear()
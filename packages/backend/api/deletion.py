@@ -0,0 +1,117 @@
+"""
+Suppression ensembliste des quiz et des sessions.
+
+Model.delete() passe par le collector de Django : comme des signaux sont
+branchés sur ces modèles, il charge en Python chaque session, participant,
+réponse, question et option avant de les supprimer par lots. Ici, un
+DELETE par table dans l'ordre des dépendances, dans une seule
+transaction ; ce que faisaient les signaux (decks, quiz en
+cache, fichiers d'archive, moteurs en mémoire) est rejoué une fois pour
+l'ensemble, après le commit.
+
+Une table oubliée ici ferait échouer la transaction au commit (contraintes
+de clé étrangère différées de PostgreSQL) : rien n'est supprimé à moitié.
+
+Avec QUIZ_DELETE_IN_BACKGROUND, delete_quiz_later() exécute la suppression
+dans un thread du worker après la réponse (une suppression à la fois).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.db import connection, router, transaction
+
+from . import bus, quiz_cache
+from .decks import invalidate_deck
+from .models import (
+    Quiz, Question, QuestionOption, QuizSession, Participant, Answer, SessionArchive, LeaderboardSnapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _delete(queryset):
+    """DELETE ... WHERE ... sans collector ni signaux ; renvoie le nombre de lignes"""
+    return queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def _delete_sessions(session_ids):
+    """
+    Lignes des sessions (liste d'ids ou sous-requête) et de tout ce qui en
+    dépend ; à appeler dans une transaction.
+    """
+    sessions = list(
+        QuizSession.objects.select_for_update()
+        .filter(pk__in=session_ids).values_list('pk', 'status')
+    )
+    archive_paths = list(
+        SessionArchive.objects.filter(session_id__in=session_ids).values_list('path', flat=True)
+    )
+
+    counts = {
+        'answers': _delete(Answer.objects.filter(participant__session_id__in=session_ids)),
+        'participants': _delete(Participant.objects.filter(session_id__in=session_ids)),
+        'session_archive_users': _delete(
+            SessionArchive.users.through.objects.filter(sessionarchive__session_id__in=session_ids)
+        ),
+        'session_archives': _delete(SessionArchive.objects.filter(session_id__in=session_ids)),
+        'leaderboard_snapshots': _delete(LeaderboardSnapshot.objects.filter(session_id__in=session_ids)),
+        'sessions': _delete(QuizSession.objects.filter(pk__in=session_ids)),
+    }
+
+    def cleanup():
+        for path in archive_paths:
+            Path(path).unlink(missing_ok=True)
+    transaction.on_commit(cleanup)
+
+    # Moteurs, journaux et long-polls des sessions en cours, dans tous les workers
+    for pk, status in sessions:
+        if status != QuizSession.Status.COMPLETED:
+            bus.publish(bus.SESSION, {'id': pk, 'status': bus.SESSION_DELETED, 'index': None, 'version': None})
+    return counts
+
+
+def delete_sessions(session_ids):
+    """Supprime des sessions avec leurs participants, réponses et archives"""
+    with transaction.atomic():
+        return _delete_sessions(session_ids)
+
+
+def delete_quiz(quiz_id):
+    """Supprime un quiz, ses sessions et ses questions ; renvoie le nombre de lignes par table"""
+    with transaction.atomic():
+        if not Quiz.objects.select_for_update().filter(pk=quiz_id).exists():
+            return {}
+        counts = _delete_sessions(QuizSession.objects.filter(quiz_id=quiz_id).values('pk'))
+        counts['answers'] += _delete(Answer.objects.filter(question__quiz_id=quiz_id))
+        counts['options'] = _delete(QuestionOption.objects.filter(question__quiz_id=quiz_id))
+        counts['questions'] = _delete(Question.objects.filter(quiz_id=quiz_id))
+        counts['quizzes'] = _delete(Quiz.objects.filter(pk=quiz_id))
+
+        invalidate_deck(quiz_id)
+        quiz_cache.invalidate(quiz_id)
+        bus.publish(bus.QUIZ, {'id': quiz_id})
+    return counts
+
+
+def _run_deletion(quiz_id):
+    try:
+        counts = delete_quiz(quiz_id)
+        logger.info("Quiz %s supprimé en arrière-plan : %s", quiz_id, counts)
+    except Exception:
+        logger.exception("Suppression en arrière-plan du quiz %s échouée", quiz_id)
+    finally:
+        connection.close()
+
+
+def delete_quiz_later(quiz_id):
+    """Planifie delete_quiz() dans un thread, après le commit de la transaction courante"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-deletion')
+    transaction.on_commit(lambda: _executor.submit(_run_deletion, quiz_id))
@@ -0,0 +1,252 @@
+"""
+Journal d'événements append-only par session (SESSION_EVENT_LOG_ENABLED).
+
+Chaque session a son fichier SESSION_EVENT_LOG_DIR/session_<id>.log,
+une suite d'enregistrements binaires compacts :
+
+    longueur (uint32) | crc32 (uint32) | type (uint8) | champs (struct)
+
+Événements : arrivée d'un participant, transition (statut + index de la
+question courante) et réponse corrigée (avec les points attribués).
+
+Chaque enregistrement est écrit immédiatement (il survit à la mort du
+worker) ; les fsync sont groupés par un thread de fond toutes les
+SESSION_EVENT_LOG_FSYNC_INTERVAL secondes. Avec SESSION_EVENT_LOG_DURABLE,
+append() attend le fsync suivant avant de rendre la main (pour survivre
+aussi à une coupure de courant).
+
+La relecture (read_events, replay) passe par un mmap du fichier et
+s'arrête au premier enregistrement tronqué ou corrompu, c'est-à-dire
+à ce qui a été écrit juste avant un crash.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+
+HEADER = struct.Struct('<II')
+
+JOIN, TRANSITION, ANSWER = 1, 2, 3
+_JOIN = struct.Struct('<Bqq')
+_TRANSITION = struct.Struct('<BBI')
+_ANSWER = struct.Struct('<BqqqBIIH')
+
+STATUSES = ('WAITING', 'IN_PROGRESS', 'COMPLETED')
+
+Join = namedtuple('Join', 'participant_id user_id')
+Transition = namedtuple('Transition', 'status question_index')
+AnswerEvent = namedtuple(
+    'AnswerEvent',
+    'participant_id question_id selected_option_id is_correct points response_time text_answer'
+)
+
+_logs = {}
+_logs_lock = threading.Lock()
+_syncer = None
+_wake_syncer = threading.Event()
+
+
+def enabled():
+    return settings.SESSION_EVENT_LOG_ENABLED
+
+
+def log_path(session_id):
+    return Path(settings.SESSION_EVENT_LOG_DIR) / f'session_{int(session_id)}.log'
+
+
+class SessionEventLog:
+    """Fichier journal d'une session ouvert en ajout"""
+
+    def __init__(self, session_id):
+        path = log_path(session_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.session_id = session_id
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        self.cond = threading.Condition()
+        self.written = 0
+        self.synced = 0
+
+    def append(self, payload, wait=False):
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self.cond:
+            # Un seul write() par enregistrement, en mode O_APPEND
+            os.write(self.fd, record)
+            self.written += 1
+            sequence = self.written
+        _wake_syncer.set()
+        if wait:
+            with self.cond:
+                self.cond.wait_for(lambda: self.synced >= sequence or self.fd is None)
+
+    def sync(self):
+        with self.cond:
+            target = self.written
+            if self.synced >= target or self.fd is None:
+                return
+            fd = self.fd
+        os.fsync(fd)
+        with self.cond:
+            self.synced = max(self.synced, target)
+            self.cond.notify_all()
+
+    def close(self):
+        self.sync()
+        with self.cond:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+            self.cond.notify_all()
+
+
+def _get_log(session_id):
+    log = _logs.get(session_id)
+    if log is None:
+        with _logs_lock:
+            log = _logs.get(session_id)
+            if log is None:
+                log = _logs[session_id] = SessionEventLog(session_id)
+                _start_syncer()
+    return log
+
+
+def _append(session_id, payload):
+    _get_log(int(session_id)).append(payload, wait=settings.SESSION_EVENT_LOG_DURABLE)
+
+
+def record_join(participant):
+    if enabled():
+        _append(participant.session_id, _JOIN.pack(JOIN, participant.pk, participant.user_id))
+
+
+def record_transition(session):
+    if enabled():
+        status = STATUSES.index(session.status)
+        _append(session.pk, _TRANSITION.pack(TRANSITION, status, session.current_question_index))
+
+
+def record_answer(session_id, participant_id, question_id, selected_option_id, is_correct,
+                  points, response_time, text_answer=''):
+    if enabled():
+        text = (text_answer or '').encode()[:0xFFFF]
+        _append(session_id, _ANSWER.pack(
+            ANSWER, participant_id, question_id, selected_option_id or 0,
+            is_correct, points, response_time, len(text),
+        ) + text)
+
+
+def close_log(session_id):
+    """fsync final et fermeture (fin de session)"""
+    with _logs_lock:
+        log = _logs.pop(int(session_id), None)
+    if log is not None:
+        log.close()
+
+
+def _sync_loop():
+    while True:
+        _wake_syncer.wait()
+        # Laisse le temps aux écritures concurrentes de rejoindre le même fsync
+        _wake_syncer.clear()
+        time.sleep(settings.SESSION_EVENT_LOG_FSYNC_INTERVAL)
+        for log in list(_logs.values()):
+            log.sync()
+
+
+def _start_syncer():
+    global _syncer
+    if _syncer is None or not _syncer.is_alive():
+        _syncer = threading.Thread(target=_sync_loop, name='event-log-fsync', daemon=True)
+        _syncer.start()
+
+
+# ==================== Relecture ====================
+
+def _decode(payload):
+    kind = payload[0]
+    if kind == JOIN:
+        return Join(*_JOIN.unpack_from(payload)[1:])
+    if kind == TRANSITION:
+        _, status, index = _TRANSITION.unpack_from(payload)
+        return Transition(STATUSES[status], index)
+    if kind == ANSWER:
+        _, participant_id, question_id, option_id, is_correct, points, response_time, text_length = \
+            _ANSWER.unpack_from(payload)
+        text = bytes(payload[_ANSWER.size:_ANSWER.size + text_length]).decode(errors='ignore')
+        return AnswerEvent(participant_id, question_id, option_id or None, bool(is_correct),
+                           points, response_time, text)
+    raise ValueError(f"Type d'événement inconnu : {kind}")
+
+
+def read_events(session_id):
+    """Événements du journal, dans l'ordre, jusqu'au premier enregistrement incomplet"""
+    path = log_path(session_id)
+    if not path.exists():
+        return
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + HEADER.size <= size:
+                length, crc = HEADER.unpack_from(data, offset)
+                start = offset + HEADER.size
+                end = start + length
+                if end > size:
+                    break
+                payload = data[start:end]
+                if zlib.crc32(payload) != crc:
+                    break
+                yield _decode(payload)
+                offset = end
+
+
+class ReplayState:
+    """Scores et réponses reconstruits à partir du journal"""
+
+    def __init__(self):
+        self.status = None
+        self.question_index = 0
+        self.users = {}
+        self.scores = {}
+        self.answer_counts = {}
+        self.correct_counts = {}
+        self.total_times = {}
+        self.answers = {}
+        self.event_count = 0
+
+    def apply(self, event):
+        self.event_count += 1
+        if isinstance(event, Join):
+            self.users[event.participant_id] = event.user_id
+            self.scores.setdefault(event.participant_id, 0)
+        elif isinstance(event, Transition):
+            self.status = event.status
+            self.question_index = event.question_index
+        elif isinstance(event, AnswerEvent):
+            key = (event.participant_id, event.question_id)
+            if key in self.answers:
+                return
+            self.answers[key] = event
+            pid = event.participant_id
+            self.scores[pid] = self.scores.get(pid, 0) + event.points
+            self.answer_counts[pid] = self.answer_counts.get(pid, 0) + 1
+            self.correct_counts[pid] = self.correct_counts.get(pid, 0) + event.is_correct
+            self.total_times[pid] = self.total_times.get(pid, 0) + event.response_time
+
+    def ranking(self):
+        """(participant_id, score) du premier au dernier"""
+        return sorted(self.scores.items(), key=lambda item: -item[1])
+
+
+def replay(session_id):
+    state = ReplayState()
+    for event in read_events(session_id):
+        state.apply(event)
+    return state
@@ -0,0 +1,134 @@
+"""
+Envoi idempotent des réponses : en-tête `Idempotency-Key`.
+
+Sur un Wi-Fi instable, le client renvoie la même réponse sans savoir si le
+premier envoi est arrivé. Avec le même Idempotency-Key (un UUID généré par
+le client pour chaque réponse), un renvoi reçoit la réponse d'origine
+(201 compris) en une lecture du cache IDEMPOTENCY_CACHE_ALIAS, sans
+toucher la base ni recorriger.
+
+Un renvoi connu est servi avant l'authentification et les throttles
+(lookup()) : l'utilisateur est lu dans le JWT signé, sans requête en base,
+et le renvoi ne consomme aucun jeton des seaux.
+
+La clé est propre à l'utilisateur et à la session. Pendant le traitement,
+un marqueur est posé (cache.add) : un renvoi simultané reçoit un 409 et
+réessaie. Seules les réponses 2xx sont gardées (IDEMPOTENCY_TTL secondes) ;
+après une erreur le marqueur est retiré et le client peut corriger son
+envoi. Une clé réutilisée avec un autre corps reçoit un 422.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Durée max d'un traitement : au-delà, un marqueur orphelin (worker tué) expire
+PENDING_TTL = 30
+PENDING = 'pending'
+
+jwt_authentication = JWTAuthentication()
+
+
+def _cache():
+    return caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+
+
+def _fingerprint(data):
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _key(user_id, scope, key):
+    # Haché : longueur bornée et caractères sûrs pour tout backend de cache
+    digest = hashlib.sha256(f'{user_id}:{scope}:{key}'.encode()).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def _stored_response(stored, fingerprint):
+    if stored == PENDING:
+        return 409, {"error": "Cette réponse est déjà en cours d'envoi, réessayez."}
+    stored_fingerprint, status_code, data = stored
+    if stored_fingerprint != fingerprint:
+        return 422, {"error": f"{HEADER} déjà utilisé pour un autre envoi."}
+    return status_code, data
+
+
+def _token_user_id(request):
+    """Id de l'utilisateur du JWT (signature et expiration vérifiées, sans requête) ; None sinon"""
+    header = jwt_authentication.get_header(request)
+    raw_token = jwt_authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return jwt_authentication.get_validated_token(raw_token)['user_id']
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+
+def lookup(request, scope):
+    """
+    À appeler avant l'authentification et les throttles. Retourne (statut,
+    corps) si la clé est déjà connue (réponse d'origine, envoi en cours ou
+    clé réutilisée), sinon None : la requête suit le chemin normal et begin()
+    décide. Ne pose aucun marqueur.
+    """
+    key = request.headers.get(HEADER)
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        return None
+    user_id = _token_user_id(request)
+    if user_id is None:
+        return None
+    stored = _cache().get(_key(user_id, scope, key))
+    if stored is None:
+        return None
+    return _stored_response(stored, _fingerprint(request.data))
+
+
+def begin(request, scope):
+    """
+    À appeler avant de traiter la requête. Retourne (jeton, réponse) :
+    réponse est (statut, corps) à renvoyer tel quel (réponse d'origine,
+    envoi en cours, clé invalide ou réutilisée) ; sinon None, et le jeton
+    (None sans en-tête) est passé à finish() ou abandon().
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        return None, (400, {"error": f"En-tête {HEADER} invalide."})
+
+    token = (_key(request.user.pk, scope, key), _fingerprint(request.data))
+    cache = _cache()
+    stored = cache.get(token[0])
+    if stored is None:
+        if cache.add(token[0], PENDING, PENDING_TTL):
+            return token, None
+        stored = cache.get(token[0])
+    if stored is None:
+        # Marqueur expiré entre les deux lectures : traiter quand même
+        cache.set(token[0], PENDING, PENDING_TTL)
+        return token, None
+    return None, _stored_response(stored, token[1])
+
+
+def finish(token, status_code, data):
+    """Garde une réponse réussie pour les renvois ; retire le marqueur sinon"""
+    if token is None:
+        return
+    if 200 <= status_code < 300:
+        # Types simples, rendus comme DRF (dates ISO) : le renvoi est identique à l'original
+        data = json.loads(json.dumps(data, cls=JSONEncoder))
+        _cache().set(token[0], (token[1], status_code, data), settings.IDEMPOTENCY_TTL)
+    else:
+        abandon(token)
+
+
+def abandon(token):
+    if token is not None:
+        _cache().delete(token[0])
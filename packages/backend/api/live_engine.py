@@ -0,0 +1,378 @@
+"""
+Moteur en mémoire des sessions en cours, avec écriture différée.
+
+Chemin classique d'une réponse : session, participant, question courante
+(count + index), doublon, option, insertion, mise à jour du score... soit
+une demi-douzaine de requêtes. Avec LIVE_ENGINE_ENABLED, la première
+réponse d'une session IN_PROGRESS charge son état dans un
+LiveSessionEngine ; ensuite les réponses sont vérifiées et corrigées en
+mémoire et le classement est servi depuis la mémoire. Un thread de fond
+persiste les réponses (bulk_create) et les scores (bulk_update) par lots
+toutes les LIVE_ENGINE_FLUSH_INTERVAL secondes, ou dès que
+LIVE_ENGINE_FLUSH_BATCH_SIZE réponses attendent.
+
+Un seul moteur par session et par processus, seul à écrire l'état de sa
+session. Le déploiement doit donc envoyer toutes les requêtes d'une session
+au même processus (un worker ASGI, ou une répartition collante par id de
+session) ; sinon laisser LIVE_ENGINE_ENABLED à False.
+"""
+import atexit
+import logging
+import threading
+from array import array
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import bus, event_log
+from .decks import get_deck
+from .models import QuizSession, Participant, Answer, MAX_RESPONSE_TIME, MAX_TEXT_ANSWER_LENGTH
+
+logger = logging.getLogger(__name__)
+
+_engines = {}
+_registry_lock = threading.Lock()
+_flusher = None
+_wake_flusher = threading.Event()
+
+
+def enabled():
+    return settings.LIVE_ENGINE_ENABLED
+
+
+class LiveSessionEngine:
+    """État d'une session en cours, possédé par un seul processus"""
+
+    def __init__(self, session):
+        self.session_id = session.pk
+        self.quiz_id = session.quiz_id
+        self.host_id = session.host_id
+        self.current_index = session.current_question_index
+        self.lock = threading.Lock()
+
+        # Un "slot" par participant ; chaque colonne est un tableau compact
+        self.participant_ids = array('q')
+        self.user_ids = array('q')
+        self.scores = array('q')
+        self.answer_counts = array('l')
+        self.correct_counts = array('l')
+        self.total_times = array('q')
+        self.names = []
+        self.slot_by_user = {}
+        # question_id -> slots ayant déjà répondu
+        self.answered = {}
+
+        # Écritures en attente
+        self.pending_answers = []
+        self.dirty_slots = set()
+
+    def load(self):
+        participants = (
+            Participant.objects.filter(session_id=self.session_id)
+            .order_by('id')
+            .values_list('id', 'user_id', 'score', 'user__username', 'user__first_name', 'user__last_name')
+        )
+        for participant_id, user_id, score, username, first_name, last_name in participants:
+            self._add_slot(participant_id, user_id, score, username, f"{first_name} {last_name}".strip())
+
+        slot_by_participant = {pid: slot for slot, pid in enumerate(self.participant_ids)}
+        answers = (
+            Answer.objects.filter(participant__session_id=self.session_id)
+            .values_list('participant_id', 'question_id', 'is_correct', 'response_time')
+        )
+        for participant_id, question_id, is_correct, response_time in answers:
+            slot = slot_by_participant[participant_id]
+            self.answered.setdefault(question_id, set()).add(slot)
+            self.answer_counts[slot] += 1
+            self.correct_counts[slot] += is_correct
+            self.total_times[slot] += response_time
+
+        if event_log.enabled():
+            self._recover_from_log(slot_by_participant)
+        return self
+
+    def _recover_from_log(self, slot_by_participant):
+        """
+        Reprend les réponses journalisées mais jamais persistées (worker
+        mort avant l'écriture différée) : elles repartent en attente.
+        """
+        recovered = 0
+        for event in event_log.read_events(self.session_id):
+            if not isinstance(event, event_log.AnswerEvent):
+                continue
+            slot = slot_by_participant.get(event.participant_id)
+            answered = self.answered.setdefault(event.question_id, set())
+            if slot is None or slot in answered:
+                continue
+            answered.add(slot)
+            self.scores[slot] += event.points
+            self.answer_counts[slot] += 1
+            self.correct_counts[slot] += event.is_correct
+            self.total_times[slot] += event.response_time
+            self.dirty_slots.add(slot)
+            self.pending_answers.append(Answer(
+                participant_id=event.participant_id,
+                question_id=event.question_id,
+                selected_option_id=event.selected_option_id,
+                text_answer=event.text_answer,
+                is_correct=event.is_correct,
+                response_time=event.response_time,
+            ))
+            recovered += 1
+        if recovered:
+            logger.warning("Session %s : %d réponse(s) reprise(s) du journal", self.session_id, recovered)
+
+    def _add_slot(self, participant_id, user_id, score, username, full_name):
+        slot = len(self.participant_ids)
+        self.participant_ids.append(participant_id)
+        self.user_ids.append(user_id)
+        self.scores.append(score)
+        self.answer_counts.append(0)
+        self.correct_counts.append(0)
+        self.total_times.append(0)
+        self.names.append((username, full_name))
+        self.slot_by_user[user_id] = slot
+        return slot
+
+    def can_view(self, user):
+        return user.pk == self.host_id or user.pk in self.slot_by_user
+
+    def set_question(self, index):
+        with self.lock:
+            self.current_index = index
+
+    def submit(self, user_id, data):
+        """
+        Vérifie, corrige et enregistre (en mémoire) une réponse.
+        Retourne (statut HTTP, corps) avec les mêmes messages que AnswerSubmitSerializer.
+        """
+        slot = self.slot_by_user.get(user_id)
+        if slot is None:
+            return 404, {"detail": "Pas trouvé."}
+
+        question = get_deck(self.quiz_id).at(self.current_index)
+        if question is None:
+            return 400, {"error": "Aucune question active"}
+
+        errors, values = check_submission(question, data)
+        if errors:
+            return 400, errors
+        selected_option, text_answer, response_time = values
+
+        with self.lock:
+            answered = self.answered.setdefault(question.id, set())
+            if slot in answered:
+                return 400, {"non_field_errors": ["Vous avez déjà répondu à cette question."]}
+
+            is_correct = question.grade(selected_option, text_answer)
+            points = question.points(is_correct, response_time)
+            answered.add(slot)
+            self.scores[slot] += points
+            self.answer_counts[slot] += 1
+            self.correct_counts[slot] += is_correct
+            self.total_times[slot] += response_time
+            self.dirty_slots.add(slot)
+            self.pending_answers.append(Answer(
+                participant_id=self.participant_ids[slot],
+                question_id=question.id,
+                selected_option_id=selected_option,
+                text_answer=text_answer,
+                is_correct=is_correct,
+                response_time=response_time,
+            ))
+            pending = len(self.pending_answers)
+
+        event_log.record_answer(
+            self.session_id, self.participant_ids[slot], question.id, selected_option,
+            is_correct, points, response_time, text_answer
+        )
+        if pending >= settings.LIVE_ENGINE_FLUSH_BATCH_SIZE:
+            _wake_flusher.set()
+
+        # L'id n'existe qu'après l'écriture différée
+        return 201, {
+            'id': None,
+            'participant_id': self.participant_ids[slot],
+            'question_id': question.id,
+            'selected_option_id': selected_option,
+            'text_answer': text_answer,
+            'is_correct': is_correct,
+            'response_time': response_time,
+            'answered_at': None,
+        }
+
+    def leaderboard(self):
+        """Mêmes entrées que views.build_leaderboard, sans requête"""
+        with self.lock:
+            slots = sorted(range(len(self.scores)), key=lambda s: -self.scores[s])
+            entries = []
+            for rank, slot in enumerate(slots, start=1):
+                answer_count = self.answer_counts[slot]
+                correct_count = self.correct_counts[slot]
+                username, full_name = self.names[slot]
+                entries.append({
+                    'rank': rank,
+                    'user_id': self.user_ids[slot],
+                    'username': username,
+                    'full_name': full_name,
+                    'score': self.scores[slot],
+                    'answer_count': answer_count,
+                    'correct_count': correct_count,
+                    'accuracy': (correct_count / answer_count * 100) if answer_count > 0 else 0,
+                    'average_time': (self.total_times[slot] / answer_count / 1000) if answer_count > 0 else 0,
+                })
+        return entries
+
+    def flush(self):
+        """Persiste les réponses et scores en attente ; retourne le nombre de réponses écrites"""
+        with self.lock:
+            answers, self.pending_answers = self.pending_answers, []
+            dirty, self.dirty_slots = self.dirty_slots, set()
+            participants = [
+                Participant(pk=self.participant_ids[slot], score=self.scores[slot]) for slot in dirty
+            ]
+        if not answers and not participants:
+            return 0
+
+        try:
+            with transaction.atomic():
+                # Réponses déjà corrigées : pas de Answer.save()
+                Answer.objects.bulk_create(answers, ignore_conflicts=True)
+                Participant.objects.bulk_update(participants, ['score'])
+        except Exception:
+            logger.exception("Écriture différée de la session %s échouée, nouvel essai au prochain cycle",
+                             self.session_id)
+            with self.lock:
+                self.pending_answers[:0] = answers
+                self.dirty_slots |= dirty
+            return 0
+        return len(answers)
+
+
+def _parse_int(value, required=False):
+    if value is None or value == '':
+        return None, ("Ce champ est obligatoire." if required else None)
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return None, "Un nombre entier valide est requis."
+
+
+def check_submission(question, data):
+    """
+    Valide une réponse à une question du deck, sans requête. Retourne
+    (erreurs, None) avec les messages de AnswerSubmitSerializer, ou
+    (None, (selected_option, text_answer, response_time)).
+    """
+    response_time, error = _parse_int(data.get('response_time'), required=True)
+    if error is None and response_time < 0:
+        error = "Le temps ne peut pas être négatif."
+    elif error is None and response_time > MAX_RESPONSE_TIME:
+        error = f"Assurez-vous que cette valeur est inférieure ou égale à {MAX_RESPONSE_TIME}."
+    if error:
+        return {"response_time": [error]}, None
+    selected_option, error = _parse_int(data.get('selected_option'))
+    if error:
+        return {"selected_option": [error]}, None
+    text_answer = data.get('text_answer')
+    if text_answer is None:
+        text_answer = ''
+    elif not isinstance(text_answer, str):
+        return {"text_answer": ["Une chaîne de caractères valide est requise."]}, None
+    elif len(text_answer) > MAX_TEXT_ANSWER_LENGTH:
+        return {"text_answer": [f"Assurez-vous que ce champ comporte au plus {MAX_TEXT_ANSWER_LENGTH} caractères."]}, None
+
+    if question.uses_options:
+        if selected_option is None:
+            return {"selected_option": ["Vous devez sélectionner une option."]}, None
+        if selected_option not in question.option_ids:
+            return {"selected_option": ["Cette option n'appartient pas à la question."]}, None
+    elif not text_answer.strip():
+        return {"text_answer": ["Vous devez fournir une réponse textuelle."]}, None
+    if selected_option not in question.option_ids:
+        selected_option = None
+    return None, (selected_option, text_answer, response_time)
+
+
+def get_engine(session_id, create=True):
+    """
+    Moteur de la session s'il est chargé dans ce processus. Avec `create`,
+    charge le moteur d'une session IN_PROGRESS en direct. None si le moteur est désactivé.
+    """
+    if not enabled():
+        return None
+    try:
+        session_id = int(session_id)
+    except (TypeError, ValueError):
+        return None
+
+    engine = _engines.get(session_id)
+    if engine is not None or not create:
+        return engine
+
+    # Les sessions en autonomie n'ont pas de question courante commune (cf. api.self_paced)
+    session = QuizSession.objects.filter(
+        pk=session_id, status=QuizSession.Status.IN_PROGRESS, mode=QuizSession.Mode.LIVE
+    ).first()
+    if session is None:
+        return None
+    with _registry_lock:
+        engine = _engines.get(session_id)
+        if engine is None:
+            engine = LiveSessionEngine(session).load()
+            _engines[session_id] = engine
+            _start_flusher()
+    return engine
+
+
+def on_session_event(payload):
+    """Abonné du bus (canal SESSION) : suit la session dans le processus qui possède son moteur"""
+    if payload['status'] == QuizSession.Status.COMPLETED:
+        close_engine(payload['id'])
+        return
+    if payload['status'] == bus.SESSION_DELETED:
+        discard_engine(payload['id'])
+        return
+    engine = _engines.get(payload['id'])
+    if engine is not None:
+        engine.set_question(payload['index'])
+
+
+def close_engine(session_id):
+    """Persiste tout et libère le moteur (fin de session)"""
+    with _registry_lock:
+        engine = _engines.pop(session_id, None)
+    if engine is not None:
+        engine.flush()
+
+
+def discard_engine(session_id):
+    """Libère le moteur sans rien écrire (session supprimée)"""
+    with _registry_lock:
+        _engines.pop(session_id, None)
+
+
+def flush_all():
+    written = 0
+    for engine in list(_engines.values()):
+        written += engine.flush()
+    return written
+
+
+def _flush_loop():
+    while True:
+        _wake_flusher.wait(settings.LIVE_ENGINE_FLUSH_INTERVAL)
+        _wake_flusher.clear()
+        if flush_all():
+            # Rend la connexion (ou la remet au pool) entre deux cycles
+            connection.close()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is None or not _flusher.is_alive():
+        _flusher = threading.Thread(target=_flush_loop, name='live-engine-flusher', daemon=True)
+        _flusher.start()
+
+
+atexit.register(flush_all)
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api import archive
+from api.models import QuizSession
+
+
+def _size(entry):
+    if entry['bytes'] is None:
+        return f"{entry['rows']} lignes"
+    return f"{entry['rows']} lignes, {entry['bytes'] / 1024 / 1024:.1f} Mo"
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive les sessions terminées depuis plus de SESSION_ARCHIVE_AFTER_DAYS jours "
+        "(participants et réponses vers des fichiers compressés) et affiche le gain sur les tables. "
+        "Avec --restore, réinsère une session archivée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, help="Remplace SESSION_ARCHIVE_AFTER_DAYS")
+        parser.add_argument('--limit', type=int, help="Nombre maximal de sessions archivées")
+        parser.add_argument('--dry-run', action='store_true', help="Liste les sessions sans les archiver")
+        parser.add_argument('--vacuum', action='store_true',
+                            help="VACUUM ANALYZE des tables après archivage (PostgreSQL)")
+        parser.add_argument('--restore', type=int, metavar='SESSION_ID', help="Restaure une session archivée")
+
+    def handle(self, older_than_days, limit, dry_run, vacuum, restore, **options):
+        if restore is not None:
+            self._restore(restore)
+            return
+
+        session_ids = list(archive.archivable_sessions(older_than_days).values_list('pk', flat=True)[:limit])
+        if dry_run:
+            self.stdout.write(f"{len(session_ids)} session(s) archivable(s) : {session_ids}")
+            return
+
+        before = archive.table_sizes()
+        started = time.perf_counter()
+        archived = []
+        for session_id in session_ids:
+            summary = archive.archive_session(session_id)
+            if summary is not None:
+                archived.append(summary)
+        elapsed = time.perf_counter() - started
+
+        if vacuum and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in before:
+                    cursor.execute(f'VACUUM ANALYZE {connection.ops.quote_name(table)}')
+        after = archive.table_sizes()
+
+        raw = sum(s.raw_size for s in archived)
+        compressed = sum(s.compressed_size for s in archived)
+        self.stdout.write(
+            f"{len(archived)} session(s) archivée(s) en {elapsed:.1f} s — "
+            f"{sum(s.participant_count for s in archived)} participants, "
+            f"{sum(s.answer_count for s in archived)} réponses, "
+            f"{raw / 1024:.0f} Ko de JSON -> {compressed / 1024:.0f} Ko compressés"
+        )
+        for table in before:
+            self.stdout.write(f"  {table:<16} {_size(before[table])}  ->  {_size(after[table])}")
+        if connection.vendor == 'postgresql' and not vacuum:
+            self.stdout.write(
+                "  (PostgreSQL ne réutilise l'espace des lignes supprimées qu'après VACUUM ; "
+                "la taille des fichiers ne baisse qu'avec VACUUM FULL)"
+            )
+
+    def _restore(self, session_id):
+        session = QuizSession.objects.filter(pk=session_id).first()
+        if session is None:
+            raise CommandError(f"La session {session_id} n'existe pas.")
+        if not archive.restore_session(session):
+            raise CommandError(f"La session {session_id} n'est pas archivée.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Session {session_id} restaurée ({session.participants.count()} participants)."
+        ))
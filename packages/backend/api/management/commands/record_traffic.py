@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import traffic
+from api.models import QuizSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Enregistre les requêtes d'une session (arrivées, réponses, polling, transitions) "
+        "dans TRAFFIC_RECORD_DIR, pour les rejouer avec benchmarks.replay_traffic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int)
+        parser.add_argument('--duration', type=int, default=4 * 3600,
+                            help="Durée maximale de l'enregistrement en secondes (4 h par défaut)")
+        parser.add_argument('--stop', action='store_true', help="Arrête l'enregistrement")
+
+    def handle(self, session_id, duration, stop, **options):
+        path = traffic.record_path(session_id)
+        if stop:
+            traffic.stop_recording(session_id)
+            self.stdout.write(f"Enregistrement de la session {session_id} arrêté ({path})")
+            return
+
+        session = QuizSession.objects.select_related('quiz').filter(pk=session_id).first()
+        if session is None:
+            raise CommandError(f"La session {session_id} n'existe pas.")
+        if session.status == QuizSession.Status.COMPLETED:
+            raise CommandError(f"La session {session_id} est terminée.")
+        traffic.start_recording(session, duration)
+        self.stdout.write(
+            f"Enregistrement de la session {session_id} vers {path} "
+            f"(les workers le prennent en compte sous {traffic.REFRESH_SECONDS:.0f} s)"
+        )
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from api import event_log
+from api.models import QuizSession, Participant, Answer, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Relit le journal d'événements d'une session et affiche le classement reconstruit. "
+        "Avec --apply, persiste les réponses journalisées absentes de la base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', type=int)
+        parser.add_argument('--top', type=int, default=10, help="Nombre de lignes du classement affichées")
+        parser.add_argument('--apply', action='store_true',
+                            help="Insère les réponses manquantes et ajoute leurs points aux scores")
+
+    def handle(self, session_id, top, apply, **options):
+        if not event_log.log_path(session_id).exists():
+            raise CommandError(f"Aucun journal pour la session {session_id} ({event_log.log_path(session_id)})")
+
+        started = time.perf_counter()
+        state = event_log.replay(session_id)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(
+            f"{state.event_count} événements relus en {elapsed:.1f} ms — statut {state.status}, "
+            f"question {state.question_index}, {len(state.scores)} participants, {len(state.answers)} réponses"
+        )
+
+        ranking = state.ranking()[:top]
+        names = dict(
+            User.objects.filter(participations__id__in=[pid for pid, _ in ranking])
+            .values_list('participations__id', 'username')
+        )
+        for rank, (participant_id, score) in enumerate(ranking, start=1):
+            answers = state.answer_counts.get(participant_id, 0)
+            correct = state.correct_counts.get(participant_id, 0)
+            self.stdout.write(
+                f"{rank:>4}. {names.get(participant_id, participant_id)!s:<30} {score:>7} pts "
+                f"({correct}/{answers} correctes)"
+            )
+
+        if apply:
+            self._apply(session_id, state)
+
+    def _apply(self, session_id, state):
+        if not QuizSession.objects.filter(pk=session_id).exists():
+            raise CommandError(f"La session {session_id} n'existe plus en base.")
+
+        stored = set(
+            Answer.objects.filter(participant__session_id=session_id)
+            .values_list('participant_id', 'question_id')
+        )
+        missing = [event for key, event in state.answers.items() if key not in stored]
+
+        with transaction.atomic():
+            Answer.objects.bulk_create([
+                Answer(
+                    participant_id=event.participant_id,
+                    question_id=event.question_id,
+                    selected_option_id=event.selected_option_id,
+                    text_answer=event.text_answer,
+                    is_correct=event.is_correct,
+                    response_time=event.response_time,
+                )
+                for event in missing
+            ], ignore_conflicts=True)
+
+            points = {}
+            for event in missing:
+                points[event.participant_id] = points.get(event.participant_id, 0) + event.points
+            for participant_id, delta in points.items():
+                if delta:
+                    Participant.objects.filter(pk=participant_id).update(score=F('score') + delta)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(missing)} réponse(s) restaurée(s)."))
@@ -0,0 +1,308 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import search
+from api.models import User, Quiz, Question, QuestionOption, QuizSession, Participant, Answer, answer_points
+
+FIRST_NAMES = [
+    'Camille', 'Léa', 'Manon', 'Chloé', 'Inès', 'Jade', 'Louise', 'Emma', 'Sarah', 'Lina',
+    'Lucas', 'Hugo', 'Louis', 'Nathan', 'Gabriel', 'Arthur', 'Jules', 'Adam', 'Raphaël', 'Tom',
+]
+LAST_NAMES = [
+    'Martin', 'Bernard', 'Thomas', 'Petit', 'Robert', 'Richard', 'Durand', 'Dubois', 'Moreau', 'Laurent',
+    'Simon', 'Michel', 'Lefebvre', 'Leroy', 'Roux', 'David', 'Bertrand', 'Morel', 'Fournier', 'Girard',
+]
+TOPICS = [
+    'Histoire', 'Géographie', 'Mathématiques', 'Physique', 'Chimie', 'Biologie',
+    'Littérature', 'Anglais', 'Philosophie', 'Économie', 'Informatique', 'Musique',
+]
+WORDS = [
+    'révolution', 'capitale', 'fleuve', 'équation', 'molécule', 'cellule', 'roman', 'verbe',
+    'théorème', 'marché', 'algorithme', 'accord', 'empire', 'énergie', 'atome', 'poème',
+]
+TIME_LIMITS = [10, 20, 30, 45, 60]
+ID_BLOCK = 10000
+
+
+class IdAllocator:
+    """Ids explicites (les lignes se référencent avant d'être insérées)"""
+
+    def __init__(self, model):
+        self.table = model._meta.db_table
+        self.next_id = self.end = 0
+
+    def __call__(self):
+        if self.next_id >= self.end:
+            self.next_id, self.end = self._reserve(ID_BLOCK)
+        value = self.next_id
+        self.next_id += 1
+        return value
+
+    def _reserve(self, count):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Plage réservée dans la séquence : l'application peut continuer à insérer
+                cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [self.table])
+                sequence = cursor.fetchone()[0]
+                cursor.execute('SELECT nextval(%s)', [sequence])
+                start = cursor.fetchone()[0]
+                cursor.execute('SELECT setval(%s, %s)', [sequence, start + count - 1])
+                return start, start + count
+            if self.end:
+                return self.end, self.end + count
+            cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(self.table)}')
+            start = cursor.fetchone()[0] + 1
+            return start, start + count
+
+
+class TableWriter:
+    """Lignes d'une table par lots : COPY ... FROM STDIN sous PostgreSQL, INSERT groupés sinon"""
+
+    def __init__(self, model, columns, batch_size):
+        self.model = model
+        self.fields = [model._meta.get_field(name) for name in columns]
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+        self.seconds = 0.0
+        qn = connection.ops.quote_name
+        column_list = ', '.join(qn(field.column) for field in self.fields)
+        self.copy_sql = f'COPY {qn(model._meta.db_table)} ({column_list}) FROM STDIN'
+        self.insert_sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            qn(model._meta.db_table), column_list, ', '.join(['%s'] * len(self.fields))
+        )
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                with cursor.copy(self.copy_sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                cursor.executemany(self.insert_sql, [
+                    [field.get_db_prep_save(value, connection) for field, value in zip(self.fields, row)]
+                    for row in rows
+                ])
+        self.seconds += time.perf_counter() - started
+        self.count += len(rows)
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données volumineux et cohérent (utilisateurs, quiz, sessions terminées, "
+        "participants, réponses et scores) via COPY sous PostgreSQL. Déterministe pour un --seed donné."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--teachers', type=int, default=20)
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--quizzes', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=10, help="Questions par quiz")
+        parser.add_argument('--sessions', type=int, default=2000)
+        parser.add_argument('--participants', type=int, default=50, help="Participants par session")
+        parser.add_argument('--answer-rate', type=float, default=0.9,
+                            help="Probabilité qu'un participant réponde à une question")
+        parser.add_argument('--days', type=int, default=365, help="Sessions réparties sur ces derniers jours")
+        parser.add_argument('--password', default='seed', help="Mot de passe de tous les comptes générés")
+        parser.add_argument('--batch-size', type=int, default=50000)
+
+    def handle(self, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            self.writers = []
+            teachers, students = self._users(options)
+            quizzes = self._quizzes(options, teachers)
+            self._sessions(options, quizzes, students)
+            for writer in self.writers:
+                writer.flush()
+
+        quiz_ids = [quiz['id'] for quiz in quizzes]
+        if search.is_supported('default'):
+            for offset in range(0, len(quiz_ids), 1000):
+                Quiz.objects.filter(pk__in=quiz_ids[offset:offset + 1000]).update(
+                    search_document=search.document_expression()
+                )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for writer in self.writers:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(writer.model._meta.db_table)}')
+
+        elapsed = time.perf_counter() - started
+        for writer in self.writers:
+            rate = writer.count / writer.seconds if writer.seconds else 0
+            self.stdout.write(
+                f"  {writer.model._meta.db_table:<20} {writer.count:>10} lignes  "
+                f"{writer.seconds:7.2f} s  ({rate:,.0f} lignes/s)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Jeu de données généré en {elapsed:.1f} s (seed {options['seed']})."))
+
+    def _writer(self, model, columns):
+        writer = TableWriter(model, columns, self.batch_size)
+        self.writers.append(writer)
+        return writer
+
+    def _users(self, options):
+        rng = self.rng
+        next_id = IdAllocator(User)
+        password = make_password(options['password'])
+        writer = self._writer(User, [
+            'id', 'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+            'is_staff', 'is_active', 'date_joined', 'role',
+        ])
+        teachers, students = [], []
+        for role, count, bucket in ((User.Role.TEACHER, options['teachers'], teachers),
+                                    (User.Role.STUDENT, options['students'], students)):
+            for _ in range(count):
+                user_id = next_id()
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                username = f'{first.lower()}.{last.lower()}{user_id}'
+                joined = self.now - timedelta(days=options['days'] + rng.randint(0, 365))
+                writer.write((user_id, password, False, username, first, last,
+                              f'{username}@seed.example', False, True, joined, role))
+                # Niveau de l'élève : probabilité de base d'une bonne réponse
+                bucket.append({'id': user_id, 'skill': rng.betavariate(2, 2)})
+        return teachers, students
+
+    def _quizzes(self, options, teachers):
+        rng = self.rng
+        next_quiz, next_question, next_option = IdAllocator(Quiz), IdAllocator(Question), IdAllocator(QuestionOption)
+        quiz_writer = self._writer(Quiz, ['id', 'title', 'description', 'created_by_id', 'created_at', 'updated_at'])
+        question_writer = self._writer(Question, [
+            'id', 'quiz_id', 'text', 'question_type', 'order', 'time_limit', 'fuzzy_matching',
+        ])
+        option_writer = self._writer(QuestionOption, ['id', 'question_id', 'text', 'is_correct', 'order'])
+
+        quizzes = []
+        for index in range(options['quizzes']):
+            quiz_id = next_quiz()
+            topic = rng.choice(TOPICS)
+            created = self.now - timedelta(days=options['days'] + rng.randint(0, 180))
+            host = teachers[index % len(teachers)]['id']
+            quiz_writer.write((quiz_id, f'{topic} — série {index + 1}',
+                               f'Révisions de {topic.lower()} : {", ".join(rng.sample(WORDS, 3))}.',
+                               host, created, created))
+
+            questions = []
+            for order in range(1, options['questions'] + 1):
+                question_id = next_question()
+                question_type = rng.choices(
+                    [Question.QuestionType.MULTIPLE_CHOICE, Question.QuestionType.TRUE_FALSE,
+                     Question.QuestionType.SHORT_ANSWER], weights=[70, 15, 15]
+                )[0]
+                time_limit = rng.choice(TIME_LIMITS)
+                question_writer.write((question_id, quiz_id, f'{topic} : question {order} sur {rng.choice(WORDS)} ?',
+                                       question_type, order, time_limit, False))
+
+                if question_type == Question.QuestionType.SHORT_ANSWER:
+                    texts = [rng.choice(WORDS)]
+                    correct_index = 0
+                elif question_type == Question.QuestionType.TRUE_FALSE:
+                    texts = ['Vrai', 'Faux']
+                    correct_index = rng.randrange(2)
+                else:
+                    texts = rng.sample(WORDS, 4)
+                    correct_index = rng.randrange(4)
+                option_ids = []
+                for position, text in enumerate(texts):
+                    option_id = next_option()
+                    is_correct = question_type == Question.QuestionType.SHORT_ANSWER or position == correct_index
+                    option_writer.write((option_id, question_id, text, is_correct, position))
+                    option_ids.append(option_id)
+                questions.append({
+                    'id': question_id, 'type': question_type, 'time_limit': time_limit,
+                    'options': option_ids, 'correct': option_ids[correct_index], 'answer': texts[correct_index],
+                    'difficulty': rng.random(),
+                })
+            quizzes.append({'id': quiz_id, 'host': host, 'questions': questions})
+        return quizzes
+
+    def _access_codes(self):
+        used = set(QuizSession.objects.values_list('access_code', flat=True))
+        alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+        while True:
+            code = ''.join(self.rng.choices(alphabet, k=6))
+            if code not in used:
+                used.add(code)
+                yield code
+
+    def _sessions(self, options, quizzes, students):
+        rng = self.rng
+        next_session, next_participant, next_answer = (
+            IdAllocator(QuizSession), IdAllocator(Participant), IdAllocator(Answer)
+        )
+        session_writer = self._writer(QuizSession, [
+            'id', 'quiz_id', 'access_code', 'host_id', 'status', 'mode', 'current_question_index',
+            'state_version', 'created_at', 'started_at', 'ended_at',
+        ])
+        # Réponses avant participants : le score est la somme des points des réponses
+        # (clés étrangères vérifiées au commit)
+        answer_writer = self._writer(Answer, [
+            'id', 'participant_id', 'question_id', 'selected_option_id', 'text_answer',
+            'is_correct', 'response_time', 'answered_at',
+        ])
+        participant_writer = self._writer(Participant, [
+            'id', 'session_id', 'user_id', 'joined_at', 'score', 'question_index',
+        ])
+        codes = self._access_codes()
+        per_session = min(options['participants'], len(students))
+
+        for _ in range(options['sessions']):
+            quiz = rng.choice(quizzes)
+            questions = quiz['questions']
+            session_id = next_session()
+            started = self.now - timedelta(seconds=rng.randint(3600, options['days'] * 86400))
+            # Début de chaque question : temps limite + 10 s de transition
+            starts, offset = [], 0
+            for question in questions:
+                starts.append(started + timedelta(seconds=offset))
+                offset += question['time_limit'] + 10
+            ended = started + timedelta(seconds=offset)
+            session_writer.write((session_id, quiz['id'], next(codes), quiz['host'],
+                                  QuizSession.Status.COMPLETED, QuizSession.Mode.LIVE, len(questions),
+                                  len(questions) + per_session + 1,
+                                  started - timedelta(minutes=10), started, ended))
+
+            for student in rng.sample(students, per_session):
+                participant_id = next_participant()
+                score = 0
+                for question, question_start in zip(questions, starts):
+                    if rng.random() >= options['answer_rate']:
+                        continue
+                    response_time = int(question['time_limit'] * 1000 * rng.uniform(0.1, 0.95))
+                    is_correct = rng.random() < 0.2 + 0.75 * student['skill'] * (1 - 0.5 * question['difficulty'])
+                    selected_option, text_answer = None, ''
+                    if question['type'] == Question.QuestionType.SHORT_ANSWER:
+                        text_answer = question['answer'] if is_correct else rng.choice(WORDS + ['je ne sais pas'])
+                        is_correct = text_answer == question['answer']
+                    elif is_correct:
+                        selected_option = question['correct']
+                    else:
+                        selected_option = rng.choice([o for o in question['options'] if o != question['correct']])
+                    if is_correct:
+                        score += answer_points(question['time_limit'], response_time)
+                    answer_writer.write((next_answer(), participant_id, question['id'], selected_option,
+                                         text_answer, is_correct, response_time,
+                                         question_start + timedelta(milliseconds=response_time)))
+                participant_writer.write((participant_id, session_id, student['id'],
+                                          started - timedelta(seconds=rng.randint(5, 300)), score,
+                                          len(questions)))
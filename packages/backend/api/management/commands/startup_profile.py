@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Exécuté dans un interpréteur neuf : chaque import y est mesuré pour de vrai
+CHILD = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+phases = {}
+t = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases['settings'] = time.perf_counter() - t
+t = time.perf_counter()
+django.setup()
+phases['django.setup'] = time.perf_counter() - t
+t = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases['urls'] = time.perf_counter() - t
+if %(warmup)r:
+    t = time.perf_counter()
+    from api.warmup import warm_up
+    warm_up()
+    phases['warm_up'] = time.perf_counter() - t
+sys.stdout.write(json.dumps({k: round(v * 1000, 1) for k, v in phases.items()}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le démarrage d'un processus (python -X importtime) : durée des phases "
+        "(settings, django.setup, urls, préchauffage) et temps d'import par module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25, help="Nombre de modules affichés")
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--prefix', default='', help="Ne garder que les modules commençant par ce préfixe")
+        parser.add_argument('--warmup', action='store_true', help="Mesure aussi api.warmup.warm_up()")
+
+    def handle(self, limit, sort, prefix, warmup, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD % {'warmup': warmup}],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode != 0:
+            self.stderr.write(result.stderr)
+            return
+
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            if name.startswith(prefix):
+                modules.append((name, int(self_us), int(cumulative_us)))
+
+        phases = json.loads(result.stdout)
+        self.stdout.write("Phases (ms) :")
+        for phase, ms in phases.items():
+            self.stdout.write(f"  {phase:<14} {ms:>8.1f}")
+        self.stdout.write(f"  {'total':<14} {sum(phases.values()):>8.1f}")
+
+        index = 1 if sort == 'self' else 2
+        modules.sort(key=lambda row: -row[index])
+        self.stdout.write(f"\n{len(modules)} modules importés, les {limit} plus lents ({sort}) :")
+        self.stdout.write(f"  {'self ms':>9} {'cumul ms':>9}  module")
+        for name, self_us, cumulative_us in modules[:limit]:
+            self.stdout.write(f"  {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
@@ -0,0 +1,181 @@
+"""
+Correction des réponses courtes.
+
+Mode strict (par défaut) : égalité après strip().lower(), comme avant.
+
+Mode tolérant (Question.fuzzy_matching) :
+- accents, casse et ponctuation ignorés ("Éléphant !" == "elephant") ;
+- ordre et répétition des mots ignorés ("Paris, France" == "france paris") ;
+- fautes de frappe tolérées mot par mot, selon la longueur du mot (cf.
+  max_distance), sauf sur les nombres, qui doivent être exacts
+  ("1789" != "1788"), et sur les mots de plus de MAX_FUZZY_WORD_LENGTH
+  caractères.
+
+Les réponses acceptées d'une question sont compilées une fois en un
+AnswerMatcher (ensemble des formes normalisées + index de suppressions
+de leurs mots pour la distance d'édition), mis en cache selon leur
+contenu. Travailler par mot borne l'index et la recherche à O(mots)
+variantes de taille bornée, quelle que soit la longueur de la réponse.
+"""
+import functools
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r'[\W_]+')
+_DIGITS = re.compile(r'\d+')
+
+
+def fold(text):
+    """Minuscules, sans accents ni ponctuation, espaces normalisés"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def token_key(text):
+    """Forme canonique : mots uniques triés (ordre et répétitions ignorés)"""
+    return ' '.join(sorted(set(fold(text).split())))
+
+
+MAX_DISTANCE = 2
+# Au-delà, un mot doit être exact : ses variantes (O(L²)) ne sont pas générées
+MAX_FUZZY_WORD_LENGTH = 32
+
+
+def max_distance(length):
+    """Fautes tolérées : aucune jusqu'à 3 caractères, 1 jusqu'à 7, 2 au-delà"""
+    if length <= 3:
+        return 0
+    if length <= 7:
+        return 1
+    return 2
+
+
+def levenshtein(a, b, limit=None):
+    """Distance d'édition ; au-delà de `limit`, retourne limit + 1 sans finir le calcul"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def deletions(word, depth):
+    """`word` et toutes ses variantes privées de 1 à `depth` caractères"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    """
+    Index par suppressions symétriques : deux mots sont à distance <= k
+    seulement s'ils ont une variante commune en retirant au plus k
+    caractères de chacun. La recherche se ramène à quelques accès dict
+    puis à la vérification (bornée) des seuls candidats.
+    """
+    __slots__ = ('variants',)
+
+    def __init__(self, words=(), depth=MAX_DISTANCE):
+        self.variants = {}
+        for word in words:
+            for variant in deletions(word, depth):
+                self.variants.setdefault(variant, set()).add(word)
+
+    def search(self, word, k):
+        """Mots indexés à distance <= k (k <= profondeur de l'index)"""
+        candidates = set()
+        for variant in deletions(word, k):
+            candidates |= self.variants.get(variant, set())
+        return [c for c in candidates if c == word or levenshtein(word, c, k) <= k]
+
+
+def _assign(words, accepted, close):
+    """
+    Vrai si chaque mot de `words` peut être associé à un mot distinct de
+    `accepted` parmi ses proches `close[mot]` (couplage biparti, chemins augmentants)
+    """
+    accepted = set(accepted)
+    owner = {}
+
+    def place(word, seen):
+        for candidate in close[word]:
+            if candidate in accepted and candidate not in seen:
+                seen.add(candidate)
+                if candidate not in owner or place(owner[candidate], seen):
+                    owner[candidate] = word
+                    return True
+        return False
+
+    return all(place(word, set()) for word in words)
+
+
+class AnswerMatcher:
+    __slots__ = ('fuzzy', 'exact', 'keys', 'answers', 'words', 'index')
+
+    def __init__(self, accepted, fuzzy=False):
+        self.fuzzy = fuzzy
+        self.exact = frozenset(text.strip().lower() for text in accepted)
+        self.keys = frozenset(token_key(text) for text in accepted) if fuzzy else frozenset()
+        # Mots des formes acceptées, par nombre de mots
+        self.answers = {}
+        for key in self.keys:
+            words = key.split()
+            self.answers.setdefault(len(words), []).append(words)
+        self.words = frozenset(word for key in self.keys for word in key.split())
+        self.index = DeletionIndex(
+            word for word in self.words if len(word) <= MAX_FUZZY_WORD_LENGTH and not _DIGITS.search(word)
+        ) if fuzzy else None
+
+    def _close(self, word):
+        """Mots acceptés (sans chiffres) à distance tolérée de `word`, et `word` lui-même"""
+        k = max_distance(len(word))
+        # Un mot accepté tel quel reste lui-même ; une faute sur un nombre change la réponse
+        if word in self.words or k == 0 or len(word) > MAX_FUZZY_WORD_LENGTH or _DIGITS.search(word):
+            return (word,)
+        return (word, *self.index.search(word, k))
+
+    def matches(self, text):
+        if not text:
+            return False
+        if text.strip().lower() in self.exact:
+            return True
+        if not self.fuzzy:
+            return False
+
+        key = token_key(text)
+        if not key:
+            return False
+        if key in self.keys:
+            return True
+        words = key.split()
+        candidates = self.answers.get(len(words))
+        if not candidates:
+            return False
+        close = {word: self._close(word) for word in words}
+        return any(_assign(words, accepted, close) for accepted in candidates)
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile(accepted, fuzzy):
+    return AnswerMatcher(accepted, fuzzy)
+
+
+def compile_matcher(accepted, fuzzy=False):
+    """Matcher des réponses acceptées, compilé une fois par contenu"""
+    return _compile(tuple(sorted(accepted)), bool(fuzzy))
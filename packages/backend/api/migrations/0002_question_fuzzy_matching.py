@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='fuzzy_matching',
+            field=models.BooleanField(default=False, verbose_name='Correction tolérante (accents, ordre des mots, fautes de frappe)'),
+        ),
+    ]
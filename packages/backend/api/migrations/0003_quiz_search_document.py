@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:55
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class AddIndexOnPostgres(migrations.AddIndex):
+    """Index GIN : PostgreSQL uniquement (la recherche retombe sur LIKE ailleurs)"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fill_search_documents(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # Même pondération que api.search.document_expression()
+    schema_editor.execute(
+        """
+        UPDATE api_quiz q SET search_document =
+            setweight(to_tsvector(%(config)s::regconfig, coalesce(q.title, '')), 'A')
+            || setweight(to_tsvector(%(config)s::regconfig, coalesce(q.description, '')), 'B')
+            || setweight(to_tsvector(%(config)s::regconfig, coalesce(
+                (SELECT string_agg(qu.text, ' ') FROM api_question qu WHERE qu.quiz_id = q.id), '')), 'C')
+            || setweight(to_tsvector(%(config)s::regconfig, coalesce(
+                (SELECT string_agg(o.text, ' ') FROM api_questionoption o
+                 JOIN api_question qu ON qu.id = o.question_id WHERE qu.quiz_id = q.id), '')), 'D')
+        """,
+        {'config': settings.SEARCH_CONFIG},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_question_fuzzy_matching'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        AddIndexOnPostgres(
+            model_name='quiz',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='quiz_search_gin'),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_quiz_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0, verbose_name="Version de l'état"),
+        ),
+    ]
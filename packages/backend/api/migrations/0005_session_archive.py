@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_quizsession_state_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsession',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Archivée le'),
+        ),
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, verbose_name='Fichier')),
+                ('participant_count', models.PositiveIntegerField(verbose_name='Participants')),
+                ('answer_count', models.PositiveIntegerField(verbose_name='Réponses')),
+                ('top_score', models.PositiveIntegerField(default=0, verbose_name='Meilleur score')),
+                ('average_score', models.FloatField(default=0, verbose_name='Score moyen')),
+                ('raw_size', models.PositiveBigIntegerField(verbose_name='Taille non compressée (octets)')),
+                ('compressed_size', models.PositiveBigIntegerField(verbose_name='Taille compressée (octets)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archivée le')),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='api.quizsession', verbose_name='Session')),
+            ],
+            options={
+                'verbose_name': 'Archive de session',
+                'verbose_name_plural': 'Archives de session',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:11
+
+from django.db import migrations, models
+import django.db.models.constraints
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_session_archive'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='question',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='questionoption',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['DEFERRED'], fields=('quiz', 'order'), name='question_quiz_order_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionoption',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['DEFERRED'], fields=('question', 'order'), name='option_question_order_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_deferrable_order_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_index', models.PositiveIntegerField(verbose_name='Index de la question')),
+                ('user_ids', models.JSONField(default=list, verbose_name='Utilisateurs (par rang)')),
+                ('scores', models.JSONField(default=list, verbose_name='Scores')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_snapshots', to='api.quizsession', verbose_name='Session')),
+            ],
+            options={
+                'verbose_name': 'Classement enregistré',
+                'verbose_name_plural': 'Classements enregistrés',
+                'ordering': ['session', 'question_index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardsnapshot',
+            constraint=models.UniqueConstraint(fields=('session', 'question_index'), name='snapshot_session_question_uniq'),
+        ),
+    ]
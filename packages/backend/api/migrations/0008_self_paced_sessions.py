@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_leaderboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Terminé le'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date limite'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='question_index',
+            field=models.PositiveIntegerField(default=0, verbose_name='Question courante'),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='closes_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fermeture le'),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='mode',
+            field=models.CharField(choices=[('LIVE', 'En direct'), ('SELF_PACED', 'En autonomie')], default='LIVE', max_length=15, verbose_name='Mode'),
+        ),
+        migrations.AddField(
+            model_name='quizsession',
+            name='time_allowed',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Durée par participant (minutes)'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:43
+
+import gzip
+import json
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_archive_users(apps, schema_editor):
+    """Participants des archives existantes, lus dans leurs fichiers (user_id : 2e colonne)"""
+    SessionArchive = apps.get_model('api', 'SessionArchive')
+    User = apps.get_model('api', 'User')
+    Through = SessionArchive.users.through
+    for summary in SessionArchive.objects.only('id', 'path').iterator():
+        try:
+            with gzip.open(summary.path, 'rb') as f:
+                rows = json.load(f)['participants']
+        except FileNotFoundError:
+            continue
+        user_ids = User.objects.filter(pk__in={row[1] for row in rows}).values_list('pk', flat=True)
+        Through.objects.bulk_create([Through(sessionarchive_id=summary.pk, user_id=pk) for pk in user_ids])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_participant_rank_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionarchive',
+            name='users',
+            field=models.ManyToManyField(blank=True, related_name='archived_sessions', to=settings.AUTH_USER_MODEL, verbose_name='Participants'),
+        ),
+        migrations.RunPython(fill_archive_users, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,15 @@
 from django.db import models
+from django.db.models import Count, F, Q, Avg
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 import string
 import random
 
+from . import event_log
+from .matching import compile_matcher
+
 
 class User(AbstractUser):
     """Modèle utilisateur personnalisé avec rôles"""
@@ -48,6 +55,8 @@ class Quiz(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Créé le')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Modifié le')
+    # Titre, description, questions et options (PostgreSQL, cf. api.search)
+    search_document = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -60,6 +69,7 @@ class Quiz(models.Model):
         verbose_name = 'Quiz'
         verbose_name_plural = 'Quiz'
         ordering = ['-created_at']
+        indexes = [GinIndex(fields=['search_document'], name='quiz_search_gin')]
 
 
 class Question(models.Model):
@@ -88,6 +98,10 @@ class Question(models.Model):
         default=30,
         verbose_name='Temps limite (secondes)'
     )
+    fuzzy_matching = models.BooleanField(
+        default=False,
+        verbose_name='Correction tolérante (accents, ordre des mots, fautes de frappe)'
+    )
 
     def __str__(self):
         return f"{self.quiz.title} - Q{self.order}: {self.text[:50]}"
@@ -96,7 +110,12 @@ class Question(models.Model):
         verbose_name = 'Question'
         verbose_name_plural = 'Questions'
         ordering = ['quiz', 'order']
-        unique_together = ['quiz', 'order']
+        # Différée (vérifiée au commit) : réordonner en un seul UPDATE (cf. api.ordering)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'order'], name='question_quiz_order_uniq', deferrable=models.Deferrable.DEFERRED
+            ),
+        ]
 
 
 class QuestionOption(models.Model):
@@ -120,7 +139,23 @@ class QuestionOption(models.Model):
         verbose_name = 'Option de réponse'
         verbose_name_plural = 'Options de réponse'
         ordering = ['question', 'order']
-        unique_together = ['question', 'order']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['question', 'order'], name='option_question_order_uniq', deferrable=models.Deferrable.DEFERRED
+            ),
+        ]
+
+
+class QuizSessionQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """Sessions animées par l'enseignant, ou rejointes par l'étudiant (archivées comprises)"""
+        if user.is_teacher():
+            return self.filter(host=user)
+        archived = SessionArchive.users.through.objects.filter(user=user).values('sessionarchive__session_id')
+        return self.filter(
+            Q(pk__in=Participant.objects.filter(user=user).values('session_id')) | Q(pk__in=archived)
+        )
 
 
 class QuizSession(models.Model):
@@ -131,6 +166,12 @@ class QuizSession(models.Model):
         IN_PROGRESS = 'IN_PROGRESS', 'En cours'
         COMPLETED = 'COMPLETED', 'Terminée'
 
+    class Mode(models.TextChoices):
+        # LIVE : l'enseignant fait avancer la question courante pour tous
+        LIVE = 'LIVE', 'En direct'
+        # SELF_PACED : chaque participant avance à son rythme (cf. api.self_paced)
+        SELF_PACED = 'SELF_PACED', 'En autonomie'
+
     quiz = models.ForeignKey(
         Quiz,
         on_delete=models.CASCADE,
@@ -158,9 +199,26 @@ class QuizSession(models.Model):
         default=0,
         verbose_name='Index de la question courante'
     )
+    mode = models.CharField(
+        max_length=15,
+        choices=Mode.choices,
+        default=Mode.LIVE,
+        verbose_name='Mode'
+    )
+    # Mode autonome : date limite de la session et durée accordée à chaque participant
+    closes_at = models.DateTimeField(null=True, blank=True, verbose_name='Fermeture le')
+    time_allowed = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name='Durée par participant (minutes)'
+    )
+    # Incrémentée à chaque changement visible des joueurs (cf. bump_state_version)
+    state_version = models.PositiveIntegerField(default=0, verbose_name="Version de l'état")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Créée le')
     started_at = models.DateTimeField(null=True, blank=True, verbose_name='Démarrée le')
     ended_at = models.DateTimeField(null=True, blank=True, verbose_name='Terminée le')
+    # Participants et réponses déplacés dans une archive compressée (cf. api.archive)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Archivée le')
+
+    objects = QuizSessionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.quiz.title} - {self.access_code} ({self.get_status_display()})"
@@ -178,6 +236,15 @@ class QuizSession(models.Model):
             if not QuizSession.objects.filter(access_code=code).exists():
                 return code
 
+    def bump_state_version(self):
+        """
+        Incrémente atomiquement la version de l'état (transition, arrivée d'un
+        participant) et recharge statut, index et version.
+        """
+        QuizSession.objects.filter(pk=self.pk).update(state_version=F('state_version') + 1)
+        self.refresh_from_db(fields=['state_version', 'status', 'current_question_index'])
+        return self.state_version
+
     def get_current_question(self):
         """Retourne la question courante de la session"""
         questions = self.quiz.questions.all().order_by('order')
@@ -185,8 +252,31 @@ class QuizSession(models.Model):
             return questions[self.current_question_index]
         return None
 
+    async def aget_current_question(self):
+        """Version async de get_current_question (une seule requête)"""
+        index = self.current_question_index
+        questions = Question.objects.filter(quiz_id=self.quiz_id).order_by('order')
+        async for question in questions[index:index + 1]:
+            return question
+        return None
+
+    @property
+    def is_self_paced(self):
+        return self.mode == QuizSession.Mode.SELF_PACED
+
+    def accepts_participants(self, now=None):
+        """Lobby en attente, ou session en autonomie ouverte et pas encore fermée"""
+        if self.status == QuizSession.Status.WAITING:
+            return True
+        return (
+            self.is_self_paced and self.status == QuizSession.Status.IN_PROGRESS
+            and (self.closes_at is None or self.closes_at > (now or timezone.now()))
+        )
+
     @property
     def participant_count(self):
+        if self.archived_at is not None:
+            return self.archive.participant_count
         return self.participants.count()
 
     class Meta:
@@ -195,6 +285,17 @@ class QuizSession(models.Model):
         ordering = ['-created_at']
 
 
+class ParticipantQuerySet(models.QuerySet):
+
+    def with_stats(self):
+        """Nombre de réponses, bonnes réponses et temps moyen, calculés par la DB"""
+        return self.annotate(
+            answer_cnt=Count('answers'),
+            correct_cnt=Count('answers', filter=Q(answers__is_correct=True)),
+            avg_time=Avg('answers__response_time')
+        )
+
+
 class Participant(models.Model):
     """Participant à une session de quiz"""
 
@@ -212,31 +313,62 @@ class Participant(models.Model):
     )
     joined_at = models.DateTimeField(auto_now_add=True, verbose_name='Rejoint le')
     score = models.PositiveIntegerField(default=0, verbose_name='Score')
+    # Mode autonome : question courante du participant, date limite et fin du quiz
+    question_index = models.PositiveIntegerField(default=0, verbose_name='Question courante')
+    deadline = models.DateTimeField(null=True, blank=True, verbose_name='Date limite')
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name='Terminé le')
+
+    objects = ParticipantQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.session.access_code}"
 
+    def _load_stats(self):
+        """Annotations de with_stats() si présentes, sinon une seule agrégation"""
+        if not hasattr(self, 'answer_cnt'):
+            stats = self.answers.aggregate(
+                answer_cnt=Count('id'),
+                correct_cnt=Count('id', filter=Q(is_correct=True)),
+                avg_time=Avg('response_time')
+            )
+            self.answer_cnt = stats['answer_cnt']
+            self.correct_cnt = stats['correct_cnt']
+            self.avg_time = stats['avg_time']
+
     @property
     def correct_answers_count(self):
-        return self.answers.filter(is_correct=True).count()
+        self._load_stats()
+        return self.correct_cnt
 
     @property
     def total_answers_count(self):
-        return self.answers.count()
+        self._load_stats()
+        return self.answer_cnt
 
     @property
     def average_response_time(self):
-        answers = self.answers.all()
-        if not answers:
-            return 0
-        total_time = sum(answer.response_time for answer in answers)
-        return total_time / answers.count()
+        self._load_stats()
+        return self.avg_time or 0
 
     class Meta:
         verbose_name = 'Participant'
         verbose_name_plural = 'Participants'
         ordering = ['-score', 'joined_at']
         unique_together = ['session', 'user']
+        # Classement d'une session : top N et pages de participants (cf. api.pagination)
+        indexes = [models.Index(fields=['session', '-score', 'id'], name='participant_session_rank_idx')]
+
+
+# Borne de Answer.response_time (entier PostgreSQL), vérifiée aussi hors sérialiseur
+MAX_RESPONSE_TIME = 2147483647
+# Longueur max d'une réponse texte (correction tolérante, journal des sessions)
+MAX_TEXT_ANSWER_LENGTH = 1000
+
+
+def answer_points(time_limit, response_time):
+    """Points d'une bonne réponse : 100 + bonus de rapidité (1 pt / 100 ms restantes)"""
+    time_bonus = max(0, time_limit * 1000 - response_time) // 100
+    return 100 + time_bonus
 
 
 class Answer(models.Model):
@@ -289,26 +421,86 @@ class Answer(models.Model):
             if self.text_answer:
                 # On récupère les bonnes réponses possibles stockées dans les options
                 correct_answers = self.question.options.filter(is_correct=True).values_list('text', flat=True)
-                
-                # Normalisation : minuscule et sans espaces inutiles
-                user_text = self.text_answer.strip().lower()
-                
-                # On vérifie si la réponse de l'utilisateur correspond à l'une des réponses attendues
-                self.is_correct = any(user_text == correct.strip().lower() for correct in correct_answers)
+
+                # Matcher compilé une fois par jeu de réponses (cf. api.matching)
+                matcher = compile_matcher(correct_answers, self.question.fuzzy_matching)
+                self.is_correct = matcher.matches(self.text_answer)
             else:
                 self.is_correct = False
 
         super().save(*args, **kwargs)
 
         # Mettre à jour le score du participant (Code existant inchangé)
+        points = 0
         if self.is_correct:
-            time_bonus = max(0, self.question.time_limit * 1000 - self.response_time) // 100
-            points = 100 + time_bonus
+            points = answer_points(self.question.time_limit, self.response_time)
             self.participant.score += points
             self.participant.save()
 
+        event_log.record_answer(
+            self.participant.session_id, self.participant_id, self.question_id,
+            self.selected_option_id, self.is_correct, points, self.response_time, self.text_answer
+        )
+
     class Meta:
         verbose_name = 'Réponse'
         verbose_name_plural = 'Réponses'
         ordering = ['answered_at']
         unique_together = ['participant', 'question']
+
+
+class SessionArchive(models.Model):
+    """Résumé d'une session archivée (ses lignes sont dans le fichier `path`)"""
+
+    session = models.OneToOneField(
+        QuizSession,
+        on_delete=models.CASCADE,
+        related_name='archive',
+        verbose_name='Session'
+    )
+    path = models.CharField(max_length=500, verbose_name='Fichier')
+    participant_count = models.PositiveIntegerField(verbose_name='Participants')
+    answer_count = models.PositiveIntegerField(verbose_name='Réponses')
+    top_score = models.PositiveIntegerField(default=0, verbose_name='Meilleur score')
+    average_score = models.FloatField(default=0, verbose_name='Score moyen')
+    raw_size = models.PositiveBigIntegerField(verbose_name='Taille non compressée (octets)')
+    compressed_size = models.PositiveBigIntegerField(verbose_name='Taille compressée (octets)')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Archivée le')
+    # Participants de la session : elle reste visible de ses étudiants (cf. visible_to)
+    users = models.ManyToManyField(User, blank=True, related_name='archived_sessions', verbose_name='Participants')
+
+    def __str__(self):
+        return f"Archive de la session {self.session_id}"
+
+    class Meta:
+        verbose_name = 'Archive de session'
+        verbose_name_plural = 'Archives de session'
+
+
+class LeaderboardSnapshot(models.Model):
+    """
+    Classement d'une session après une question : ids des utilisateurs par
+    rang et scores correspondants (tableaux parallèles, cf. api.snapshots).
+    """
+
+    session = models.ForeignKey(
+        QuizSession,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_snapshots',
+        verbose_name='Session'
+    )
+    question_index = models.PositiveIntegerField(verbose_name='Index de la question')
+    user_ids = models.JSONField(default=list, verbose_name='Utilisateurs (par rang)')
+    scores = models.JSONField(default=list, verbose_name='Scores')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Créé le')
+
+    def __str__(self):
+        return f"Classement de la session {self.session_id} après la question {self.question_index}"
+
+    class Meta:
+        verbose_name = 'Classement enregistré'
+        verbose_name_plural = 'Classements enregistrés'
+        ordering = ['session', 'question_index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'question_index'], name='snapshot_session_question_uniq'),
+        ]
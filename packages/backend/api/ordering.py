@@ -0,0 +1,47 @@
+"""
+Ordre des questions d'un quiz et des options d'une question.
+
+(quiz, order) et (question, order) sont uniques : réordonner ligne à
+ligne imposerait des ordres temporaires et une requête par ligne. Ici, un
+seul UPDATE ... SET order = CASE id WHEN ... END. Sous PostgreSQL les
+contraintes sont différées (vérifiées au commit) ; sur une base qui ne les
+supporte pas, un premier UPDATE décale d'abord les ordres hors de la plage
+finale.
+
+next_question_order() verrouille le quiz (SELECT ... FOR UPDATE) : deux
+créations simultanées n'obtiennent pas le même ordre.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, F, Max, PositiveIntegerField, Value, When
+
+from .models import Quiz, Question
+
+
+def lock_quiz(quiz_id):
+    """Verrou sur la ligne du quiz jusqu'à la fin de la transaction ; False s'il n'existe plus"""
+    return Quiz.objects.select_for_update().filter(pk=quiz_id).exists()
+
+
+def next_question_order(quiz_id):
+    """Ordre de la prochaine question du quiz ; à appeler dans une transaction"""
+    lock_quiz(quiz_id)
+    current_max = Question.objects.filter(quiz_id=quiz_id).aggregate(Max('order'))['order__max']
+    return (current_max or 0) + 1
+
+
+def apply_order(queryset, ids, start=1):
+    """
+    Donne les ordres start, start + 1... aux lignes `ids`, dans cet ordre.
+    `ids` doit contenir toutes les lignes de `queryset`.
+    """
+    if not ids:
+        return 0
+    new_order = Case(
+        *[When(pk=pk, then=Value(start + position)) for position, pk in enumerate(ids)],
+        output_field=PositiveIntegerField(),
+    )
+    with transaction.atomic():
+        if not connection.features.supports_deferrable_unique_constraints:
+            offset = (queryset.aggregate(Max('order'))['order__max'] or 0) + start + len(ids)
+            queryset.update(order=F('order') + offset)
+        return queryset.update(order=new_order)
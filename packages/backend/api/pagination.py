@@ -0,0 +1,81 @@
+"""
+Pagination par curseur des participants d'une session (classement).
+
+Ordre (-score, id), servi par l'index participant_session_rank_idx : le
+curseur est la position (score, id) du dernier participant de la page, et
+la page suivante est lue par l'index à partir de là, quelle que soit sa
+profondeur (pas d'OFFSET, même quand beaucoup de participants ont le même
+score). Les pages suivent le classement au moment de chaque requête : un
+participant qui marque des points entre deux pages peut être vu deux fois
+ou pas du tout.
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+PARTICIPANT_ORDERING = ('-score', 'id')
+
+
+class ParticipantCursorPagination(BasePagination):
+    """
+    ?cursor=<jeton opaque>&page_size=N. paginate_queryset() renvoie les ids
+    de la page dans l'ordre du classement ; la vue charge les lignes.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    invalid_cursor_message = "Curseur invalide."
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param, '')
+        if value.isdigit() and int(value) > 0:
+            return min(int(value), self.max_page_size)
+        return settings.SESSION_PARTICIPANTS_PAGE_SIZE
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            score, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split(':')
+            return int(score), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode('{}:{}'.format(*position).encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        if position is not None:
+            score, pk = position
+            queryset = queryset.filter(Q(score__lt=score) | Q(score=score, pk__gt=pk))
+        rows = list(queryset.order_by(*PARTICIPANT_ORDERING).values_list('id', 'score')[:page_size + 1])
+        self.next_position = (rows[page_size - 1][1], rows[page_size - 1][0]) if len(rows) > page_size else None
+        return [pk for pk, _ in rows[:page_size]]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,24 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .renderers import MSGPACK_MEDIA_TYPE
+
+
+def unpackb(body):
+    """Corps MessagePack -> données ; ValueError si le corps est invalide"""
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except (msgpack.UnpackException, msgpack.ExtraData, ValueError, TypeError) as exc:
+        raise ValueError(str(exc) or type(exc).__name__)
+
+
+class MessagePackParser(BaseParser):
+    """Corps `Content-Type: application/msgpack` (cf. api.renderers)"""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except ValueError as exc:
+            raise ParseError(f"MessagePack invalide - {exc}")
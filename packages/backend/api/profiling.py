@@ -0,0 +1,187 @@
+"""
+Profilage à la demande d'une requête (administrateurs).
+
+Un administrateur obtient un jeton signé (POST /api/admin/profiling/token/)
+puis l'envoie avec la requête à examiner, dans l'en-tête `X-Profile` ou le
+paramètre `?_profile=<jeton>`. La requête s'exécute alors sous cProfile,
+avec la chronologie de ses requêtes SQL ; le résultat est gardé
+PROFILING_RESULT_TTL secondes dans le cache partagé et son id renvoyé dans
+l'en-tête `X-Profile-Id` (GET /api/admin/profiling/<id>/).
+
+Sans jeton, le middleware ne fait qu'un test sur l'en-tête et la query
+string. Les vues async sont profilées sans chronologie SQL (leurs requêtes
+partent d'un autre thread) et cProfile y voit aussi les autres tâches de la
+boucle d'événements.
+"""
+import cProfile
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAM = '_profile'
+SALT = 'api.profiling'
+INDEX_KEY = 'profiling:index'
+INDEX_SIZE = 50
+MAX_SQL_ENTRIES = 500
+
+
+def make_token(user):
+    return signing.TimestampSigner(salt=SALT).sign_object({'user': user.pk})
+
+
+def _requested_token(request):
+    token = request.META.get(HEADER)
+    if token is None and QUERY_PARAM + '=' in request.META.get('QUERY_STRING', ''):
+        token = request.GET.get(QUERY_PARAM)
+    return token
+
+
+def _check_token(token):
+    """Id de l'administrateur qui a demandé le jeton, ou None si le jeton est invalide ou expiré"""
+    try:
+        data = signing.TimestampSigner(salt=SALT).unsign_object(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return data.get('user')
+
+
+class SQLTimeline:
+    """execute_wrapper : début, durée et texte de chaque requête SQL"""
+
+    def __init__(self, started):
+        self.started = started
+        self.entries = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            if len(self.entries) < MAX_SQL_ENTRIES:
+                self.entries.append({
+                    'start_ms': round((start - self.started) * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                })
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.items():
+        rows.append({
+            'function': f'{filename}:{line}({function})',
+            'ncalls': ncalls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:settings.PROFILING_TOP_FUNCTIONS]
+
+
+def _path_without_token(request):
+    query = request.GET.copy()
+    query.pop(QUERY_PARAM, None)
+    return f'{request.path}?{query.urlencode()}' if query else request.path
+
+
+def _store(request, response, admin_id, started, profiler, timeline):
+    profile_id = uuid.uuid4().hex
+    duration = time.perf_counter() - started
+    summary = {
+        'id': profile_id,
+        'method': request.method,
+        'path': _path_without_token(request),
+        'status': response.status_code,
+        'requested_by': admin_id,
+        'created_at': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'sql_count': timeline.count if timeline else None,
+        'sql_ms': round(timeline.total * 1000, 3) if timeline else None,
+    }
+    result = {
+        **summary,
+        'functions': _top_functions(profiler),
+        'sql': timeline.entries if timeline else None,
+    }
+    ttl = settings.PROFILING_RESULT_TTL
+    cache.set(f'profiling:{profile_id}', result, ttl)
+    index = [s for s in cache.get(INDEX_KEY, []) if s['id'] != profile_id]
+    cache.set(INDEX_KEY, [summary] + index[:INDEX_SIZE - 1], ttl)
+    response['X-Profile-Id'] = profile_id
+
+
+def get_result(profile_id):
+    return cache.get(f'profiling:{profile_id}')
+
+
+def recent_results():
+    return cache.get(INDEX_KEY, [])
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _requested_token(request)
+        admin_id = _check_token(token) if token else None
+        if admin_id is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        _store(request, response, admin_id, started, profiler, timeline)
+        return response
+
+    async def __acall__(self, request):
+        token = _requested_token(request)
+        admin_id = _check_token(token) if token else None
+        if admin_id is None:
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        _store(request, response, admin_id, started, profiler, None)
+        return response
@@ -0,0 +1,225 @@
+"""
+Cache des quiz sérialisés (QuizDetailSerializer), sur deux niveaux.
+
+QuizViewSet.retrieve et le détail d'une session renvoient le même quiz à
+chaque appelant. Son payload est gardé :
+  - 'local'  : en mémoire du processus, QUIZ_CACHE_LOCAL_TTL secondes au
+               plus (QUIZ_CACHE_LOCAL_SIZE quiz, les moins récents sortent) ;
+  - 'shared' : dans le cache QUIZ_CACHE_ALIAS (Redis en production),
+               QUIZ_CACHE_SHARED_TTL secondes.
+QUIZ_CACHE_TIERS choisit les niveaux actifs ('local,shared', 'shared', ''...).
+
+Invalidation : quiz_content_changed() (signaux de Quiz, Question et
+QuestionOption, opérations en masse) remplace le jeton de version du quiz
+dans le cache partagé et vide le niveau local ; le bus (après le commit)
+vide le niveau local des autres workers. Un payload partagé n'est servi
+que si sa version est le jeton courant : un calcul commencé avant une
+invalidation ne peut pas réinstaller l'ancien contenu.
+
+Recalcul unique ("single-flight") : dans un processus, les requêtes qui
+manquent le même quiz attendent le calcul en cours ; entre processus, un
+verrou dans le cache partagé fait attendre les autres workers (jusqu'à
+LOCK_WAIT secondes) que le payload y apparaisse.
+
+Les payloads servis sont partagés entre requêtes : ne pas les modifier.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Quiz
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.02
+
+_local = OrderedDict()
+# Incrémenté à chaque invalidation : un calcul commencé avant n'est pas gardé en local
+_generations = {}
+_in_flight = {}
+_lock = threading.Lock()
+_stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'computations': 0, 'coalesced': 0, 'invalidations': 0}
+
+
+def _tiers():
+    return {tier.strip() for tier in settings.QUIZ_CACHE_TIERS.split(',') if tier.strip()}
+
+
+def _shared():
+    return caches[settings.QUIZ_CACHE_ALIAS]
+
+
+def _version_key(quiz_id):
+    return f'quiz_payload:{quiz_id}:version'
+
+
+def _payload_key(quiz_id):
+    return f'quiz_payload:{quiz_id}'
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Compteurs du processus (depuis son démarrage) et taille du niveau local"""
+    with _lock:
+        result = dict(_stats)
+        result['local_size'] = len(_local)
+    lookups = result['local_hits'] + result['shared_hits'] + result['misses']
+    result['hit_ratio'] = (result['local_hits'] + result['shared_hits']) / lookups if lookups else None
+    return result
+
+
+def compute_payload(quiz_id):
+    """Payload du quiz tel que le renvoie QuizDetailSerializer ; None s'il n'existe pas"""
+    # Import différé : serializers utilise ce module pour le détail des sessions
+    from .serializers import QuizDetailSerializer
+    quiz = (
+        Quiz.objects.select_related('created_by').defer('search_document')
+        .prefetch_related('questions__options').filter(pk=quiz_id).first()
+    )
+    if quiz is None:
+        return None
+    data = QuizDetailSerializer(quiz).data
+    return dict(data)
+
+
+def _local_get(quiz_id):
+    with _lock:
+        entry = _local.get(quiz_id)
+        if entry is None:
+            return None
+        expires, payload = entry
+        if expires < time.monotonic():
+            del _local[quiz_id]
+            return None
+        _local.move_to_end(quiz_id)
+        return payload
+
+
+def _local_set(quiz_id, payload, generation):
+    with _lock:
+        if _generations.get(quiz_id, 0) != generation:
+            return
+        _local[quiz_id] = (time.monotonic() + settings.QUIZ_CACHE_LOCAL_TTL, payload)
+        _local.move_to_end(quiz_id)
+        while len(_local) > settings.QUIZ_CACHE_LOCAL_SIZE:
+            _local.popitem(last=False)
+
+
+def _shared_lookup(quiz_id):
+    """(jeton de version, payload à jour ou None) dans le cache partagé"""
+    cache = _shared()
+    found = cache.get_many([_version_key(quiz_id), _payload_key(quiz_id)])
+    version = found.get(_version_key(quiz_id))
+    if version is None:
+        cache.add(_version_key(quiz_id), uuid.uuid4().hex, None)
+        version = cache.get(_version_key(quiz_id))
+        return version, None
+    entry = found.get(_payload_key(quiz_id))
+    if entry is not None and entry[0] == version:
+        return version, entry[1]
+    return version, None
+
+
+def _compute_shared(quiz_id):
+    """Payload via le cache partagé ; un seul worker calcule un quiz manquant à la fois"""
+    cache = _shared()
+    version, payload = _shared_lookup(quiz_id)
+    if payload is not None:
+        _count('shared_hits')
+        return payload
+    _count('misses')
+
+    lock_key = f'{_payload_key(quiz_id)}:lock'
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Un autre worker calcule : attendre son résultat plutôt que refaire le calcul
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            version, payload = _shared_lookup(quiz_id)
+            if payload is not None:
+                _count('coalesced')
+                return payload
+        lock_key = None
+    try:
+        _count('computations')
+        payload = compute_payload(quiz_id)
+        if payload is not None:
+            cache.set(_payload_key(quiz_id), (version, payload), settings.QUIZ_CACHE_SHARED_TTL)
+    finally:
+        if lock_key is not None:
+            cache.delete(lock_key)
+    return payload
+
+
+def _compute(quiz_id):
+    if 'shared' in _tiers():
+        return _compute_shared(quiz_id)
+    _count('misses')
+    _count('computations')
+    return compute_payload(quiz_id)
+
+
+def get_quiz_payload(quiz_id):
+    """Payload sérialisé du quiz (None s'il n'existe pas), servi par le cache"""
+    tiers = _tiers()
+    if not tiers:
+        return compute_payload(quiz_id)
+    if 'local' in tiers:
+        payload = _local_get(quiz_id)
+        if payload is not None:
+            _count('local_hits')
+            return payload
+
+    with _lock:
+        future = _in_flight.get(quiz_id)
+        leader = future is None
+        if leader:
+            future = _in_flight[quiz_id] = Future()
+            generation = _generations.get(quiz_id, 0)
+    if not leader:
+        _count('coalesced')
+        return future.result()
+
+    try:
+        payload = _compute(quiz_id)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(payload)
+    finally:
+        with _lock:
+            _in_flight.pop(quiz_id, None)
+    if payload is not None and 'local' in tiers:
+        _local_set(quiz_id, payload, generation)
+    return payload
+
+
+def invalidate_local(quiz_id):
+    with _lock:
+        _local.pop(quiz_id, None)
+        _generations[quiz_id] = _generations.get(quiz_id, 0) + 1
+        _stats['invalidations'] += 1
+
+
+def invalidate_all_local():
+    with _lock:
+        for quiz_id in _local:
+            _generations[quiz_id] = _generations.get(quiz_id, 0) + 1
+        _local.clear()
+
+
+def invalidate(quiz_id):
+    """Nouveau jeton de version (le payload partagé devient périmé) et niveau local vidé"""
+    invalidate_local(quiz_id)
+    if 'shared' in _tiers():
+        _shared().set(_version_key(quiz_id), uuid.uuid4().hex, None)
@@ -0,0 +1,36 @@
+"""
+MessagePack en plus de JSON (négociation par Accept / Content-Type).
+
+Un client qui envoie `Accept: application/msgpack` reçoit les mêmes données
+qu'en JSON, encodées en MessagePack ; un corps `Content-Type:
+application/msgpack` est décodé par api.parsers.MessagePackParser. JSON
+reste le format par défaut.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+_json_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Dates, décimaux, UUID, chaînes paresseuses... : même conversion qu'en JSON
+    return _json_encoder.default(obj)
+
+
+def packb(data):
+    return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return packb(data)
@@ -0,0 +1,103 @@
+"""
+Recherche plein texte dans les quiz d'un enseignant.
+
+PostgreSQL : Quiz.search_document (tsvector, index GIN) regroupe titre (A),
+description (B), textes des questions (C) et des options (D) dans la
+configuration SEARCH_CONFIG. Il est recalculé en une requête après le commit
+de toute modification du contenu (cf. api.signals). La requête utilise la
+syntaxe "websearch" ("mot exact", -exclu, or), les résultats sont triés par
+pertinence et les termes trouvés entourés de <mark>.
+
+Autres bases (SQLite en développement) : chaque mot doit apparaître dans le
+titre, la description, une question ou une option (LIKE), sans rang.
+"""
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connection, connections, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery, Value
+
+from .models import Quiz, Question, QuestionOption
+
+
+def is_supported(using):
+    return connections[using].vendor == 'postgresql'
+
+
+def document_expression():
+    config = settings.SEARCH_CONFIG
+    questions = (
+        Question.objects.filter(quiz=OuterRef('pk')).order_by()
+        .values('quiz').annotate(text=StringAgg('text', ' ')).values('text')
+    )
+    options = (
+        QuestionOption.objects.filter(question__quiz=OuterRef('pk')).order_by()
+        .values('question__quiz').annotate(text=StringAgg('text', ' ')).values('text')
+    )
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('description', weight='B', config=config)
+        + SearchVector(Subquery(questions), weight='C', config=config)
+        + SearchVector(Subquery(options), weight='D', config=config)
+    )
+
+
+def update_search_document(quiz_id):
+    Quiz.objects.filter(pk=quiz_id).update(search_document=document_expression())
+
+
+def schedule_update(quiz_id):
+    """Recalcule le document du quiz après le commit, une seule fois par transaction"""
+    if not is_supported('default'):
+        return
+    # Créer un quiz de 10 questions envoie une cinquantaine de signaux : un
+    # seul recalcul en attente par quiz (les callbacks d'une transaction
+    # annulée disparaissent avec elle)
+    for _, callback, *_ in connection.run_on_commit:
+        if getattr(callback, 'search_quiz_id', None) == quiz_id:
+            return
+
+    def callback():
+        update_search_document(quiz_id)
+    callback.search_quiz_id = quiz_id
+    transaction.on_commit(callback)
+
+
+def search_quizzes(queryset, text):
+    """
+    Quiz de `queryset` correspondant à `text`, annotés de rank,
+    title_highlight et description_highlight.
+    """
+    if is_supported(queryset.db):
+        config = settings.SEARCH_CONFIG
+        query = SearchQuery(text, search_type='websearch', config=config)
+        return (
+            queryset.filter(search_document=query)
+            .annotate(
+                rank=SearchRank(F('search_document'), query),
+                title_highlight=SearchHeadline(
+                    'title', query, config=config, start_sel='<mark>', stop_sel='</mark>', highlight_all=True
+                ),
+                description_highlight=SearchHeadline(
+                    'description', query, config=config, start_sel='<mark>', stop_sel='</mark>',
+                    min_words=15, max_words=35
+                ),
+            )
+            .order_by('-rank', '-created_at')
+        )
+
+    condition = Q()
+    for term in text.split():
+        condition &= (
+            Q(title__icontains=term) | Q(description__icontains=term)
+            | Q(questions__text__icontains=term) | Q(questions__options__text__icontains=term)
+        )
+    return (
+        queryset.filter(condition).distinct()
+        .annotate(
+            rank=Value(None, output_field=FloatField()),
+            title_highlight=F('title'),
+            description_highlight=F('description'),
+        )
+        .order_by('-created_at')
+    )
@@ -0,0 +1,187 @@
+"""
+Sessions en autonomie (devoirs) : chaque participant avance à son rythme.
+
+Une session SELF_PACED est ouverte dès sa création (IN_PROGRESS) et reste
+rejoignable jusqu'à closes_at ou jusqu'à ce que l'enseignant la termine.
+L'index global de la session ne sert pas : la progression d'un participant
+tient dans sa ligne (question_index, score, deadline, completed_at), sa date
+limite étant fixée à l'arrivée (closes_at, ou arrivée + time_allowed minutes
+si c'est plus tôt).
+
+Une réponse coûte une lecture (participant et session en une requête), un
+INSERT et un UPDATE conditionnel : la question vient du deck en mémoire
+(cf. api.decks), la correction est faite en mémoire, et l'UPDATE n'avance
+le curseur que s'il est toujours sur la question corrigée (deux envois
+simultanés : un seul passe). La réponse contient la question suivante.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .decks import get_deck
+from .live_engine import check_submission
+from .models import QuizSession, Participant, Answer
+
+# Mode des sessions déjà vues par ce processus (fixé à la création, cf. serializers)
+_modes = {}
+MAX_CACHED_MODES = 10000
+
+PROGRESS_FIELDS = (
+    'id', 'question_index', 'score', 'deadline', 'completed_at',
+    'session__quiz_id', 'session__status', 'session__mode',
+)
+
+
+def is_self_paced(session_id):
+    """True si la session est en autonomie (mémorisé par processus) ; False si elle n'existe pas"""
+    try:
+        session_id = int(session_id)
+    except (TypeError, ValueError):
+        return False
+    mode = _modes.get(session_id)
+    if mode is None:
+        mode = QuizSession.objects.filter(pk=session_id).values_list('mode', flat=True).first()
+        if mode is None:
+            return False
+        if len(_modes) >= MAX_CACHED_MODES:
+            _modes.clear()
+        _modes[session_id] = mode
+    return mode == QuizSession.Mode.SELF_PACED
+
+
+def participant_deadline(session, joined_at):
+    """Date limite d'un participant arrivé à `joined_at` (None : pas de limite)"""
+    deadlines = []
+    if session.closes_at is not None:
+        deadlines.append(session.closes_at)
+    if session.time_allowed:
+        deadlines.append(joined_at + timedelta(minutes=session.time_allowed))
+    return min(deadlines) if deadlines else None
+
+
+def _progress(session_id, user):
+    return Participant.objects.filter(session_id=session_id, user=user).values(*PROGRESS_FIELDS).first()
+
+
+def _closed(row, now):
+    if row['session__status'] != QuizSession.Status.IN_PROGRESS:
+        return "La session est terminée."
+    if row['deadline'] is not None and row['deadline'] <= now:
+        return "Le temps imparti est écoulé."
+    return None
+
+
+def _state(row, deck, now):
+    closed = _closed(row, now)
+    question = None if closed else deck.at(row['question_index'])
+    return {
+        'question_index': row['question_index'],
+        'question_count': len(deck),
+        'score': row['score'],
+        'deadline': row['deadline'],
+        'completed': row['completed_at'] is not None,
+        'closed_reason': closed,
+        'current_question': question.public_payload() if question else None,
+    }
+
+
+def progress(session_id, user):
+    """Progression du participant (question courante sans les bonnes réponses) ; None s'il n'en est pas"""
+    row = _progress(session_id, user)
+    if row is None:
+        return None
+    return _state(row, get_deck(row['session__quiz_id']), timezone.now())
+
+
+def overview(session):
+    """Vue de l'enseignant : participants par question atteinte, terminés, en retard"""
+    now = timezone.now()
+    participants = session.participants.all()
+    counts = participants.aggregate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(completed_at__isnull=False)),
+        expired=Count('id', filter=Q(completed_at__isnull=True, deadline__lte=now)),
+    )
+    by_question = dict(
+        participants.filter(completed_at__isnull=True)
+        .order_by().values_list('question_index').annotate(count=Count('id'))
+    )
+    return {
+        'mode': session.mode,
+        'closes_at': session.closes_at,
+        'time_allowed': session.time_allowed,
+        'question_count': len(get_deck(session.quiz_id)),
+        'participant_count': counts['total'],
+        'completed_count': counts['completed'],
+        'expired_count': counts['expired'],
+        'by_question': [{'question_index': index, 'count': by_question[index]} for index in sorted(by_question)],
+    }
+
+
+def submit(session_id, user, data):
+    """
+    Corrige la réponse du participant à sa question courante et avance son
+    curseur. Retourne (statut HTTP, corps), comme LiveSessionEngine.submit.
+    """
+    row = _progress(session_id, user)
+    if row is None:
+        return 404, {"detail": "Pas trouvé."}
+    now = timezone.now()
+    closed = _closed(row, now)
+    if closed:
+        return 400, {"error": closed}
+
+    deck = get_deck(row['session__quiz_id'])
+    index = row['question_index']
+    question = deck.at(index)
+    if question is None:
+        return 400, {"error": "Vous avez terminé ce quiz."}
+    # Client resté sur une question déjà répondue (autre onglet, renvoi)
+    expected = data.get('question')
+    if expected not in (None, '') and str(expected) != str(question.id):
+        return 409, {"error": "Cette question n'est plus la question courante.", "question_id": question.id}
+
+    errors, values = check_submission(question, data)
+    if errors:
+        return 400, errors
+    selected_option, text_answer, response_time = values
+    is_correct = question.grade(selected_option, text_answer)
+    points = question.points(is_correct, response_time)
+    last = index + 1 >= len(deck)
+
+    try:
+        with transaction.atomic():
+            advanced = Participant.objects.filter(pk=row['id'], question_index=index).update(
+                question_index=F('question_index') + 1,
+                score=F('score') + points,
+                completed_at=now if last else None,
+            )
+            if not advanced:
+                return 409, {"error": "Vous avez déjà répondu à cette question.", "question_id": question.id}
+            # bulk_create : pas de Answer.save(), qui relirait question et options pour corriger
+            answer, = Answer.objects.bulk_create([Answer(
+                participant_id=row['id'],
+                question_id=question.id,
+                selected_option_id=selected_option,
+                text_answer=text_answer,
+                is_correct=is_correct,
+                response_time=response_time,
+            )])
+    except IntegrityError:
+        return 409, {"error": "Vous avez déjà répondu à cette question.", "question_id": question.id}
+
+    row.update(question_index=index + 1, score=row['score'] + points, completed_at=now if last else None)
+    return 201, {
+        'id': answer.pk,
+        'participant_id': row['id'],
+        'question_id': question.id,
+        'selected_option_id': selected_option,
+        'text_answer': text_answer,
+        'is_correct': is_correct,
+        'response_time': response_time,
+        'answered_at': answer.answered_at,
+        'points': points,
+        'progress': _state(row, deck, now),
+    }
@@ -1,10 +1,16 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from .models import Quiz, Question, QuestionOption, QuizSession, Participant, Answer
+from .models import Quiz, Question, QuestionOption, QuizSession, Participant, Answer, MAX_RESPONSE_TIME, MAX_TEXT_ANSWER_LENGTH
+from . import quiz_cache, self_paced, snapshots
+from .ordering import next_question_order
+from .pagination import PARTICIPANT_ORDERING
+from .signals import quiz_content_changed
 from django.utils import timezone
-from django.db.models import Max
+from django.utils.html import escape
+from django.db import transaction
 
 User = get_user_model()
 
@@ -113,7 +119,7 @@ class QuestionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        fields = ['id', 'text', 'question_type', 'order', 'time_limit', 'options']
+        fields = ['id', 'text', 'question_type', 'order', 'time_limit', 'fuzzy_matching', 'options']
         read_only_fields = ['id']
 
 
@@ -127,6 +133,27 @@ class QuizListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
 
+class QuizSearchResultSerializer(QuizListSerializer):
+    """Résultat de api.search.search_quizzes : termes trouvés entourés de <mark>"""
+    rank = serializers.FloatField(read_only=True)
+    title_highlight = serializers.SerializerMethodField()
+    description_highlight = serializers.SerializerMethodField()
+
+    class Meta(QuizListSerializer.Meta):
+        fields = QuizListSerializer.Meta.fields + ['rank', 'title_highlight', 'description_highlight']
+
+    @staticmethod
+    def _safe_highlight(text):
+        # Le texte vient des enseignants : échappé, seuls les <mark> restent du HTML
+        return escape(text or '').replace('&lt;mark&gt;', '<mark>').replace('&lt;/mark&gt;', '</mark>')
+
+    def get_title_highlight(self, obj):
+        return self._safe_highlight(obj.title_highlight)
+
+    def get_description_highlight(self, obj):
+        return self._safe_highlight(obj.description_highlight)
+
+
 class QuizDetailSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -153,9 +180,12 @@ class QuizCreateUpdateSerializer(serializers.ModelSerializer):
 # ==================== Sérialiseurs Question ====================
 
 class QuestionOptionCreateSerializer(serializers.ModelSerializer):
+    # En modification : option existante à mettre à jour (sinon rapprochée par son ordre)
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = QuestionOption
-        fields = ['text', 'is_correct', 'order']
+        fields = ['id', 'text', 'is_correct', 'order']
 
     def validate_text(self, value):
         if not value or not value.strip():
@@ -168,7 +198,7 @@ class QuestionCreateUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Question
-        fields = ['id', 'quiz', 'text', 'question_type', 'order', 'time_limit', 'options']
+        fields = ['id', 'quiz', 'text', 'question_type', 'order', 'time_limit', 'fuzzy_matching', 'options']
         read_only_fields = ['id', 'order']
 
     def validate_quiz(self, value):
@@ -223,30 +253,84 @@ class QuestionCreateUpdateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         options_data = validated_data.pop('options', [])
 
-        quiz = validated_data['quiz']
-        current_max_order = Question.objects.filter(quiz=quiz).aggregate(Max('order'))['order__max'] or 0
-        validated_data['order'] = (current_max_order or 0) + 1
-
-
-        question = Question.objects.create(**validated_data)
-        for option_data in options_data:
-            QuestionOption.objects.create(question=question, **option_data)
+        with transaction.atomic():
+            # Verrou sur le quiz : pas deux questions au même ordre (cf. api.ordering)
+            validated_data['order'] = next_question_order(validated_data['quiz'].pk)
+            question = Question.objects.create(**validated_data)
+            for option_data in options_data:
+                option_data.pop('id', None)
+                QuestionOption.objects.create(question=question, **option_data)
         return question
 
     def update(self, instance, validated_data):
         options_data = validated_data.pop('options', None)
-        
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
 
-        if options_data is not None:
-            instance.options.all().delete()
-            for option_data in options_data:
-                QuestionOption.objects.create(question=instance, **option_data)
+        with transaction.atomic():
+            changed = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+            for attr in changed:
+                setattr(instance, attr, validated_data[attr])
+            if changed:
+                instance.save(update_fields=changed)
+
+            if options_data is not None and self._update_options(instance, options_data):
+                # bulk_update / bulk_create n'envoient pas de signaux
+                quiz_content_changed(instance.quiz_id)
 
         return instance
 
+    def _update_options(self, question, options_data):
+        """
+        Applique la nouvelle liste d'options par différence : une option
+        existante (même id, sinon même ordre) garde son id et n'est réécrite
+        que si elle change ; les autres sont créées ou supprimées. Les réponses
+        déjà données gardent ainsi leur option. Renvoie True si quelque chose a changé.
+        """
+        existing = {option.id: option for option in question.options.all()}
+        unknown = [data['id'] for data in options_data if 'id' in data and data['id'] not in existing]
+        if unknown:
+            raise serializers.ValidationError({"options": f"Options inconnues pour cette question : {unknown}"})
+
+        by_order = {option.order: option for option in existing.values()}
+        claimed = {data['id'] for data in options_data if 'id' in data}
+        to_update, to_create, kept = [], [], set()
+        for data in options_data:
+            option = existing.get(data.get('id'))
+            if option is None and 'order' in data:
+                candidate = by_order.get(data['order'])
+                if candidate is not None and candidate.id not in claimed:
+                    option = candidate
+            if option is None or option.id in kept:
+                to_create.append(QuestionOption(
+                    question=question, **{k: v for k, v in data.items() if k != 'id'}
+                ))
+                continue
+            kept.add(option.id)
+            fields = [f for f in ('text', 'is_correct', 'order') if f in data and getattr(option, f) != data[f]]
+            if fields:
+                for field in fields:
+                    setattr(option, field, data[field])
+                to_update.append(option)
+
+        removed = [pk for pk in existing if pk not in kept]
+        if removed:
+            # delete() : Answer.selected_option passe à NULL (on_delete=SET_NULL)
+            QuestionOption.objects.filter(pk__in=removed).delete()
+        if to_update:
+            QuestionOption.objects.bulk_update(to_update, ['text', 'is_correct', 'order'])
+        if to_create:
+            QuestionOption.objects.bulk_create(to_create)
+        return bool(removed or to_update or to_create)
+
+
+class QuestionReorderSerializer(serializers.Serializer):
+    """Nouvel ordre complet des questions d'un quiz (ids, de la première à la dernière)"""
+    questions = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_questions(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Une question ne peut apparaître qu'une fois.")
+        return value
+
 
 # ==================== Sérialiseurs Réponses ====================
 
@@ -281,6 +365,52 @@ class ParticipantSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'score', 'joined_at']
 
 
+def serialize_participants(ids, question):
+    """
+    Participants `ids` (dans cet ordre) avec leurs statistiques et
+    has_answered pour `question` : deux requêtes bornées par len(ids).
+    """
+    participants = Participant.objects.filter(pk__in=ids).select_related('user').with_stats().in_bulk()
+    data = ParticipantSerializer([participants[pk] for pk in ids if pk in participants], many=True).data
+    answered_ids = set()
+    if question is not None and ids:
+        answered_ids = set(Answer.objects.filter(
+            question=question, participant_id__in=ids
+        ).order_by().values_list('participant_id', flat=True))
+    for p in data:
+        p['has_answered'] = p['id'] in answered_ids
+    return data
+
+
+class ParticipationHistorySerializer(serializers.ModelSerializer):
+    """Une session rejointe ; attend un queryset views.history_queryset"""
+    session_id = serializers.IntegerField(source='session.id', read_only=True)
+    quiz_id = serializers.IntegerField(source='session.quiz_id', read_only=True)
+    quiz_title = serializers.CharField(source='session.quiz.title', read_only=True)
+    status = serializers.CharField(source='session.status', read_only=True)
+    started_at = serializers.DateTimeField(source='session.started_at', read_only=True)
+    ended_at = serializers.DateTimeField(source='session.ended_at', read_only=True)
+    answer_count = serializers.IntegerField(source='answer_cnt', read_only=True)
+    correct_count = serializers.IntegerField(source='correct_cnt', read_only=True)
+    accuracy = serializers.SerializerMethodField()
+    average_time = serializers.SerializerMethodField()
+    rank = serializers.IntegerField(read_only=True)
+    participant_count = serializers.IntegerField(source='session_participant_count', read_only=True)
+
+    class Meta:
+        model = Participant
+        fields = [
+            'session_id', 'quiz_id', 'quiz_title', 'status', 'joined_at', 'started_at', 'ended_at',
+            'score', 'answer_count', 'correct_count', 'accuracy', 'average_time', 'rank', 'participant_count'
+        ]
+
+    def get_accuracy(self, obj):
+        return (obj.correct_cnt / obj.answer_cnt * 100) if obj.answer_cnt > 0 else 0
+
+    def get_average_time(self, obj):
+        return (obj.avg_time or 0) / 1000  # Conversion ms -> s
+
+
 class QuizSessionListSerializer(serializers.ModelSerializer):
     quiz_title = serializers.CharField(source='quiz.title', read_only=True)
     host_name = serializers.CharField(source='host.get_full_name', read_only=True)
@@ -288,15 +418,20 @@ class QuizSessionListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = QuizSession
-        fields = ['id', 'quiz', 'quiz_title', 'host', 'host_name', 'access_code', 'status', 'participant_count', 'started_at', 'ended_at', 'created_at']
-        read_only_fields = ['id', 'access_code', 'created_at', 'started_at', 'ended_at']
+        fields = ['id', 'quiz', 'quiz_title', 'host', 'host_name', 'access_code', 'status', 'mode', 'closes_at', 'participant_count', 'started_at', 'ended_at', 'archived_at', 'created_at']
+        # mode et closes_at sont fixés à la création (mémorisés par api.self_paced)
+        read_only_fields = ['id', 'access_code', 'mode', 'closes_at', 'created_at', 'started_at', 'ended_at',
+                            'archived_at']
 
 
 class QuizSessionDetailSerializer(serializers.ModelSerializer):
-    quiz = QuizDetailSerializer(read_only=True)
+    # Même payload que QuizDetailSerializer, servi par le cache (cf. api.quiz_cache)
+    quiz = serializers.SerializerMethodField()
     host_name = serializers.CharField(source='host.get_full_name', read_only=True)
     participant_count = serializers.ReadOnlyField()
     participants = serializers.SerializerMethodField()
+    # Participants ayant répondu à la question courante
+    answered_count = serializers.SerializerMethodField()
     
     # AJOUT : Champ pour la question courante
     current_question = serializers.SerializerMethodField()
@@ -304,37 +439,45 @@ class QuizSessionDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizSession
         fields = [
-            'id', 'quiz', 'host', 'host_name', 'access_code', 'status', 
-            'participant_count', 'participants', 'current_question', 
-            'started_at', 'ended_at', 'created_at'
+            'id', 'quiz', 'host', 'host_name', 'access_code', 'status', 'mode', 'closes_at', 'time_allowed',
+            'state_version', 'participant_count', 'answered_count', 'participants', 'current_question', 
+            'started_at', 'ended_at', 'archived_at', 'created_at'
         ]
-        read_only_fields = ['id', 'access_code', 'host', 'created_at', 'started_at', 'ended_at']
+        read_only_fields = ['id', 'access_code', 'host', 'mode', 'closes_at', 'time_allowed', 'state_version',
+                            'created_at', 'started_at', 'ended_at', 'archived_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._questions = {}
+
+    def get_quiz(self, obj):
+        return quiz_cache.get_quiz_payload(obj.quiz_id)
+
+    def _question(self, obj):
+        # Question commune des participants (aucune en autonomie), lue une fois par session
+        if obj.pk not in self._questions:
+            self._questions[obj.pk] = None if obj.is_self_paced else obj.get_current_question()
+        return self._questions[obj.pk]
 
     def get_participants(self, obj):
-        # 1. On récupère les participants de base
-        participants = obj.participants.all().order_by('-score', 'user__username')
-        data = ParticipantSerializer(participants, many=True).data
-        
-        # 2. On identifie la question en cours
-        current_question = obj.get_current_question()
-        
-        # 3. On récupère la liste des IDs des participants qui ont répondu à CETTE question
-        answered_ids = set()
-        if current_question:
-            answered_ids = set(Answer.objects.filter(
-                question=current_question,
-                participant__session=obj
-            ).values_list('participant_id', flat=True))
-            
-        # 4. On ajoute un champ booléen "has_answered" à chaque participant
-        for p in data:
-            p['has_answered'] = p['id'] in answered_ids
-            
-        return data
+        # Top N du classement seulement : la liste complète est paginée
+        # (GET /api/sessions/{id}/participants/)
+        ids = list(
+            obj.participants.order_by(*PARTICIPANT_ORDERING)
+            .values_list('id', flat=True)[:settings.SESSION_PARTICIPANTS_TOP_N]
+        )
+        return serialize_participants(ids, self._question(obj))
+
+    def get_answered_count(self, obj):
+        question = self._question(obj)
+        if question is None:
+            return 0
+        return Answer.objects.filter(question=question, participant__session=obj).count()
 
     def get_current_question(self, obj):
         # On ne renvoie la question que si la session est EN COURS
-        if obj.status == QuizSession.Status.IN_PROGRESS:
+        # (en autonomie, chaque participant a la sienne : GET /api/sessions/{id}/progress/)
+        if obj.status == QuizSession.Status.IN_PROGRESS and not obj.is_self_paced:
             question = obj.get_current_question()
             if question:
                 return {
@@ -353,8 +496,14 @@ class QuizSessionDetailSerializer(serializers.ModelSerializer):
 class QuizSessionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizSession
-        fields = ['id', 'quiz', 'access_code']
+        fields = ['id', 'quiz', 'access_code', 'mode', 'closes_at', 'time_allowed']
         read_only_fields = ['id', 'access_code']
+        extra_kwargs = {'time_allowed': {'min_value': 1}}
+
+    def validate_closes_at(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError("La date de fermeture doit être dans le futur.")
+        return value
 
     def validate_quiz(self, value):
         request = self.context.get('request')
@@ -372,33 +521,55 @@ class QuizSessionCreateSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         quiz = attrs.get('quiz')
         request = self.context.get('request')
-
-        # Au lieu de lever une erreur, on nettoie les vieilles sessions qui traînent
-        # On cherche les sessions actives pour ce quiz et ce prof
-        old_sessions = QuizSession.objects.filter(
-            quiz=quiz,
-            host=request.user,
-            status__in=[QuizSession.Status.WAITING, QuizSession.Status.IN_PROGRESS]
-        )
-        
-        # Si on en trouve, on les marque comme terminées (Auto-close)
-        if old_sessions.exists():
-            old_sessions.update(status=QuizSession.Status.COMPLETED, ended_at=timezone.now())
+        mode = attrs.get('mode', QuizSession.Mode.LIVE)
+
+        if mode == QuizSession.Mode.LIVE:
+            if attrs.get('closes_at') or attrs.get('time_allowed'):
+                raise serializers.ValidationError(
+                    "closes_at et time_allowed ne s'appliquent qu'aux sessions en autonomie."
+                )
+
+            # Au lieu de lever une erreur, on nettoie les vieilles sessions qui traînent
+            # On cherche les sessions actives pour ce quiz et ce prof
+            # (les devoirs en autonomie en cours restent ouverts)
+            old_sessions = QuizSession.objects.filter(
+                quiz=quiz,
+                host=request.user,
+                mode=QuizSession.Mode.LIVE,
+                status__in=[QuizSession.Status.WAITING, QuizSession.Status.IN_PROGRESS]
+            )
+
+            # Si on en trouve, on les marque comme terminées (Auto-close),
+            # avec leur classement final comme end() (podium, cf. api.snapshots)
+            closing = list(old_sessions)
+            if closing:
+                old_sessions.update(status=QuizSession.Status.COMPLETED, ended_at=timezone.now())
+                for session in closing:
+                    snapshots.take_snapshot(session)
 
         return attrs
 
+    def create(self, validated_data):
+        # Une session en autonomie est ouverte dès sa création (pas de lobby)
+        if validated_data.get('mode') == QuizSession.Mode.SELF_PACED:
+            validated_data['status'] = QuizSession.Status.IN_PROGRESS
+            validated_data['started_at'] = timezone.now()
+        return super().create(validated_data)
+
 
 class ParticipantJoinSerializer(serializers.Serializer):
     access_code = serializers.CharField(max_length=6, min_length=6, required=True)
 
     def validate_access_code(self, value):
         value = value.upper()
-        try:
-            session = QuizSession.objects.get(access_code=value)
-        except QuizSession.DoesNotExist:
+        # Une lecture sur l'index unique de access_code
+        session = (
+            QuizSession.objects.filter(access_code=value)
+            .only('id', 'status', 'mode', 'closes_at', 'time_allowed').first()
+        )
+        if session is None:
             raise serializers.ValidationError("Code d'accès invalide.")
-
-        if session.status != QuizSession.Status.WAITING:
+        if not session.accepts_participants():
             raise serializers.ValidationError("Cette session n'accepte plus de nouveaux participants.")
 
         self.context['session'] = session
@@ -408,14 +579,19 @@ class ParticipantJoinSerializer(serializers.Serializer):
         request = self.context.get('request')
         session = self.context.get('session')
 
-        if Participant.objects.filter(session=session, user=request.user).exists():
+        if Participant.objects.filter(session_id=session.pk, user=request.user).exists():
             raise serializers.ValidationError({"access_code": "Vous participez déjà à cette session."})
         return attrs
 
     def create(self, validated_data):
         request = self.context.get('request')
         session = self.context.get('session')
-        participant = Participant.objects.create(session=session, user=request.user, score=0)
+        participant = Participant.objects.create(session_id=session.pk, user=request.user, score=0)
+        if session.is_self_paced:
+            # Date limite fixée à l'arrivée (cf. api.self_paced)
+            participant.deadline = self_paced.participant_deadline(session, participant.joined_at)
+            if participant.deadline is not None:
+                participant.save(update_fields=['deadline'])
         return participant
 
 
@@ -434,10 +610,15 @@ class AnswerSubmitSerializer(serializers.ModelSerializer):
         model = Answer
         fields = ['id', 'selected_option', 'text_answer', 'response_time']
         read_only_fields = ['id']
+        extra_kwargs = {'text_answer': {'max_length': MAX_TEXT_ANSWER_LENGTH}}
 
     def validate_response_time(self, value):
         if value < 0:
             raise serializers.ValidationError("Le temps ne peut pas être négatif.")
+        if value > MAX_RESPONSE_TIME:
+            raise serializers.ValidationError(
+                f"Assurez-vous que cette valeur est inférieure ou égale à {MAX_RESPONSE_TIME}."
+            )
         return value
 
     def validate(self, attrs):
@@ -480,4 +661,19 @@ class LeaderboardEntrySerializer(serializers.Serializer):
     answer_count = serializers.IntegerField(read_only=True)
     correct_count = serializers.IntegerField(read_only=True)
     accuracy = serializers.FloatField(read_only=True)
-    average_time = serializers.FloatField(read_only=True)
\ No newline at end of file
+    average_time = serializers.FloatField(read_only=True)
+
+
+class PodiumEntrySerializer(serializers.Serializer):
+    rank = serializers.IntegerField(read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    score = serializers.IntegerField(read_only=True)
+
+
+class RankChangeEntrySerializer(PodiumEntrySerializer):
+    """Entrée du classement avec l'écart de rang depuis le classement précédent (cf. api.snapshots)"""
+    previous_rank = serializers.IntegerField(read_only=True, allow_null=True)
+    change = serializers.IntegerField(read_only=True, allow_null=True)
+    points_gained = serializers.IntegerField(read_only=True)
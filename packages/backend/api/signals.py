@@ -0,0 +1,90 @@
+"""
+Invalidation des données dérivées d'un quiz (decks en mémoire, document
+de recherche, payload en cache) quand le quiz, une question ou une option change.
+Le fichier d'une archive de session (api.archive) est supprimé avec son résumé.
+
+Les opérations en masse (update(), bulk_*) n'envoient pas de signaux :
+elles appellent directement quiz_content_changed().
+
+Les invalidations et les changements d'état des sessions passent par le
+bus (api.bus) pour atteindre tous les workers ; les abonnements sont en
+fin de module.
+"""
+from pathlib import Path
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import bus, event_log, live_engine, quiz_cache, search, waiters
+from .decks import invalidate_deck, invalidate_all_decks
+from .models import Quiz, Question, QuestionOption, QuizSession, SessionArchive
+
+
+def quiz_content_changed(quiz_id):
+    """À appeler après toute modification du contenu d'un quiz"""
+    invalidate_deck(quiz_id)
+    quiz_cache.invalidate(quiz_id)
+    search.schedule_update(quiz_id)
+    # Invalide aussi après le commit, dans tous les workers : un deck ou un
+    # payload recalculé pendant la transaction aurait lu l'ancien contenu
+    transaction.on_commit(lambda: quiz_cache.invalidate(quiz_id))
+    bus.publish(bus.QUIZ, {'id': quiz_id})
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    quiz_content_changed(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    quiz_content_changed(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=QuestionOption)
+def option_changed(sender, instance, **kwargs):
+    if QuestionOption.question.is_cached(instance):
+        quiz_id = instance.question.quiz_id
+    else:
+        quiz_id = (Question.objects.filter(pk=instance.question_id)
+                   .values_list('quiz_id', flat=True).first())
+    if quiz_id is not None:
+        quiz_content_changed(quiz_id)
+
+
+@receiver(post_delete, sender=SessionArchive)
+def session_archive_deleted(sender, instance, **kwargs):
+    # Après le commit : une restauration annulée garde son fichier
+    transaction.on_commit(lambda: Path(instance.path).unlink(missing_ok=True))
+
+
+# ==================== Bus ====================
+
+@receiver(request_started)
+def start_bus(sender, **kwargs):
+    # Écoute démarrée par les workers à leur première requête (jamais par le master)
+    bus.start()
+
+
+def on_quiz_event(payload):
+    invalidate_deck(payload['id'])
+    quiz_cache.invalidate_local(payload['id'])
+
+
+def on_resync(payload):
+    invalidate_all_decks()
+    quiz_cache.invalidate_all_local()
+
+
+def on_session_event(payload):
+    waiters.notify(payload['id'])
+    live_engine.on_session_event(payload)
+    if payload['status'] in (QuizSession.Status.COMPLETED, bus.SESSION_DELETED):
+        event_log.close_log(payload['id'])
+
+
+bus.subscribe(bus.QUIZ, on_quiz_event)
+bus.subscribe(bus.SESSION, on_session_event)
+bus.subscribe(bus.RESYNC, on_resync)
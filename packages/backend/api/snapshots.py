@@ -0,0 +1,124 @@
+"""
+Classements enregistrés après chaque question (LeaderboardSnapshot).
+
+next_question(), end() et la fermeture automatique d'une session
+(création d'une nouvelle session du même quiz) enregistrent le classement
+de la question qui se termine : deux tableaux parallèles (ids des utilisateurs par rang, scores),
+pris dans le moteur en mémoire s'il est chargé, sinon en une requête sur
+les scores des participants, sans agrégation des réponses. Les écarts de
+rang entre deux questions et le podium final se lisent ensuite dans ces
+tableaux ; seuls les noms sont chargés (une requête sur les utilisateurs).
+Les lectures n'écrivent jamais : le podium d'une session terminée sans
+classement enregistré (antérieure aux snapshots) est calculé à la volée.
+
+Les ids d'utilisateurs (plutôt que de participants) restent valides après
+l'archivage de la session (cf. api.archive).
+"""
+from .models import User, QuizSession, LeaderboardSnapshot
+from .pagination import PARTICIPANT_ORDERING
+from . import live_engine
+
+PODIUM_SIZE = 3
+
+
+def current_ranking(session, limit=None):
+    """(user_ids, scores) du classement courant, par rang (les `limit` premiers si précisé)"""
+    engine = live_engine.get_engine(session.pk, create=False)
+    if engine is not None:
+        entries = engine.leaderboard()[:limit]
+        return [e['user_id'] for e in entries], [e['score'] for e in entries]
+    rows = session.participants.order_by(*PARTICIPANT_ORDERING).values_list('user_id', 'score')[:limit]
+    return [user_id for user_id, _ in rows], [score for _, score in rows]
+
+
+def take_snapshot(session, question_index=None):
+    """Enregistre (ou remplace) le classement après la question `question_index` (courante par défaut)"""
+    if question_index is None:
+        question_index = session.current_question_index
+    user_ids, scores = current_ranking(session)
+    snapshot, _ = LeaderboardSnapshot.objects.update_or_create(
+        session=session, question_index=question_index,
+        defaults={'user_ids': user_ids, 'scores': scores},
+    )
+    return snapshot
+
+
+def _names(user_ids):
+    return {
+        pk: (username, f'{first_name} {last_name}'.strip())
+        for pk, username, first_name, last_name in
+        User.objects.filter(pk__in=user_ids).values_list('pk', 'username', 'first_name', 'last_name')
+    }
+
+
+def rank_changes(session, from_index=None, to_index=None):
+    """
+    Écarts de rang entre les classements après les questions `from_index`
+    et `to_index` (par défaut : les deux derniers). None si l'un manque.
+    """
+    snapshots = session.leaderboard_snapshots.order_by('-question_index')
+    if to_index is not None:
+        snapshots = snapshots.filter(question_index__lte=to_index)
+    target = snapshots.first()
+    if target is None or (to_index is not None and target.question_index != to_index):
+        return None
+    if from_index is None:
+        previous = snapshots.filter(question_index__lt=target.question_index).first()
+    else:
+        previous = session.leaderboard_snapshots.filter(question_index=from_index).first()
+        if previous is None:
+            return None
+
+    previous_ranks = {}
+    if previous is not None:
+        previous_ranks = {
+            user_id: (rank, score)
+            for rank, (user_id, score) in enumerate(zip(previous.user_ids, previous.scores), start=1)
+        }
+    names = _names(target.user_ids)
+    entries = []
+    for rank, (user_id, score) in enumerate(zip(target.user_ids, target.scores), start=1):
+        previous_rank, previous_score = previous_ranks.get(user_id, (None, 0))
+        username, full_name = names.get(user_id, ('', ''))
+        entries.append({
+            'rank': rank,
+            'previous_rank': previous_rank,
+            # Positif : places gagnées
+            'change': previous_rank - rank if previous_rank is not None else None,
+            'user_id': user_id,
+            'username': username,
+            'full_name': full_name,
+            'score': score,
+            'points_gained': score - previous_score,
+        })
+    return {
+        'from_question': previous.question_index if previous is not None else None,
+        'to_question': target.question_index,
+        'entries': entries,
+    }
+
+
+def podium(session, size=PODIUM_SIZE):
+    """Premiers du dernier classement enregistré (calculé sans l'enregistrer pour une session terminée qui n'en a pas)"""
+    snapshot = session.leaderboard_snapshots.order_by('-question_index').first()
+    if snapshot is not None:
+        question_index, user_ids, scores = snapshot.question_index, snapshot.user_ids[:size], snapshot.scores
+    elif session.status == QuizSession.Status.COMPLETED and session.archived_at is None:
+        question_index = session.current_question_index
+        user_ids, scores = current_ranking(session, size)
+    else:
+        return None
+    names = _names(user_ids)
+    return {
+        'question_index': question_index,
+        'entries': [
+            {
+                'rank': rank,
+                'user_id': user_id,
+                'username': names.get(user_id, ('', ''))[0],
+                'full_name': names.get(user_id, ('', ''))[1],
+                'score': score,
+            }
+            for rank, (user_id, score) in enumerate(zip(user_ids, scores), start=1)
+        ],
+    }
@@ -0,0 +1,50 @@
+"""Données communes aux tests : utilisateurs, quiz, sessions, clients authentifiés"""
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User, Quiz, Question, QuestionOption, QuizSession, Participant
+
+
+def create_user(username, role=User.Role.STUDENT):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.test', password='password', role=role,
+    )
+
+
+def create_quiz(teacher, title='Quiz'):
+    """Quiz de deux questions : un QCM (Paris correct) et une réponse courte (La Seine)"""
+    quiz = Quiz.objects.create(title=title, created_by=teacher)
+    choice = Question.objects.create(
+        quiz=quiz, text='Capitale ?', question_type=Question.QuestionType.MULTIPLE_CHOICE, order=1,
+    )
+    QuestionOption.objects.create(question=choice, text='Paris', is_correct=True, order=0)
+    QuestionOption.objects.create(question=choice, text='Lyon', is_correct=False, order=1)
+    short = Question.objects.create(
+        quiz=quiz, text='Fleuve ?', question_type=Question.QuestionType.SHORT_ANSWER, order=2,
+    )
+    QuestionOption.objects.create(question=short, text='La Seine', is_correct=True, order=0)
+    return quiz
+
+
+def create_session(quiz, students=(), status=QuizSession.Status.WAITING, **fields):
+    session = QuizSession.objects.create(quiz=quiz, host=quiz.created_by, status=status, **fields)
+    for student in students:
+        Participant.objects.create(session=session, user=student)
+    return session
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def jwt_headers(user):
+    """En-têtes des vues async (authentification JWT uniquement)"""
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+def reset_cache():
+    # Throttles et clés d'idempotence vivent dans le cache partagé
+    cache.clear()
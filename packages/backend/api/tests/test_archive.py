@@ -0,0 +1,71 @@
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import archive
+from api.models import QuizSession, Participant, Answer, SessionArchive
+
+from .helpers import create_user, create_quiz, create_session, api_client, reset_cache
+
+
+class ArchiveRestoreTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(SESSION_ARCHIVE_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.students = [create_user(f'student{i}') for i in range(2)]
+        quiz = create_quiz(self.teacher)
+        self.session = create_session(
+            quiz, self.students, status=QuizSession.Status.COMPLETED, ended_at=timezone.now(),
+        )
+        question = quiz.questions.get(order=1)
+        for participant, option in zip(self.session.participants.order_by('id'), question.options.order_by('order')):
+            Answer.objects.create(participant=participant, question=question, selected_option=option, response_time=1200)
+        self.participants = list(self.session.participants.order_by('id').values('id', 'user_id', 'score', 'joined_at'))
+
+    def test_archive_moves_rows_to_file(self):
+        summary = archive.archive_session(self.session.pk)
+        self.assertEqual((summary.participant_count, summary.answer_count), (2, 2))
+        self.assertTrue(Path(summary.path).exists())
+        self.assertFalse(Participant.objects.filter(session=self.session).exists())
+        self.assertEqual(set(summary.users.values_list('pk', flat=True)), {s.pk for s in self.students})
+        self.assertIsNone(archive.archive_session(self.session.pk))
+
+    def test_reads_do_not_restore(self):
+        archive.archive_session(self.session.pk)
+        student = api_client(self.students[0])
+
+        detail = student.get(f'/api/sessions/{self.session.pk}/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertIsNotNone(detail.data['archived_at'])
+        self.assertEqual(detail.data['participant_count'], 2)
+        self.assertEqual(student.get(f'/api/sessions/{self.session.pk}/leaderboard/').status_code, 409)
+        self.assertEqual(student.get(f'/api/sessions/{self.session.pk}/participants/').status_code, 409)
+
+        self.assertFalse(Participant.objects.filter(session=self.session).exists())
+        self.assertIsNotNone(QuizSession.objects.get(pk=self.session.pk).archived_at)
+
+    def test_teacher_restores_with_post(self):
+        summary = archive.archive_session(self.session.pk)
+        url = f'/api/sessions/{self.session.pk}/restore/'
+        self.assertEqual(api_client(self.students[0]).post(url).status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = api_client(self.teacher).post(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNone(response.data['archived_at'])
+        restored = list(self.session.participants.order_by('id').values('id', 'user_id', 'score', 'joined_at'))
+        self.assertEqual(restored, self.participants)
+        self.assertEqual(Answer.objects.filter(participant__session=self.session).count(), 2)
+        self.assertFalse(SessionArchive.objects.filter(session=self.session).exists())
+        self.assertFalse(Path(summary.path).exists())
+
+        self.assertEqual(api_client(self.teacher).post(url).status_code, 400)
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.test import TestCase
+
+from api import bus
+
+
+class CoalescedPublishTests(TestCase):
+
+    def setUp(self):
+        self.received = []
+        self.bus = bus.InProcessBus()
+        self.bus.send = lambda channel, payloads: self.received.extend(payloads)
+
+    def test_last_payload_per_key_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for count in range(3):
+                self.bus.publish_coalesced('test', 1, {'count': count})
+            self.bus.publish_coalesced('test', 2, {'count': 10})
+        self.bus.flush()
+        self.assertCountEqual(self.received, [{'count': 2}, {'count': 10}])
+
+    def test_rolled_back_transaction_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.bus.publish_coalesced('test', 1, {'count': 1})
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.bus.flush()
+        self.assertEqual(self.received, [])
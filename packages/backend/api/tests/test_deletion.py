@@ -0,0 +1,68 @@
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import archive, deletion
+from api.models import (
+    Quiz, Question, QuestionOption, QuizSession, Participant, Answer, SessionArchive, LeaderboardSnapshot,
+)
+
+from .helpers import create_user, create_quiz, create_session, reset_cache
+
+
+class DeleteQuizTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(SESSION_ARCHIVE_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        teacher = create_user('teacher', role='TEACHER')
+        students = [create_user(f'student{i}') for i in range(3)]
+        self.quiz = create_quiz(teacher)
+        self.other_quiz = create_quiz(teacher, title='Autre')
+        question = self.quiz.questions.get(order=1)
+        option = question.options.get(is_correct=True)
+
+        live = create_session(self.quiz, students, status=QuizSession.Status.IN_PROGRESS)
+        for participant in live.participants.all():
+            Answer.objects.create(participant=participant, question=question, selected_option=option, response_time=500)
+        LeaderboardSnapshot.objects.create(session=live, question_index=0, user_ids=[], scores=[])
+
+        done = create_session(self.quiz, students[:2], status=QuizSession.Status.COMPLETED, ended_at=timezone.now())
+        for participant in done.participants.all():
+            Answer.objects.create(participant=participant, question=question, selected_option=option, response_time=500)
+        archive.archive_session(done.pk)
+
+        self.kept = create_session(self.other_quiz, students)
+
+    def test_row_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = deletion.delete_quiz(self.quiz.pk)
+        self.assertEqual(counts, {
+            'answers': 3,
+            'participants': 3,
+            'session_archive_users': 2,
+            'session_archives': 1,
+            'leaderboard_snapshots': 1,
+            'sessions': 2,
+            'options': 3,
+            'questions': 2,
+            'quizzes': 1,
+        })
+        self.assertFalse(Quiz.objects.filter(pk=self.quiz.pk).exists())
+        self.assertFalse(QuizSession.objects.filter(quiz_id=self.quiz.pk).exists())
+        self.assertFalse(Question.objects.filter(quiz_id=self.quiz.pk).exists())
+        self.assertFalse(QuestionOption.objects.filter(question__quiz_id=self.quiz.pk).exists())
+        self.assertFalse(SessionArchive.objects.exists())
+
+        # L'autre quiz et sa session sont intacts
+        self.assertEqual(Participant.objects.filter(session=self.kept).count(), 3)
+        self.assertEqual(self.other_quiz.questions.count(), 2)
+
+    def test_missing_quiz(self):
+        self.assertEqual(deletion.delete_quiz(self.quiz.pk + 1000), {})
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api import idempotency
+from api.models import QuizSession, Answer
+from api.throttling import SessionAnswerThrottle
+
+from .helpers import create_user, create_quiz, create_session, jwt_headers, reset_cache
+
+KEY = '0b6c7d6e-4f1b-4c2a-9d1e-3f2a1b0c9d8e'
+
+
+class IdempotentSubmitTests(TestCase):
+    url = '/api/sessions/{}/answer/'
+
+    def setUp(self):
+        reset_cache()
+        teacher = create_user('teacher', role='TEACHER')
+        self.student = create_user('student')
+        quiz = create_quiz(teacher)
+        self.session = create_session(quiz, [self.student], status=QuizSession.Status.IN_PROGRESS)
+        self.option = quiz.questions.get(order=1).options.get(text='Paris')
+        self.data = {'selected_option': self.option.pk, 'response_time': 1000}
+
+    def post(self, data, key=KEY):
+        return self.client.post(
+            self.url.format(self.session.pk), data, content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key, **jwt_headers(self.student),
+        )
+
+    def test_replay_skips_database_and_throttles(self):
+        first = self.post(self.data)
+        self.assertEqual(first.status_code, 201, first.content)
+
+        # Seaux vides : un nouvel envoi serait refusé, le renvoi passe quand même
+        with mock.patch.object(SessionAnswerThrottle, 'allow_request', return_value=False), \
+                mock.patch.object(SessionAnswerThrottle, 'wait', return_value=1.0):
+            with self.assertNumQueries(0):
+                replay = self.post(self.data)
+            self.assertEqual(self.post(self.data, key='autre-cle').status_code, 429)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Answer.objects.filter(participant__session=self.session).count(), 1)
+
+    def test_key_reused_with_another_body(self):
+        self.assertEqual(self.post(self.data).status_code, 201)
+        response = self.post({**self.data, 'response_time': 2000})
+        self.assertEqual(response.status_code, 422)
+
+    def test_concurrent_send_is_pending(self):
+        key = idempotency._key(self.student.pk, self.session.pk, KEY)
+        idempotency._cache().set(key, idempotency.PENDING)
+        self.assertEqual(self.post(self.data).status_code, 409)
+        self.assertFalse(Answer.objects.filter(participant__session=self.session).exists())
+
+    def test_invalid_token_is_not_replayed(self):
+        self.assertEqual(self.post(self.data).status_code, 201)
+        response = self.client.post(
+            self.url.format(self.session.pk), self.data, content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=KEY, HTTP_AUTHORIZATION='Bearer invalide',
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class AsyncIdempotentSubmitTests(IdempotentSubmitTests):
+    url = '/api/async/sessions/{}/answer/'
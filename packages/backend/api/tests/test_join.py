@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import QuizSession, Participant
+
+from .helpers import create_user, create_quiz, create_session, api_client, reset_cache
+
+
+class JoinSessionTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.student = create_user('student')
+        self.quiz = create_quiz(self.teacher)
+
+    def join(self, access_code):
+        return api_client(self.student).post('/api/sessions/join/', {'access_code': access_code}, format='json')
+
+    def test_join_waiting_session(self):
+        session = create_session(self.quiz)
+        response = self.join(session.access_code.lower())
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(Participant.objects.filter(session=session, user=self.student).exists())
+        self.assertEqual(self.join(session.access_code).status_code, 400)
+
+    def test_started_session_refuses_arrivals(self):
+        session = create_session(self.quiz)
+        # Changement de statut sans signal : lu tel quel en base
+        QuizSession.objects.filter(pk=session.pk).update(status=QuizSession.Status.IN_PROGRESS)
+        response = self.join(session.access_code)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Participant.objects.filter(session=session).exists())
+
+    def test_join_completed_session(self):
+        session = create_session(self.quiz, status=QuizSession.Status.COMPLETED)
+        response = self.join(session.access_code)
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_code(self):
+        response = self.join('ZZZZZZ')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['access_code'], ["Code d'accès invalide."])
+
+    def test_self_paced_deadline_set_on_join(self):
+        closes_at = timezone.now() + timedelta(hours=1)
+        session = create_session(
+            self.quiz, status=QuizSession.Status.IN_PROGRESS, mode=QuizSession.Mode.SELF_PACED,
+            closes_at=closes_at, time_allowed=30,
+        )
+        self.assertEqual(self.join(session.access_code).status_code, 201)
+        participant = Participant.objects.get(session=session)
+        self.assertEqual(participant.deadline, participant.joined_at + timedelta(minutes=30))
+
+        QuizSession.objects.filter(pk=session.pk).update(closes_at=timezone.now() - timedelta(minutes=1))
+        other = create_user('other')
+        response = api_client(other).post('/api/sessions/join/', {'access_code': session.access_code}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_auto_closed_session_refuses_arrivals(self):
+        teacher = api_client(self.teacher)
+        first = teacher.post('/api/sessions/', {'quiz': self.quiz.pk}, format='json').data
+        second = teacher.post('/api/sessions/', {'quiz': self.quiz.pk}, format='json')
+        self.assertEqual(second.status_code, 201, second.data)
+
+        self.assertEqual(QuizSession.objects.get(pk=first['id']).status, QuizSession.Status.COMPLETED)
+        self.assertEqual(self.join(first['access_code']).status_code, 400)
@@ -0,0 +1,50 @@
+from django.test import TestCase, override_settings
+
+from api import live_engine
+from api.decks import invalidate_all_decks
+from api.models import QuizSession, MAX_RESPONSE_TIME
+
+from .helpers import create_user, create_quiz, create_session, jwt_headers, reset_cache
+
+
+@override_settings(LIVE_ENGINE_ENABLED=True)
+class AsyncEngineSubmitTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.student = create_user('student')
+        self.quiz = create_quiz(self.teacher)
+        self.session = create_session(self.quiz, [self.student], status=QuizSession.Status.IN_PROGRESS)
+        self.url = f'/api/async/sessions/{self.session.pk}/answer/'
+        self.option = self.quiz.questions.get(order=1).options.get(text='Paris')
+
+    def tearDown(self):
+        live_engine.discard_engine(self.session.pk)
+
+    def post(self, data):
+        return self.client.post(self.url, data, content_type='application/json', **jwt_headers(self.student))
+
+    def test_submit_loads_deck_outside_event_loop(self):
+        # Moteur déjà chargé, deck absent : get_deck() interroge l'ORM pendant submit()
+        live_engine.get_engine(self.session.pk)
+        invalidate_all_decks()
+        response = self.post({'selected_option': self.option.pk, 'response_time': 1000})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(response.json()['is_correct'])
+
+    def test_response_time_upper_bound(self):
+        response = self.post({'selected_option': self.option.pk, 'response_time': MAX_RESPONSE_TIME + 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('response_time', response.json())
+        # Rien n'a été enregistré : la réponse valide passe ensuite
+        response = self.post({'selected_option': self.option.pk, 'response_time': 1000})
+        self.assertEqual(response.status_code, 201)
+
+    def test_text_answer_must_be_a_string(self):
+        self.session.current_question_index = 1
+        self.session.save()
+        for value in (['La Seine'], {'a': 1}, 42):
+            response = self.post({'text_answer': value, 'response_time': 1000})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('text_answer', response.json())
@@ -0,0 +1,96 @@
+import random
+import string
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from api.matching import DeletionIndex, MAX_FUZZY_WORD_LENGTH, compile_matcher
+from api.models import QuizSession, Question, MAX_TEXT_ANSWER_LENGTH
+
+from .helpers import create_user, create_quiz, create_session, api_client, reset_cache
+
+
+class FuzzyMatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.matcher = compile_matcher(['La Seine', 'Révolution française 1789'], fuzzy=True)
+
+    def test_typos_accents_and_word_order(self):
+        self.assertTrue(self.matcher.matches('la sene'))
+        self.assertTrue(self.matcher.matches('francaise revolution 1789'))
+        self.assertFalse(self.matcher.matches('la loire'))
+
+    def test_numbers_must_be_exact(self):
+        self.assertFalse(self.matcher.matches('revolution francaise 1788'))
+
+    def test_strict_mode(self):
+        strict = compile_matcher(['La Seine'])
+        self.assertTrue(strict.matches('  la seine '))
+        self.assertFalse(strict.matches('la sene'))
+
+    def test_word_count_mismatch_skips_index(self):
+        with mock.patch.object(DeletionIndex, 'search') as search:
+            self.assertFalse(self.matcher.matches('seine ' * 500))
+            self.assertFalse(self.matcher.matches('sei'))
+            self.assertFalse(self.matcher.matches('la tres grande seine'))
+            search.assert_not_called()
+
+    def test_typos_are_counted_per_word(self):
+        self.assertTrue(self.matcher.matches('revolutoin francasie 1789'))
+        long_word = 'a' * (MAX_FUZZY_WORD_LENGTH + 1)
+        matcher = compile_matcher([f'le {long_word}'], fuzzy=True)
+        self.assertTrue(matcher.matches(f'{long_word} le'))
+        self.assertFalse(matcher.matches(f'le {long_word[1:]}b'))
+
+
+class LongAnswerTests(SimpleTestCase):
+    """Réponse acceptée proche de la limite des options (500 caractères)"""
+
+    def setUp(self):
+        rng = random.Random(0)
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(8, 12))) for _ in range(60)]
+        self.accepted = ' '.join(words)[:500].rsplit(' ', 1)[0]
+        words = self.accepted.split()
+        words[3] = words[3][:-1]
+        words[10] += 'e'
+        self.typo = ' '.join(reversed(words))
+
+    def test_compile_and_match_are_bounded(self):
+        started = time.perf_counter()
+        matcher = compile_matcher([self.accepted, 'autre'], fuzzy=True)
+        compiled = time.perf_counter() - started
+        self.assertLess(len(matcher.index.variants), 50000)
+
+        started = time.perf_counter()
+        self.assertTrue(matcher.matches(self.typo))
+        self.assertFalse(matcher.matches(self.typo + ' de trop'))
+        self.assertFalse(matcher.matches('x' * MAX_TEXT_ANSWER_LENGTH))
+        matched = time.perf_counter() - started
+        # Avant : ~0,4 s de compilation et ~0,5 s par recherche
+        self.assertLess(compiled, 0.05)
+        self.assertLess(matched, 0.05)
+
+
+class TextAnswerLengthTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        teacher = create_user('teacher', role='TEACHER')
+        self.student = create_user('student')
+        quiz = create_quiz(teacher)
+        Question.objects.filter(quiz=quiz).update(fuzzy_matching=True)
+        self.session = create_session(
+            quiz, [self.student], status=QuizSession.Status.IN_PROGRESS, current_question_index=1,
+        )
+
+    def test_text_answer_is_bounded(self):
+        client = api_client(self.student)
+        url = f'/api/sessions/{self.session.pk}/answer/'
+        response = client.post(url, {'text_answer': 'x' * (MAX_TEXT_ANSWER_LENGTH + 1), 'response_time': 100},
+                               format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text_answer', response.data)
+        response = client.post(url, {'text_answer': 'la sene', 'response_time': 100}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(response.data['is_correct'])
@@ -0,0 +1,23 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from api.models import User, Quiz, Question, QuizSession, Participant, Answer
+
+
+class SeedScaleTests(TransactionTestCase):
+    """Petits volumes : vérifie que les colonnes écrites suivent le schéma"""
+
+    def test_seed_tiny_dataset(self):
+        call_command(
+            'seed_scale', teachers=2, students=6, quizzes=2, questions=3, sessions=3, participants=4,
+            days=2, batch_size=5, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.filter(role=User.Role.STUDENT).count(), 6)
+        self.assertEqual(Quiz.objects.count(), 2)
+        self.assertEqual(Question.objects.count(), 6)
+        self.assertEqual(QuizSession.objects.filter(mode=QuizSession.Mode.LIVE).count(), 3)
+        self.assertEqual(Participant.objects.count(), 12)
+        self.assertFalse(Participant.objects.exclude(question_index=3).exists())
+        self.assertTrue(Answer.objects.exists())
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api import self_paced
+from api.models import QuizSession
+
+from .helpers import create_user, create_quiz, create_session, api_client, reset_cache
+
+
+class SessionUpdateTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.session = create_session(create_quiz(self.teacher))
+
+    def test_mode_and_deadlines_are_fixed_after_creation(self):
+        self.assertFalse(self_paced.is_self_paced(self.session.pk))
+        response = api_client(self.teacher).patch(f'/api/sessions/{self.session.pk}/', {
+            'mode': QuizSession.Mode.SELF_PACED,
+            'closes_at': (timezone.now() + timedelta(days=1)).isoformat(),
+            'time_allowed': 30,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['mode'], QuizSession.Mode.LIVE)
+
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.mode, self.session.closes_at, self.session.time_allowed),
+                         (QuizSession.Mode.LIVE, None, None))
+        self.assertFalse(self_paced.is_self_paced(self.session.pk))
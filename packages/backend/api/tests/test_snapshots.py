@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api import live_engine, snapshots
+from api.models import QuizSession, Participant, LeaderboardSnapshot
+
+from .helpers import create_user, create_quiz, create_session, api_client, reset_cache
+
+
+class RankingOrderTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        self.teacher = create_user('teacher', role='TEACHER')
+        students = [create_user(f'student{i}') for i in range(3)]
+        self.session = create_session(create_quiz(self.teacher), students, status=QuizSession.Status.IN_PROGRESS)
+        # Ex aequo, arrivés dans l'ordre inverse des ids
+        now = timezone.now()
+        participants = list(self.session.participants.order_by('id'))
+        for offset, participant in enumerate(reversed(participants)):
+            Participant.objects.filter(pk=participant.pk).update(score=100, joined_at=now + timedelta(seconds=offset))
+        self.expected = [p.user_id for p in participants]
+
+    def test_snapshot_breaks_ties_like_leaderboard(self):
+        user_ids, scores = snapshots.current_ranking(self.session)
+        self.assertEqual(user_ids, self.expected)
+        self.assertEqual(scores, [100, 100, 100])
+
+        response = api_client(self.teacher).get(f'/api/sessions/{self.session.pk}/leaderboard/')
+        self.assertEqual([entry['user_id'] for entry in response.data], self.expected)
+
+    def test_engine_ranking_matches_database(self):
+        engine = live_engine.LiveSessionEngine(self.session).load()
+        self.assertEqual([entry['user_id'] for entry in engine.leaderboard()], self.expected)
+
+
+class PodiumTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.students = [create_user(f'student{i}') for i in range(4)]
+        self.quiz = create_quiz(self.teacher)
+
+    def test_podium_without_snapshot_is_not_persisted(self):
+        session = create_session(self.quiz, self.students, status=QuizSession.Status.COMPLETED,
+                                 ended_at=timezone.now())
+        for score, participant in enumerate(session.participants.order_by('id')):
+            Participant.objects.filter(pk=participant.pk).update(score=score * 10)
+
+        response = api_client(self.teacher).get(f'/api/sessions/{session.pk}/podium/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([entry['score'] for entry in response.data['entries']], [30, 20, 10])
+        self.assertEqual([entry['user_id'] for entry in response.data['entries']],
+                         [s.pk for s in reversed(self.students[1:])])
+        self.assertFalse(LeaderboardSnapshot.objects.exists())
+
+    def test_podium_of_running_session_without_snapshot(self):
+        session = create_session(self.quiz, self.students, status=QuizSession.Status.IN_PROGRESS)
+        self.assertEqual(api_client(self.teacher).get(f'/api/sessions/{session.pk}/podium/').status_code, 404)
+
+    def test_auto_closed_session_keeps_its_final_ranking(self):
+        teacher = api_client(self.teacher)
+        first = teacher.post('/api/sessions/', {'quiz': self.quiz.pk}, format='json').data
+        Participant.objects.create(session_id=first['id'], user=self.students[0], score=50)
+        self.assertEqual(teacher.post('/api/sessions/', {'quiz': self.quiz.pk}, format='json').status_code, 201)
+
+        snapshot = LeaderboardSnapshot.objects.get(session_id=first['id'])
+        self.assertEqual((snapshot.user_ids, snapshot.scores), ([self.students[0].pk], [50]))
@@ -0,0 +1,70 @@
+import json
+import tempfile
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+
+from api import traffic
+from api.models import QuizSession
+
+from .helpers import create_user, create_quiz, create_session, jwt_headers, reset_cache
+
+
+START = time.time()
+
+
+def clock(offset):
+    # Le cache expire sur la même horloge que traffic
+    return mock.patch('time.time', return_value=START + offset)
+
+
+class TrafficRecordingTests(TestCase):
+
+    def setUp(self):
+        reset_cache()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        override = override_settings(TRAFFIC_RECORD_DIR=directory.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        traffic._refreshed_at = 0.0
+
+        self.teacher = create_user('teacher', role='TEACHER')
+        self.student = create_user('student')
+        quiz = create_quiz(self.teacher)
+        self.first = create_session(quiz, [self.student], status=QuizSession.Status.IN_PROGRESS)
+        self.second = create_session(quiz, [self.student], status=QuizSession.Status.IN_PROGRESS)
+
+    def test_stop_keeps_other_recordings_bounded(self):
+        with clock(0):
+            traffic.start_recording(self.first, 60)
+            traffic.start_recording(self.second, 3600)
+            traffic.stop_recording(self.second.pk)
+            self.assertEqual(traffic.recording_sessions(), frozenset({self.first.pk}))
+        # Chaque enregistrement expire à sa propre fin
+        with clock(61):
+            self.assertEqual(traffic._active(START + 61), {})
+            self.assertIsNone(traffic.cache.get(traffic.RECORDING_KEY))
+
+    def test_each_recording_keeps_its_duration(self):
+        with clock(0):
+            traffic.start_recording(self.first, 60)
+        with clock(30):
+            traffic.start_recording(self.second, 10)
+        with clock(45):
+            self.assertEqual(traffic._active(START + 45), {self.first.pk: START + 60})
+
+    async def test_async_requests_are_recorded(self):
+        await sync_to_async(traffic.start_recording)(self.first, 60)
+        traffic._refreshed_at = 0.0
+        token = jwt_headers(self.student)['HTTP_AUTHORIZATION']
+        response = await self.async_client.get(
+            f'/api/async/sessions/{self.first.pk}/', headers={'Authorization': token},
+        )
+        self.assertEqual(response.status_code, 200)
+        with open(traffic.record_path(self.first.pk), encoding='utf-8') as f:
+            events = [json.loads(line) for line in f][1:]
+        self.assertEqual([(e['route'], e['status'], e['user']) for e in events],
+                         [('/api/async/sessions/{session}/', 200, self.student.pk)])
@@ -0,0 +1,136 @@
+"""
+Throttles "seau à jetons" stockés dans le cache partagé.
+
+Un taux DRF "N/période" (DEFAULT_THROTTLE_RATES) devient un seau de N
+jetons qui se remplit de N jetons par période : on tolère une rafale de N
+requêtes, puis un débit moyen de N par période. Chaque requête coûte un
+jeton ; sans jeton, réponse 429 avec un en-tête Retry-After égal au temps
+nécessaire pour regagner un jeton.
+
+Avec Redis (RedisCache), la vérification est un script Lua exécuté
+atomiquement en un seul aller-retour. Avec un autre cache (mémoire locale
+en développement), elle est protégée par un verrou du processus.
+"""
+import math
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# Retourne {autorisé (0/1), attente en secondes}
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / refill_rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(wait)}
+"""
+
+_local_lock = threading.Lock()
+_script = None
+
+
+def parse_rate(rate):
+    """'60/min' -> (capacité 60, 1 jeton / seconde)"""
+    num, period = rate.split('/')
+    capacity = int(num)
+    duration = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+    return capacity, capacity / duration
+
+
+def take_token(key, capacity, refill_rate):
+    """Consomme un jeton du seau `key` ; retourne (autorisé, attente en secondes)"""
+    global _script
+    ttl = max(1, math.ceil(capacity / refill_rate))
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        cache_key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(cache_key, write=True)
+        if _script is None:
+            _script = client.register_script(TOKEN_BUCKET_LUA)
+        # EVALSHA (EVAL au premier appel sur un serveur) : un aller-retour
+        allowed, wait = _script(keys=[cache_key], args=[capacity, refill_rate, ttl], client=client)
+        return bool(int(allowed)), float(wait)
+
+    with _local_lock:
+        now = time.time()
+        tokens, ts = backend.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - ts) * refill_rate)
+        allowed = tokens >= 1
+        wait = 0.0
+        if allowed:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / refill_rate
+        backend.set(key, (tokens, now), ttl)
+    return allowed, wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base : définir `scope` et get_bucket_ident()"""
+    scope = None
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        self.bucket = parse_rate(rate) if rate else None
+        self.wait_seconds = None
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError
+
+    def get_user_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'u{request.user.pk}'
+        return f'ip{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if self.bucket is None:
+            return True
+        key = f'throttle:{self.scope}:{self.get_bucket_ident(request, view)}'
+        allowed, self.wait_seconds = take_token(key, *self.bucket)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SessionPollThrottle(TokenBucketThrottle):
+    """Polling de l'état et du classement : par utilisateur et par session"""
+    scope = 'session_poll'
+
+    def get_bucket_ident(self, request, view):
+        return f"{self.get_user_ident(request)}:{view.kwargs.get('pk')}"
+
+
+class AnswerSubmitThrottle(TokenBucketThrottle):
+    """Envois de réponses (et leurs retries) : par utilisateur et par session"""
+    scope = 'answer_submit'
+
+    def get_bucket_ident(self, request, view):
+        return f"{self.get_user_ident(request)}:{view.kwargs.get('pk')}"
+
+
+class SessionAnswerThrottle(TokenBucketThrottle):
+    """Budget global d'une session, tous participants confondus (protège la base pendant les rafales)"""
+    scope = 'session_answers'
+
+    def get_bucket_ident(self, request, view):
+        return str(view.kwargs.get('pk'))
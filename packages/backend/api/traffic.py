@@ -0,0 +1,214 @@
+"""
+Enregistrement du trafic réel d'une session, pour le rejouer en benchmark.
+
+`manage.py record_traffic <id>` marque la session comme enregistrée (dans
+le cache partagé, pour tous les workers) et écrit l'en-tête du fichier
+TRAFFIC_RECORD_DIR/session_<id>.jsonl : contenu du quiz, pour le recréer à
+l'identique. Ensuite, chaque requête sur la session (arrivées, réponses,
+polling, transitions, variantes async comprises) y ajoute une ligne JSON :
+
+    {"t": 1718000000.123, "user": 42, "role": "STUDENT", "method": "POST",
+     "route": "/api/sessions/{session}/answer/", "query": {}, "body": {...},
+     "status": 201, "ms": 12.4}
+
+Les workers écrivent chacun leurs lignes en mode append (une ligne par
+write). benchmarks/replay_traffic.py rejoue le fichier.
+
+Sans session enregistrée, le middleware ne fait qu'un test d'expression
+régulière sur le chemin des requêtes de session ; la liste des sessions
+enregistrées est relue dans le cache au plus toutes les 2 secondes.
+"""
+import json
+import math
+import re
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .parsers import unpackb
+from .renderers import MSGPACK_MEDIA_TYPE
+
+SESSION_PATH = re.compile(r'^/api/(?:async/)?sessions/(?:(?P<id>\d+)/|join/$)')
+SESSION_ID = re.compile(r'(?<=/sessions/)\d+(?=/)')
+# {session_id: fin de l'enregistrement (epoch)}
+RECORDING_KEY = 'traffic:recordings'
+REFRESH_SECONDS = 2.0
+
+_recording = frozenset()
+_refreshed_at = 0.0
+_write_lock = threading.Lock()
+
+
+def record_path(session_id):
+    return Path(settings.TRAFFIC_RECORD_DIR) / f'session_{int(session_id)}.jsonl'
+
+
+def quiz_snapshot(session):
+    """Contenu du quiz de la session (ids d'origine inclus, pour remapper au rejeu)"""
+    questions = session.quiz.questions.order_by('order').prefetch_related('options')
+    return [
+        {
+            'id': question.id, 'text': question.text, 'question_type': question.question_type,
+            'order': question.order, 'time_limit': question.time_limit,
+            'fuzzy_matching': question.fuzzy_matching,
+            'options': [
+                {'id': option.id, 'text': option.text, 'is_correct': option.is_correct, 'order': option.order}
+                for option in question.options.all()
+            ],
+        }
+        for question in questions
+    ]
+
+
+def start_recording(session, duration):
+    """Crée le fichier (en-tête) et active l'enregistrement pour `duration` secondes"""
+    path = record_path(session.pk)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {
+        'header': True, 'session': session.pk, 'started': time.time(),
+        'host': session.host_id, 'status': session.status,
+        'question_index': session.current_question_index,
+        'participants': list(session.participants.values_list('user_id', flat=True)),
+        'questions': quiz_snapshot(session),
+    }
+    path.write_text(json.dumps(header) + '\n', encoding='utf-8')
+    now = time.time()
+    recordings = _active(now)
+    recordings[session.pk] = now + duration
+    _store(recordings, now)
+    return path
+
+
+def stop_recording(session_id):
+    now = time.time()
+    recordings = _active(now)
+    recordings.pop(session_id, None)
+    _store(recordings, now)
+
+
+def _active(now):
+    """{session_id: fin de l'enregistrement} des enregistrements pas encore expirés"""
+    return {pk: ends for pk, ends in (cache.get(RECORDING_KEY) or {}).items() if ends > now}
+
+
+def _store(recordings, now):
+    # La clé vit jusqu'à la fin du dernier enregistrement ; chacun garde sa propre fin
+    if recordings:
+        cache.set(RECORDING_KEY, recordings, math.ceil(max(recordings.values()) - now))
+    else:
+        cache.delete(RECORDING_KEY)
+
+
+def recording_sessions():
+    """Sessions enregistrées (relu dans le cache au plus toutes les REFRESH_SECONDS)"""
+    global _recording, _refreshed_at
+    now = time.monotonic()
+    if now - _refreshed_at > REFRESH_SECONDS:
+        _recording = frozenset(_active(time.time()))
+        _refreshed_at = now
+    return _recording
+
+
+def _decode(content, content_type):
+    """Corps JSON ou MessagePack -> données (None si vide ou illisible)"""
+    if not content:
+        return None
+    try:
+        if (content_type or '').startswith(MSGPACK_MEDIA_TYPE):
+            return unpackb(content)
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+def _event(request, response, body, started, duration):
+    user = getattr(request, 'user', None)
+    authenticated = user is not None and user.is_authenticated
+    return {
+        't': round(started, 4),
+        'user': user.pk if authenticated else None,
+        'role': user.role if authenticated else None,
+        'method': request.method,
+        'route': SESSION_ID.sub('{session}', request.path, count=1),
+        'query': request.GET.dict(),
+        'body': body,
+        'status': response.status_code,
+        'ms': round(duration * 1000, 3),
+    }
+
+
+def _append(session_id, event):
+    line = json.dumps(event, ensure_ascii=False) + '\n'
+    with _write_lock, open(record_path(session_id), 'a', encoding='utf-8') as f:
+        f.write(line)
+
+
+class TrafficRecorderMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _target(self, request):
+        """(session_id ou None pour une arrivée) si la requête est à enregistrer, sinon False"""
+        match = SESSION_PATH.match(request.path)
+        if match is None:
+            return False
+        recording = recording_sessions()
+        if not recording:
+            return False
+        session_id = match.group('id')
+        if session_id is None:
+            return None
+        return int(session_id) if int(session_id) in recording else False
+
+    def _finish(self, request, response, session_id, body, started, duration):
+        if session_id is None:
+            # Arrivée : la session n'est connue qu'après coup (réponse 201)
+            data = _decode(response.content, response.get('Content-Type')) if response.status_code == 201 and not response.streaming else None
+            session_id = data.get('session_id') if isinstance(data, dict) else None
+            if session_id not in recording_sessions():
+                return
+        _append(session_id, _event(request, response, body, started, duration))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        session_id = self._target(request)
+        if session_id is False:
+            return self.get_response(request)
+        body = _decode(request.body, request.content_type)
+        started, clock = time.time(), time.perf_counter()
+        response = self.get_response(request)
+        self._finish(request, response, session_id, body, started, time.perf_counter() - clock)
+        return response
+
+    async def __acall__(self, request):
+        session_id = self._target(request)
+        if session_id is False:
+            return await self.get_response(request)
+        body = _decode(request.body, request.content_type)
+        started, clock = time.time(), time.perf_counter()
+        response = await self.get_response(request)
+        # Écriture du fichier hors de la boucle d'événements
+        await sync_to_async(self._finish)(
+            request, response, session_id, body, started, time.perf_counter() - clock
+        )
+        return response
+
+
+def read_recording(path):
+    """(en-tête, événements triés par date) d'un fichier d'enregistrement"""
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or not lines[0].get('header'):
+        raise ValueError(f"{path} : en-tête d'enregistrement manquant")
+    return lines[0], sorted(lines[1:], key=lambda event: event['t'])
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from . import views, async_views
 
 app_name = 'api'
 
@@ -15,6 +15,13 @@ router.register(r'sessions', views.QuizSessionViewSet, basename='session')
 urlpatterns = [
     # Health check
     path('health/', views.health_check, name='health'),
+    path('health/db-pool/', views.db_pool_stats, name='db_pool_stats'),
+    path('health/quiz-cache/', views.quiz_cache_stats, name='quiz_cache_stats'),
+
+    # Profilage à la demande (administrateurs, cf. api.profiling)
+    path('admin/profiling/', views.profiling_results, name='profiling_results'),
+    path('admin/profiling/token/', views.profiling_token, name='profiling_token'),
+    path('admin/profiling/<str:profile_id>/', views.profiling_result, name='profiling_result'),
 
     # Authentification JWT
     path('auth/register/', views.RegisterView.as_view(), name='register'),
@@ -22,6 +29,13 @@ urlpatterns = [
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/me/', views.CurrentUserView.as_view(), name='current_user'),
 
+    # Variantes async des endpoints chauds (à servir via core.asgi)
+    path('async/sessions/join/', async_views.join, name='async_session_join'),
+    path('async/sessions/<int:pk>/', async_views.session_state, name='async_session_state'),
+    path('async/sessions/<int:pk>/answer/', async_views.submit_answer, name='async_session_answer'),
+    path('async/sessions/<int:pk>/leaderboard/', async_views.leaderboard, name='async_session_leaderboard'),
+    path('async/sessions/<int:pk>/wait/', async_views.wait_for_change, name='async_session_wait'),
+
     # Inclusion des URLs générées par le router
     # Cela inclut désormais :
     # - /sessions/join/ (POST)
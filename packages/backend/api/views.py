@@ -1,9 +1,15 @@
+import os
+
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.db.models import Count, F, Avg
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from .models import Quiz, Question, QuizSession, Participant, Answer
@@ -11,16 +17,25 @@ from .serializers import (
     # Auth
     UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer,
     # Quiz
-    QuizListSerializer, QuizDetailSerializer, QuizCreateUpdateSerializer,
+    QuizListSerializer, QuizDetailSerializer, QuizCreateUpdateSerializer, QuizSearchResultSerializer,
     # Question
-    QuestionSerializer, QuestionCreateUpdateSerializer,
+    QuestionSerializer, QuestionCreateUpdateSerializer, QuestionReorderSerializer,
     # Session
     QuizSessionListSerializer, QuizSessionDetailSerializer, QuizSessionCreateSerializer,
     # Participant & Answer
     ParticipantJoinSerializer, ParticipantSerializer,
-    AnswerSubmitSerializer, AnswerReadSerializer, LeaderboardEntrySerializer
+    AnswerSubmitSerializer, AnswerReadSerializer, LeaderboardEntrySerializer,
+    PodiumEntrySerializer, RankChangeEntrySerializer, ParticipationHistorySerializer,
+    serialize_participants
 )
 from .permissions import IsTeacher
+from . import archive, bus, deletion, idempotency, live_engine, event_log, profiling, quiz_cache, self_paced, snapshots
+from .search import search_quizzes
+from .ordering import lock_quiz, apply_order
+from .signals import quiz_content_changed
+from .db_routing import ReplicaReadMixin
+from .pagination import PARTICIPANT_ORDERING, ParticipantCursorPagination
+from .throttling import SessionPollThrottle, AnswerSubmitThrottle, SessionAnswerThrottle
 
 # ==================== Vues Utilitaires & Auth ====================
 
@@ -29,6 +44,46 @@ from .permissions import IsTeacher
 def health_check(request):
     return Response({"status": "ok", "message": "API opérationnelle"})
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_pool_stats(request):
+    """Métriques du pool de connexions du worker qui répond (attente, taille, erreurs)"""
+    if not settings.DB_POOL:
+        return Response({"pool": False})
+    from core.db_pool.base import get_pool_stats
+    return Response({"pool": True, "pid": os.getpid(), "stats": get_pool_stats()})
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def quiz_cache_stats(request):
+    """Succès et échecs du cache des quiz sérialisés, pour le worker qui répond"""
+    return Response({"pid": os.getpid(), "tiers": settings.QUIZ_CACHE_TIERS, "stats": quiz_cache.stats()})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def profiling_token(request):
+    """Jeton signé à envoyer dans l'en-tête X-Profile (ou ?_profile=) de la requête à profiler"""
+    return Response({
+        "token": profiling.make_token(request.user),
+        "expires_in": settings.PROFILING_TOKEN_MAX_AGE,
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def profiling_results(request):
+    """Derniers profils enregistrés (résumés)"""
+    return Response(profiling.recent_results())
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def profiling_result(request, profile_id):
+    """Profil complet : fonctions les plus coûteuses et chronologie SQL"""
+    result = profiling.get_result(profile_id)
+    if result is None:
+        return Response({"detail": "Profil introuvable ou expiré."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(result)
+
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
@@ -43,28 +98,126 @@ class CurrentUserView(generics.RetrieveAPIView):
     def get_object(self):
         return self.request.user
 
+# ==================== Classement ====================
+
+def leaderboard_queryset(session):
+    """Participants de la session annotés pour le classement (calcul agrégé via la DB)"""
+    return session.participants.select_related('user').with_stats().order_by(*PARTICIPANT_ORDERING)
+
+
+def build_leaderboard(participants):
+    """Entrées du classement à partir de participants annotés par leaderboard_queryset"""
+    return [
+        {
+            'rank': index + 1,
+            'user_id': p.user.id,
+            'username': p.user.username,
+            'full_name': p.user.get_full_name(),
+            'score': p.score,
+            'answer_count': p.answer_cnt,
+            'correct_count': p.correct_cnt,
+            'accuracy': (p.correct_cnt / p.answer_cnt * 100) if p.answer_cnt > 0 else 0,
+            'average_time': (p.avg_time or 0) / 1000  # Conversion ms -> s
+        }
+        for index, p in enumerate(participants)
+    ]
+
+def history_queryset(user):
+    """
+    Participations de l'utilisateur avec statistiques et rang dans chaque
+    session, en une requête (agrégats + sous-requêtes corrélées).
+    """
+    ahead = (
+        Participant.objects.filter(session=OuterRef('session'), score__gt=OuterRef('score'))
+        .order_by().values('session').annotate(cnt=Count('id')).values('cnt')
+    )
+    total = (
+        Participant.objects.filter(session=OuterRef('session'))
+        .order_by().values('session').annotate(cnt=Count('id')).values('cnt')
+    )
+    return (
+        Participant.objects.filter(user=user)
+        .select_related('session__quiz')
+        .with_stats()
+        .annotate(
+            rank=Coalesce(Subquery(ahead), 0) + 1,
+            session_participant_count=Subquery(total)
+        )
+        .order_by('-joined_at', '-id')
+    )
+
+def publish_session_state(session):
+    """Diffuse le nouvel état de la session à tous les workers (cf. api.bus)"""
+    bus.publish(bus.SESSION, {
+        'id': session.pk,
+        'status': session.status,
+        'index': session.current_question_index,
+        'version': session.state_version,
+    })
+
+
+def session_joined(participant):
+    """Nouvelle version de la session (liste des participants), diffusée aux clients en attente"""
+    session = QuizSession(pk=participant.session_id)
+    session.bump_state_version()
+    publish_session_state(session)
+
 # ==================== ViewSets Métier ====================
 
-class QuizViewSet(viewsets.ModelViewSet):
+class QuizViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Gestion des Quiz (CRUD).
     Seuls les enseignants peuvent créer/modifier/voir leurs quiz.
     """
     permission_classes = [permissions.IsAuthenticated, IsTeacher]
+    replica_actions = ('list', 'search')
 
     def get_queryset(self):
-        return Quiz.objects.filter(created_by=self.request.user)
+        # Le document de recherche ne sert qu'en SQL
+        return Quiz.objects.filter(created_by=self.request.user).defer('search_document')
 
     def get_serializer_class(self):
         if self.action == 'list':
             return QuizListSerializer
         if self.action == 'retrieve':
             return QuizDetailSerializer
+        if self.action == 'search':
+            return QuizSearchResultSerializer
         return QuizCreateUpdateSerializer
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        # Droits vérifiés sur la ligne du quiz, payload servi par le cache (cf. api.quiz_cache)
+        quiz = self.get_object()
+        payload = quiz_cache.get_quiz_payload(quiz.pk)
+        if payload is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(payload)
+
+    def destroy(self, request, *args, **kwargs):
+        # DELETE ensemblistes plutôt que le collector de Django (cf. api.deletion)
+        quiz = self.get_object()
+        if settings.QUIZ_DELETE_IN_BACKGROUND:
+            deletion.delete_quiz_later(quiz.pk)
+            return Response(status=status.HTTP_202_ACCEPTED)
+        deletion.delete_quiz(quiz.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Recherche plein texte dans ses quiz (titre, description, questions, options).
+        URL: GET /api/quizzes/search/?q=révolution -1789
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"q": ["Ce paramètre est obligatoire."]}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(search_quizzes(self.get_queryset(), text))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'])
     def questions(self, request, pk=None):
         """Retourne toutes les questions d'un quiz spécifique"""
@@ -73,6 +226,35 @@ class QuizViewSet(viewsets.ModelViewSet):
         serializer = QuestionSerializer(questions, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'])
+    def reorder(self, request, pk=None):
+        """
+        Applique un nouvel ordre complet des questions, en une seule requête.
+        URL: POST /api/quizzes/{id}/reorder/ body: { "questions": [12, 9, 10] }
+        """
+        quiz = self.get_object()
+        serializer = QuestionReorderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['questions']
+
+        with transaction.atomic():
+            # Verrou sur le quiz : pas de création de question pendant le réordonnancement
+            lock_quiz(quiz.pk)
+            if set(ids) != set(quiz.questions.values_list('id', flat=True)):
+                return Response(
+                    {"questions": ["La liste doit contenir toutes les questions du quiz."]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if quiz.sessions.filter(status=QuizSession.Status.IN_PROGRESS).exists():
+                return Response({"error": "Une session de ce quiz est en cours."}, status=status.HTTP_400_BAD_REQUEST)
+            apply_order(quiz.questions.all(), ids)
+            # update() n'envoie pas de signaux
+            quiz_content_changed(quiz.pk)
+
+        questions = quiz.questions.order_by('order').prefetch_related('options')
+        return Response(QuestionSerializer(questions, many=True).data)
+
 
 class QuestionViewSet(viewsets.ModelViewSet):
     """
@@ -87,19 +269,24 @@ class QuestionViewSet(viewsets.ModelViewSet):
         return Question.objects.filter(quiz__created_by=self.request.user)
 
 
-class QuizSessionViewSet(viewsets.ModelViewSet):
+class QuizSessionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     Gestion complète des sessions de jeu (Cœur de l'app).
     """
     permission_classes = [permissions.IsAuthenticated]
+    # Lectures lourdes servies par le réplica (cf. db_routing)
+    replica_actions = ('list', 'leaderboard', 'history', 'participants')
 
     def get_queryset(self):
-        user = self.request.user
-        # Si prof : voit les sessions qu'il a créées (host)
-        if hasattr(user, 'role') and user.role == 'TEACHER':
-            return QuizSession.objects.filter(host=user)
-        # Si étudiant : voit les sessions où il est participant
-        return QuizSession.objects.filter(participants__user=user)
+        # Prof : sessions qu'il a créées (host) / Étudiant : sessions où il est participant
+        return QuizSession.objects.visible_to(self.request.user)
+
+    def archived_response(self, session):
+        """409 pour les lectures qui ont besoin des participants d'une session archivée (cf. api.archive)"""
+        return Response({
+            "error": f"Session archivée : l'enseignant peut la restaurer (POST /api/sessions/{session.pk}/restore/).",
+            "archived_at": session.archived_at,
+        }, status=status.HTTP_409_CONFLICT)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -108,9 +295,33 @@ class QuizSessionViewSet(viewsets.ModelViewSet):
             return QuizSessionDetailSerializer
         return QuizSessionListSerializer
 
+    def get_throttles(self):
+        # Budgets séparés : polling (détail, classement) / envoi de réponses
+        if self.action in ('retrieve', 'leaderboard', 'participants', 'rank_changes', 'podium', 'progress'):
+            return [SessionPollThrottle()]
+        if self.action == 'submit_answer':
+            return [AnswerSubmitThrottle(), SessionAnswerThrottle()]
+        return super().get_throttles()
+
+    def initial(self, request, *args, **kwargs):
+        # Renvoi idempotent connu : servi avant l'authentification (chargement
+        # de l'utilisateur) et les throttles, sans consommer de jeton
+        self.idempotent_replay = None
+        if self.action == 'submit_answer':
+            self.idempotent_replay = idempotency.lookup(request, kwargs.get('pk'))
+        if self.idempotent_replay is None:
+            return super().initial(request, *args, **kwargs)
+        # Utilisateur lu dans le JWT par lookup() ; l'envoi d'origine a déjà épinglé le primaire
+        request.user = AnonymousUser()
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
 
+    def perform_destroy(self, instance):
+        deletion.delete_sessions([instance.pk])
+
     # --- Actions Enseignant (Gestion du flux) ---
 
     @action(detail=True, methods=['post'], permission_classes=[IsTeacher])
@@ -122,15 +333,26 @@ class QuizSessionViewSet(viewsets.ModelViewSet):
         
         session.status = QuizSession.Status.IN_PROGRESS
         session.started_at = timezone.now()
-        session.save()
+        # update_fields : ne pas réécrire state_version (incrémentée en parallèle par les arrivées)
+        session.save(update_fields=['status', 'started_at'])
+        session.bump_state_version()
+        event_log.record_transition(session)
+        publish_session_state(session)
         return Response(QuizSessionDetailSerializer(session).data)
 
     @action(detail=True, methods=['post'], url_path='next-question', permission_classes=[IsTeacher])
     def next_question(self, request, pk=None):
         """Passer à la question suivante"""
         session = self.get_object()
+        if session.is_self_paced:
+            return Response({"error": "En autonomie, chaque participant avance à son rythme."}, status=400)
+        # Classement de la question qui se termine (écarts de rang, cf. api.snapshots)
+        snapshots.take_snapshot(session)
         session.current_question_index += 1
-        session.save()
+        session.save(update_fields=['current_question_index'])
+        session.bump_state_version()
+        event_log.record_transition(session)
+        publish_session_state(session)
         return Response({"status": "ok", "current_index": session.current_question_index})
 
     @action(detail=True, methods=['post'], permission_classes=[IsTeacher])
@@ -139,11 +361,31 @@ class QuizSessionViewSet(viewsets.ModelViewSet):
         session = self.get_object()
         session.status = QuizSession.Status.COMPLETED
         session.ended_at = timezone.now()
-        session.save()
+        session.save(update_fields=['status', 'ended_at'])
+        session.bump_state_version()
+        event_log.record_transition(session)
+        # Écritures différées persistées avant de répondre ; les autres
+        # workers ferment moteur et journal à la réception de l'événement
+        live_engine.close_engine(session.pk)
+        event_log.close_log(session.pk)
+        # Classement final (podium)
+        snapshots.take_snapshot(session)
+        publish_session_state(session)
         return Response(QuizSessionDetailSerializer(session).data)
 
     # --- Actions Étudiant & Publiques ---
 
+    @action(detail=True, methods=['post'], permission_classes=[IsTeacher])
+    def restore(self, request, pk=None):
+        """
+        Réinsère participants et réponses d'une session archivée (cf. api.archive).
+        URL: POST /api/sessions/{id}/restore/
+        """
+        session = self.get_object()
+        if not archive.restore_session(session):
+            return Response({"error": "Cette session n'est pas archivée."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(QuizSessionDetailSerializer(session).data)
+
     @action(detail=False, methods=['post'])
     def join(self, request):
         """
@@ -153,19 +395,61 @@ class QuizSessionViewSet(viewsets.ModelViewSet):
         serializer = ParticipantJoinSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             participant = serializer.save()
+            event_log.record_join(participant)
+            session_joined(participant)
             return Response({
                 "message": "Session rejointe avec succès",
-                "session_id": participant.session.id,
+                "session_id": participant.session_id,
                 "participant_id": participant.id
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """
+        Historique des sessions rejointes par l'utilisateur connecté
+        (score, précision, temps moyen, rang), paginé.
+        URL: GET /api/sessions/history/
+        """
+        page = self.paginate_queryset(history_queryset(request.user))
+        serializer = ParticipationHistorySerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'], url_path='answer')
     def submit_answer(self, request, pk=None):
         """
         Soumettre une réponse à la question courante.
         URL: POST /api/sessions/{id}/answer/
+        Un renvoi avec le même en-tête Idempotency-Key reçoit la réponse
+        d'origine (cf. idempotency).
         """
+        if self.idempotent_replay is not None:
+            status_code, data = self.idempotent_replay
+            return Response(data, status=status_code)
+        token, replay = idempotency.begin(request, pk)
+        if replay is not None:
+            status_code, data = replay
+            return Response(data, status=status_code)
+        try:
+            response = self._submit_answer(request, pk)
+        except BaseException:
+            idempotency.abandon(token)
+            raise
+        idempotency.finish(token, response.status_code, response.data)
+        return response
+
+    def _submit_answer(self, request, pk):
+        # Session en autonomie : question courante propre au participant (cf. self_paced)
+        if self_paced.is_self_paced(pk):
+            status_code, data = self_paced.submit(pk, request.user, request.data)
+            return Response(data, status=status_code)
+
+        # Session chargée en mémoire : correction sans requête (cf. live_engine)
+        engine = live_engine.get_engine(pk)
+        if engine is not None:
+            status_code, data = engine.submit(request.user.pk, request.data)
+            return Response(data, status=status_code)
+
         session = self.get_object()
         
         # Récupérer le participant lié à l'utilisateur connecté
@@ -194,29 +478,95 @@ class QuizSessionViewSet(viewsets.ModelViewSet):
         Obtenir le classement actuel de la session.
         URL: GET /api/sessions/{id}/leaderboard/
         """
+        engine = live_engine.get_engine(pk, create=False)
+        if engine is not None and engine.can_view(request.user):
+            return Response(LeaderboardEntrySerializer(engine.leaderboard(), many=True).data)
+
         session = self.get_object()
-        
-        # Calcul agrégé performant via la DB
-        participants = session.participants.all().annotate(
-            answer_cnt=Count('answers'),
-            correct_cnt=Count('answers', filter=F('answers__is_correct')==True),
-            avg_time=Avg('answers__response_time')
-        ).order_by('-score')
-
-        leaderboard_data = []
-        for index, p in enumerate(participants):
-            leaderboard_data.append({
-                'rank': index + 1,
-                'user_id': p.user.id,
-                'username': p.user.username,
-                'full_name': p.user.get_full_name(),
-                'score': p.score,
-                'answer_count': p.answer_cnt,
-                'correct_count': p.correct_cnt,
-                'accuracy': (p.correct_cnt / p.answer_cnt * 100) if p.answer_cnt > 0 else 0,
-                'average_time': (p.avg_time or 0) / 1000  # Conversion ms -> s
-            })
-            
-        return Response(LeaderboardEntrySerializer(leaderboard_data, many=True).data)
+        if session.archived_at is not None:
+            return self.archived_response(session)
+        entries = build_leaderboard(leaderboard_queryset(session))
+        return Response(LeaderboardEntrySerializer(entries, many=True).data)
+
+    @action(detail=True, methods=['get'], pagination_class=ParticipantCursorPagination)
+    def participants(self, request, pk=None):
+        """
+        Participants de la session par ordre de classement, paginés par curseur.
+        URL: GET /api/sessions/{id}/participants/?answered=true|false&cursor=...&page_size=50
+        answered : a répondu (ou non) à la question courante.
+        """
+        session = self.get_object()
+        if session.archived_at is not None:
+            return self.archived_response(session)
+        question = None if session.is_self_paced else session.get_current_question()
+        participants = session.participants.all()
+
+        answered = request.query_params.get('answered')
+        if answered is not None:
+            if answered not in ('true', 'false'):
+                return Response({"answered": ["Valeur attendue : true ou false."]}, status=status.HTTP_400_BAD_REQUEST)
+            if session.is_self_paced:
+                return Response({"error": "Pas de question commune en autonomie."}, status=status.HTTP_400_BAD_REQUEST)
+            # Exists sur la contrainte unique (participant, question)
+            answers = Answer.objects.filter(participant=OuterRef('pk'), question=question)
+            participants = participants.filter(Exists(answers)) if answered == 'true' else participants.exclude(Exists(answers))
+
+        ids = self.paginate_queryset(participants)
+        return self.get_paginated_response(serialize_participants(ids, question))
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """
+        Session en autonomie : progression du participant (question courante,
+        score, date limite) ou, pour l'enseignant, avancement de la classe.
+        URL: GET /api/sessions/{id}/progress/
+        """
+        if not request.user.is_teacher():
+            if not self_paced.is_self_paced(pk):
+                return Response({"error": "Cette session n'est pas en autonomie."}, status=status.HTTP_400_BAD_REQUEST)
+            # Une requête : la ligne du participant (404 s'il n'en est pas un)
+            state = self_paced.progress(pk, request.user)
+            if state is None:
+                return Response({"detail": "Pas trouvé."}, status=status.HTTP_404_NOT_FOUND)
+            return Response(state)
+
+        session = self.get_object()
+        if not session.is_self_paced:
+            return Response({"error": "Cette session n'est pas en autonomie."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self_paced.overview(session))
+
+    @action(detail=True, methods=['get'], url_path='rank-changes')
+    def rank_changes(self, request, pk=None):
+        """
+        Écarts de rang entre deux classements enregistrés (par défaut les deux derniers).
+        URL: GET /api/sessions/{id}/rank-changes/?from=0&to=1 (index des questions)
+        """
+        bounds = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if value is not None:
+                if not value.isdigit():
+                    return Response({param: ["Un index de question est requis."]}, status=status.HTTP_400_BAD_REQUEST)
+                bounds[param] = int(value)
+
+        session = self.get_object()
+        changes = snapshots.rank_changes(session, bounds.get('from'), bounds.get('to'))
+        if changes is None:
+            return Response({"error": "Aucun classement enregistré pour ces questions."}, status=status.HTTP_404_NOT_FOUND)
+        changes['entries'] = RankChangeEntrySerializer(changes['entries'], many=True).data
+        return Response(changes)
+
+    @action(detail=True, methods=['get'])
+    def podium(self, request, pk=None):
+        """
+        Podium lu dans le dernier classement enregistré.
+        URL: GET /api/sessions/{id}/podium/
+        """
+        session = self.get_object()
+        result = snapshots.podium(session)
+        if result is None:
+            return Response({"error": "Aucun classement enregistré pour cette session."}, status=status.HTTP_404_NOT_FOUND)
+        result['entries'] = PodiumEntrySerializer(result['entries'], many=True).data
+        return Response(result)
 
 # Fonction obsolète (submit_answer) supprimée car intégrée dans le ViewSet ci-dessus
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Requêtes async en attente d'un changement de session (long-poll).
+
+Chaque requête en attente est un Future de sa boucle asyncio, enregistré
+par session : aucune ne mobilise de thread. Les événements SESSION du bus
+(api.bus, depuis n'importe quel worker) réveillent les Futures de la
+session via call_soon_threadsafe, le bus livrant depuis d'autres threads.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+
+_waiters = {}
+_lock = threading.Lock()
+
+
+class Waiter:
+    __slots__ = ('loop', 'future')
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+    async def wait(self, timeout):
+        """True si la session a changé avant `timeout` secondes"""
+        try:
+            await asyncio.wait_for(asyncio.shield(self.future), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.future = self.loop.create_future()
+        return True
+
+
+@contextmanager
+def watch(session_id):
+    """
+    À ouvrir avant de lire l'état de la session : un changement survenu
+    entre la lecture et l'attente réveille quand même le Waiter.
+    """
+    waiter = Waiter(asyncio.get_running_loop())
+    with _lock:
+        _waiters.setdefault(session_id, set()).add(waiter)
+    try:
+        yield waiter
+    finally:
+        with _lock:
+            waiters = _waiters.get(session_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del _waiters[session_id]
+
+
+def notify(session_id):
+    with _lock:
+        waiters = list(_waiters.get(session_id, ()))
+    for waiter in waiters:
+        waiter.wake()
+
+
+def waiting_count():
+    with _lock:
+        return sum(len(waiters) for waiters in _waiters.values())
@@ -0,0 +1,46 @@
+"""
+Préchauffage d'un processus avant qu'il serve ses premières requêtes.
+
+Importe les URLs (et donc vues, sérialiseurs, throttles) et charge les
+decks des quiz joués par les sessions ouvertes ou en cours. Appelé par
+gunicorn.conf.py : une fois dans le master avant le fork avec
+GUNICORN_PRELOAD (les workers héritent des decks), sinon dans chaque
+worker avant sa première requête.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+from .decks import get_deck
+from .models import QuizSession
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Retourne {'decks': n, 'ms': durée}"""
+    started = time.perf_counter()
+    get_resolver().url_patterns
+
+    quiz_ids = (
+        QuizSession.objects
+        .filter(status__in=[QuizSession.Status.WAITING, QuizSession.Status.IN_PROGRESS])
+        .values_list('quiz_id', flat=True).distinct()
+    )
+    decks = 0
+    for quiz_id in quiz_ids:
+        get_deck(quiz_id)
+        decks += 1
+
+    # Aucune connexion (ni pool) ne doit survivre au fork
+    connections.close_all()
+    if settings.DB_POOL:
+        from core.db_pool.base import close_pools
+        close_pools()
+
+    stats = {'decks': decks, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+    logger.info("Préchauffage : %(decks)d deck(s) en %(ms)s ms", stats)
+    return stats
@@ -0,0 +1,104 @@
+"""
+Outils partagés par les scripts de benchmark.
+
+Les scripts tournent contre une base de test créée pour l'occasion (comme
+`manage.py test`) à partir des réglages de core.settings : lancer depuis
+packages/backend, par exemple `python -m benchmarks.submit_answer_latency`.
+"""
+import os
+import statistics
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['*']
+
+
+class TestDatabase:
+    """Crée la base de test à l'entrée et la détruit à la sortie."""
+
+    def __enter__(self):
+        from django.test.utils import setup_test_environment
+        from django.test.runner import DiscoverRunner
+        setup_test_environment()
+        self.runner = DiscoverRunner(verbosity=0, interactive=False)
+        self.old_config = self.runner.setup_databases()
+        return self
+
+    def __exit__(self, *exc):
+        from django.db import connections
+        connections.close_all()
+        self.runner.teardown_databases(self.old_config)
+
+
+def seed_live_session(participants, options=4, questions=1):
+    """Un quiz, une session IN_PROGRESS et `participants` étudiants inscrits."""
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    from api.models import User, Quiz, Question, QuestionOption, QuizSession, Participant
+
+    password = make_password('benchmark')
+    teacher = User.objects.create(
+        username='bench-teacher', email='bench-teacher@example.test',
+        password=password, role=User.Role.TEACHER,
+    )
+    quiz = Quiz.objects.create(title='Benchmark', created_by=teacher)
+    for index in range(questions):
+        question = Question.objects.create(quiz=quiz, text=f'Question {index}', order=index + 1)
+        QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, text=f'Option {i}', is_correct=(i == 0), order=i)
+            for i in range(options)
+        ])
+    session = QuizSession.objects.create(
+        quiz=quiz, host=teacher,
+        status=QuizSession.Status.IN_PROGRESS, started_at=timezone.now(),
+    )
+    students = User.objects.bulk_create([
+        User(username=f'bench-{i}', email=f'bench-{i}@example.test',
+             first_name='Élève', last_name=str(i), password=password)
+        for i in range(participants)
+    ])
+    Participant.objects.bulk_create([Participant(session=session, user=s) for s in students])
+    return teacher, session, students
+
+
+def summarize(latencies_ms):
+    """Résumé (ms) d'une liste de latences."""
+    ordered = sorted(latencies_ms)
+    if not ordered:
+        return {}
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered),
+        'p50': pct(0.50),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+        'max': ordered[-1],
+    }
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(c)), *(len(_fmt(r.get(c))) for r in rows)) for c in columns]
+    print('  '.join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(_fmt(row.get(c)).ljust(w) for c, w in zip(columns, widths)))
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f'{value:.2f}'
+    return '' if value is None else str(value)
@@ -0,0 +1,107 @@
+"""
+Rafale de réponses : endpoint DRF synchrone vs variante async.
+
+Lancer le serveur à mesurer, puis depuis packages/backend :
+
+    gunicorn -c gunicorn.conf.py core.asgi:application -k uvicorn.workers.UvicornWorker -w 1
+    python -m benchmarks.async_vs_sync --base-url http://localhost:8000 --participants 2000
+
+Le script crée dans la base configurée (core.settings) un quiz et deux
+sessions IN_PROGRESS avec `--participants` étudiants, signe leurs JWT
+localement, puis envoie toutes les réponses en même temps : d'abord sur
+/api/sessions/{id}/answer/, ensuite sur /api/async/sessions/{id}/answer/.
+Les données créées sont supprimées à la fin. `--sync-base-url` permet de
+viser un serveur WSGI distinct pour le chemin synchrone.
+"""
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmarks._common import setup_django, seed_live_session, summarize, print_table
+
+
+async def post_json(base_url, path, token, payload, semaphore):
+    """POST HTTP/1.1 minimal (une connexion par requête), retourne (statut, ms)"""
+    url = urlsplit(base_url)
+    body = json.dumps(payload).encode()
+    request = (
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: {url.netloc}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+    async with semaphore:
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        writer.close()
+        elapsed = (time.perf_counter() - started) * 1000
+    return int(status_line.split()[1]), elapsed
+
+
+async def burst(base_url, path, tokens, option_id, max_in_flight):
+    semaphore = asyncio.Semaphore(max_in_flight)
+    payload = {'selected_option': option_id, 'response_time': 1200}
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        post_json(base_url, path, token, payload, semaphore) for token in tokens
+    ), return_exceptions=True)
+    wall = time.perf_counter() - started
+
+    latencies = [r[1] for r in results if not isinstance(r, Exception) and r[0] == 201]
+    row = summarize(latencies)
+    row['errors'] = len(results) - len(latencies)
+    row['throughput'] = len(latencies) / wall
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--sync-base-url', help="Serveur du chemin synchrone (défaut : --base-url)")
+    parser.add_argument('--participants', type=int, default=1000)
+    parser.add_argument('--max-in-flight', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework_simplejwt.tokens import AccessToken
+    from api.models import QuizSession, Participant, User
+
+    teacher, sync_session, students = seed_live_session(args.participants)
+    async_session = QuizSession.objects.create(
+        quiz=sync_session.quiz, host=teacher,
+        status=QuizSession.Status.IN_PROGRESS, started_at=sync_session.started_at,
+    )
+    Participant.objects.bulk_create([Participant(session=async_session, user=s) for s in students])
+    tokens = [str(AccessToken.for_user(s)) for s in students]
+    option_id = sync_session.quiz.questions.get().options.get(is_correct=True).id
+
+    try:
+        rows = [
+            {'path': 'sync', **asyncio.run(burst(
+                args.sync_base_url or args.base_url, f'/api/sessions/{sync_session.id}/answer/',
+                tokens, option_id, args.max_in_flight,
+            ))},
+            {'path': 'async', **asyncio.run(burst(
+                args.base_url, f'/api/async/sessions/{async_session.id}/answer/',
+                tokens, option_id, args.max_in_flight,
+            ))},
+        ]
+    finally:
+        sync_session.quiz.delete()
+        User.objects.filter(pk__in=[teacher.pk, *(s.pk for s in students)]).delete()
+
+    print(f"{args.participants} réponses simultanées (max {args.max_in_flight} en vol), latences en ms")
+    print_table(rows, ['path', 'count', 'errors', 'mean', 'p50', 'p95', 'p99', 'max', 'throughput'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+JSON ou MessagePack pour les réponses volumineuses (classement d'une grosse session).
+
+    python -m benchmarks.msgpack_vs_json --participants 1000 --rounds 50
+
+Pour chaque format : taille de la réponse du classement, temps CPU de
+rendu côté serveur et de décodage côté client (time.process_time, par
+réponse), plus la latence de bout en bout via APIClient.
+"""
+import argparse
+import json
+import time
+
+from benchmarks._common import setup_django, TestDatabase, seed_live_session, summarize, print_table
+
+
+def cpu_ms(func, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - started) * 1000 / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    with TestDatabase():
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIClient
+        from api.models import Participant
+        from api.parsers import unpackb
+        from api.renderers import MessagePackRenderer, MSGPACK_MEDIA_TYPE
+
+        teacher, session, _ = seed_live_session(args.participants)
+        Participant.objects.filter(session=session).update(score=42)
+        client = APIClient()
+        client.force_authenticate(teacher)
+        url = f'/api/sessions/{session.id}/leaderboard/'
+        data = client.get(url).json()
+
+        formats = {
+            'json': ('application/json', JSONRenderer(), json.loads),
+            'msgpack': (MSGPACK_MEDIA_TYPE, MessagePackRenderer(), unpackb),
+        }
+        rows = []
+        for name, (media_type, renderer, decode) in formats.items():
+            body = renderer.render(data)
+            assert decode(body) == data
+
+            latencies = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                response = client.get(url, HTTP_ACCEPT=media_type)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response['Content-Type'].startswith(media_type), response['Content-Type']
+
+            rows.append({
+                'format': name,
+                'bytes': len(body),
+                'render_ms': cpu_ms(lambda: renderer.render(data), args.rounds),
+                'parse_ms': cpu_ms(lambda: decode(body), args.rounds),
+                'p50_ms': summarize(latencies)['p50'],
+                'p95_ms': summarize(latencies)['p95'],
+            })
+
+    print(f"leaderboard : {args.participants} participants, {args.rounds} requêtes par format")
+    print_table(rows, ['format', 'bytes', 'render_ms', 'parse_ms', 'p50_ms', 'p95_ms'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Ruée sur un quiz absent du cache : sans cache contre single-flight.
+
+    python -m benchmarks.quiz_cache_stampede --callers 300 --questions 20
+
+`--callers` threads demandent en même temps le payload du même quiz
+(api.quiz_cache.get_quiz_payload), cache vide, pour chaque configuration
+de QUIZ_CACHE_TIERS : '' (chaque appel sérialise le quiz), 'shared',
+'local,shared'. Puis une seconde vague, cache chaud.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks._common import setup_django, TestDatabase, summarize, print_table
+
+
+def seed_quiz(questions, options):
+    from api.models import User, Quiz, Question, QuestionOption
+
+    teacher = User.objects.create(
+        username='bench-teacher', email='bench-teacher@example.test', role=User.Role.TEACHER,
+    )
+    quiz = Quiz.objects.create(title='Benchmark', created_by=teacher)
+    question_objs = Question.objects.bulk_create([
+        Question(quiz=quiz, text=f'Question {i}', order=i + 1) for i in range(questions)
+    ])
+    QuestionOption.objects.bulk_create([
+        QuestionOption(question=q, text=f'Option {i}', is_correct=(i == 0), order=i)
+        for q in question_objs for i in range(options)
+    ])
+    return quiz
+
+
+def wave(quiz_id, callers):
+    """Appels simultanés ; retourne les latences (ms) et la durée totale (s)"""
+    from django.db import connections
+    from api import quiz_cache
+
+    barrier = threading.Barrier(callers)
+    latencies = []
+    lock = threading.Lock()
+
+    def call():
+        barrier.wait()
+        started = time.perf_counter()
+        quiz_cache.get_quiz_payload(quiz_id)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+        connections.close_all()
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--callers', type=int, default=300)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--options', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import caches
+    from api import quiz_cache
+
+    rows = []
+    with TestDatabase():
+        quiz = seed_quiz(args.questions, args.options)
+        for tiers in ('', 'shared', 'local,shared'):
+            settings.QUIZ_CACHE_TIERS = tiers
+            caches[settings.QUIZ_CACHE_ALIAS].clear()
+            quiz_cache.invalidate_all_local()
+            for label in ('froid', 'chaud'):
+                before = quiz_cache.stats()
+                latencies, wall = wave(quiz.pk, args.callers)
+                after = quiz_cache.stats()
+                rows.append({
+                    'tiers': tiers or '(aucun)', 'cache': label,
+                    'computations': after['computations'] - before['computations'] if tiers else args.callers,
+                    'wall_ms': wall * 1000, **summarize(latencies),
+                })
+
+    print(f"{args.callers} appels simultanés, quiz de {args.questions} questions, latences en ms")
+    print_table(rows, ['tiers', 'cache', 'computations', 'wall_ms', 'p50', 'p95', 'max'])
+
+
+if __name__ == '__main__':
+    main()
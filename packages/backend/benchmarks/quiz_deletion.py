@@ -0,0 +1,90 @@
+"""
+Suppression d'un gros quiz : collector de Django contre DELETE ensemblistes.
+
+    python -m benchmarks.quiz_deletion --sessions 100 --participants 300 --questions 5
+
+Le même quiz (N sessions terminées de P participants ayant répondu à
+chaque question) est créé deux fois, puis supprimé :
+  - collector : Quiz.delete() (ce que faisait QuizViewSet.destroy)
+  - set-based : api.deletion.delete_quiz()
+"""
+import argparse
+import time
+
+from benchmarks._common import setup_django, TestDatabase, print_table
+
+
+def seed_quiz(tag, sessions, participants, questions):
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    from api.models import User, Quiz, Question, QuestionOption, QuizSession, Participant, Answer
+
+    password = make_password('benchmark')
+    teacher = User.objects.create(
+        username=f'bench-teacher-{tag}', email=f'bench-teacher-{tag}@example.test',
+        password=password, role=User.Role.TEACHER,
+    )
+    quiz = Quiz.objects.create(title=f'Benchmark {tag}', created_by=teacher)
+    question_objs = Question.objects.bulk_create([
+        Question(quiz=quiz, text=f'Question {i}', order=i + 1) for i in range(questions)
+    ])
+    options = QuestionOption.objects.bulk_create([
+        QuestionOption(question=q, text=f'Option {i}', is_correct=(i == 0), order=i)
+        for q in question_objs for i in range(4)
+    ])
+    option_by_question = {o.question_id: o for o in options if o.is_correct}
+    students = User.objects.bulk_create([
+        User(username=f'bench-{tag}-{i}', email=f'bench-{tag}-{i}@example.test', password=password)
+        for i in range(participants)
+    ])
+
+    now = timezone.now()
+    for index in range(sessions):
+        session = QuizSession.objects.create(
+            quiz=quiz, host=teacher, status=QuizSession.Status.COMPLETED, started_at=now, ended_at=now,
+        )
+        players = Participant.objects.bulk_create([Participant(session=session, user=s) for s in students])
+        Answer.objects.bulk_create([
+            Answer(participant=p, question=q, selected_option=option_by_question[q.id],
+                   is_correct=True, response_time=1000)
+            for p in players for q in question_objs
+        ], batch_size=5000)
+    return quiz.pk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--participants', type=int, default=300)
+    parser.add_argument('--questions', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    with TestDatabase():
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from api import deletion
+        from api.models import Quiz, Answer
+
+        methods = {
+            'collector': lambda quiz_id: Quiz.objects.get(pk=quiz_id).delete(),
+            'set-based': deletion.delete_quiz,
+        }
+        rows = []
+        for name, delete in methods.items():
+            quiz_id = seed_quiz(name, args.sessions, args.participants, args.questions)
+            answers = Answer.objects.filter(question__quiz_id=quiz_id).count()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                delete(quiz_id)
+                elapsed = (time.perf_counter() - started) * 1000
+            assert not Answer.objects.filter(question__quiz_id=quiz_id).exists()
+            rows.append({'method': name, 'answers': answers, 'queries': len(queries), 'ms': elapsed})
+
+    print(f"suppression d'un quiz : {args.sessions} sessions x {args.participants} participants, "
+          f"{args.questions} questions")
+    print_table(rows, ['method', 'answers', 'queries', 'ms'])
+
+
+if __name__ == '__main__':
+    main()
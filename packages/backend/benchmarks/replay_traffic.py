@@ -0,0 +1,279 @@
+"""
+Rejeu d'une session enregistrée (manage.py record_traffic, cf. api.traffic).
+
+    python -m benchmarks.replay_traffic var/traffic/session_42.jsonl --speed 1 10 100 --workers 32
+
+Pour chaque vitesse, le quiz, les utilisateurs et la session de
+l'enregistrement sont recréés (ids des questions, des options et de la
+session remappés, nouveau code d'accès), puis chaque requête est envoyée
+à (t - t0) / vitesse par un pool de `--workers` threads. Le rapport donne
+la distribution des latences par type de requête (arrivée, réponse,
+polling, transition), le retard pris par l'ordonnanceur et le nombre de
+statuts HTTP différents de ceux enregistrés.
+
+Par défaut, les requêtes passent en processus par toute la pile Django
+(middlewares compris) sur une base de test, et les limites de débit sont
+multipliées par la vitesse pour throttler comme pendant l'enregistrement.
+Avec --base-url, elles partent en HTTP vers le serveur indiqué ; les
+données sont alors créées dans la base configurée puis supprimées.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks._common import setup_django, TestDatabase, summarize, print_table
+
+
+def kind(event):
+    route = event['route']
+    if route.endswith('/join/'):
+        return 'join'
+    if route.endswith('/answer/'):
+        return 'answer'
+    return 'poll' if event['method'] == 'GET' else 'transition'
+
+
+def _group(events, value):
+    groups = defaultdict(list)
+    for event in events:
+        groups[kind(event)].append(value(event))
+    return groups
+
+
+def seed_from_header(header, events, tag):
+    """Recrée le quiz et la session enregistrés ; retourne (session, users, options)"""
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    from api.models import User, Quiz, Question, QuestionOption, QuizSession, Participant
+
+    roles = {event['user']: event['role'] for event in events if event['user'] is not None}
+    roles.setdefault(header['host'], User.Role.TEACHER)
+    for user_id in header['participants']:
+        roles.setdefault(user_id, User.Role.STUDENT)
+
+    password = make_password('benchmark')
+    users = dict(zip(roles, User.objects.bulk_create([
+        User(username=f'replay-{tag}-{user_id}', email=f'replay-{tag}-{user_id}@example.test',
+             password=password, role=role)
+        for user_id, role in roles.items()
+    ])))
+    host = users[header['host']]
+
+    quiz = Quiz.objects.create(title=f'Rejeu {tag}', created_by=host)
+    options = {}
+    for data in header['questions']:
+        question = Question.objects.create(
+            quiz=quiz, text=data['text'], question_type=data['question_type'], order=data['order'],
+            time_limit=data['time_limit'], fuzzy_matching=data['fuzzy_matching'],
+        )
+        created = QuestionOption.objects.bulk_create([
+            QuestionOption(question=question, text=o['text'], is_correct=o['is_correct'], order=o['order'])
+            for o in data['options']
+        ])
+        options.update({o['id']: new.id for o, new in zip(data['options'], created)})
+
+    session = QuizSession.objects.create(
+        quiz=quiz, host=host, status=header['status'],
+        current_question_index=header['question_index'],
+        started_at=timezone.now() if header['status'] != QuizSession.Status.WAITING else None,
+    )
+    Participant.objects.bulk_create([
+        Participant(session=session, user=users[user_id]) for user_id in header['participants']
+    ])
+    return session, users, options
+
+
+def remap(event, session, options):
+    """(chemin, corps) de la requête enregistrée, avec les ids de la session recréée"""
+    path = event['route'].replace('{session}', str(session.pk))
+    if event['query']:
+        path = f"{path}?{urlencode(event['query'])}"
+    body = event['body']
+    if isinstance(body, dict):
+        body = dict(body)
+        if 'access_code' in body:
+            body['access_code'] = session.access_code
+        if body.get('selected_option') in options:
+            body['selected_option'] = options[body['selected_option']]
+    return path, body
+
+
+class InProcessSender:
+    """Requêtes via django.test.Client (un client par thread)"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, method, path, body, token):
+        from django.test import Client
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        data = json.dumps(body) if body is not None else ''
+        return client.generic(method, path, data, content_type='application/json', **headers).status_code
+
+    def close(self):
+        from django.db import connections
+        connections.close_all()
+
+
+class HTTPSender:
+    """Requêtes HTTP/1.1 (une connexion persistante par thread)"""
+
+    def __init__(self, base_url):
+        self.url = urlsplit(base_url)
+        self.local = threading.local()
+
+    def __call__(self, method, path, body, token):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = http.client.HTTPConnection(
+                self.url.hostname, self.url.port or 80, timeout=60,
+            )
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        try:
+            connection.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+        return response.status
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+
+
+def scale_throttles(speed):
+    """Multiplie les limites de débit DRF par la vitesse de rejeu (en place)"""
+    from django.conf import settings
+    rates = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+    originals = dict(rates)
+    for scope, rate in originals.items():
+        if rate:
+            count, period = rate.split('/')
+            rates[scope] = f'{max(1, int(int(count) * speed))}/{period}'
+    return originals
+
+
+def replay(header, events, speed, workers, sender, tag):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    session, users, options = seed_from_header(header, events, tag)
+    tokens = {user_id: str(AccessToken.for_user(user)) for user_id, user in users.items()}
+    latencies = defaultdict(list)
+    lags = []
+    mismatches = errors = 0
+    lock = threading.Lock()
+
+    def send(event, due):
+        nonlocal mismatches, errors
+        started = time.perf_counter()
+        path, body = remap(event, session, options)
+        try:
+            status = sender(event['method'], path, body, tokens.get(event['user']))
+        except Exception:
+            status = None
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            lags.append((started - due) * 1000)
+            if status is None:
+                errors += 1
+                return
+            latencies[kind(event)].append(elapsed)
+            mismatches += status != event['status']
+
+    t0 = events[0]['t'] if events else 0
+    barrier = threading.Barrier(workers)
+
+    def close_worker():
+        barrier.wait()
+        sender.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for event in events:
+            due = started + (event['t'] - t0) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, event, due)
+        for _ in range(workers):
+            pool.submit(close_worker)
+    wall = time.perf_counter() - started
+
+    rows = [{'speed': f'{speed:g}x', 'kind': k, **summarize(v)} for k, v in sorted(latencies.items())]
+    totals = {
+        'speed': f'{speed:g}x', 'wall_s': wall, 'requests': len(events),
+        'lag_p95': summarize(lags).get('p95'), 'lag_max': summarize(lags).get('max'),
+        'status_mismatch': mismatches, 'errors': errors,
+    }
+    return rows, totals, session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help="Fichier session_<id>.jsonl")
+    parser.add_argument('--speed', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--base-url', help="Serveur à viser en HTTP (défaut : en processus, base de test)")
+    args = parser.parse_args()
+
+    setup_django()
+    from api.traffic import read_recording
+    from api.deletion import delete_quiz
+    from api.models import User
+
+    header, events = read_recording(args.recording)
+    recorded = [
+        {'kind': k, **summarize(v)}
+        for k, v in sorted(_group(events, lambda e: e['ms']).items())
+    ]
+    duration = events[-1]['t'] - events[0]['t'] if events else 0
+    print(f"{args.recording} : {len(events)} requêtes sur {duration:.1f} s, latences enregistrées (ms)")
+    print_table(recorded, ['kind', 'count', 'mean', 'p50', 'p95', 'p99', 'max'])
+
+    rows, totals = [], []
+    if args.base_url:
+        for index, speed in enumerate(args.speed):
+            tag = f'{int(time.time())}-{index}'
+            result_rows, result_totals, session = replay(
+                header, events, speed, args.workers, HTTPSender(args.base_url), tag,
+            )
+            rows += result_rows
+            totals.append(result_totals)
+            delete_quiz(session.quiz_id)
+            User.objects.filter(username__startswith=f'replay-{tag}-').delete()
+    else:
+        from django.conf import settings
+        with TestDatabase():
+            for index, speed in enumerate(args.speed):
+                originals = scale_throttles(speed)
+                try:
+                    result_rows, result_totals, _ = replay(
+                        header, events, speed, args.workers, InProcessSender(), str(index),
+                    )
+                finally:
+                    settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].update(originals)
+                rows += result_rows
+                totals.append(result_totals)
+
+    print(f"\nRejeu ({args.workers} workers), latences en ms")
+    print_table(rows, ['speed', 'kind', 'count', 'mean', 'p50', 'p95', 'p99', 'max'])
+    print()
+    print_table(totals, ['speed', 'wall_s', 'requests', 'lag_p95', 'lag_max', 'status_mismatch', 'errors'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Latence de POST /api/sessions/{id}/answer/ selon le mode de connexion.
+
+    python -m benchmarks.submit_answer_latency --participants 300 --concurrency 16
+
+Chaque mode tourne dans un sous-processus (les réglages DATABASES sont lus
+à l'import) :
+  - direct     : CONN_MAX_AGE=0, une connexion PostgreSQL par requête
+  - persistent : CONN_MAX_AGE=60, une connexion par thread
+  - pool       : DB_POOL=True (core.db_pool)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = {
+    'direct': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_POOL': 'False', 'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+def run_mode(args):
+    from benchmarks._common import setup_django, TestDatabase, seed_live_session, summarize
+    setup_django()
+
+    with TestDatabase():
+        from django.conf import settings
+        from rest_framework.test import APIClient
+
+        if settings.DB_POOL:
+            # Le pool a pu être créé pendant la création de la base de test
+            from core.db_pool.base import close_pools
+            close_pools()
+
+        _, session, students = seed_live_session(args.participants)
+        option_ids = list(
+            session.quiz.questions.get().options.order_by('order').values_list('id', flat=True)
+        )
+        url = f'/api/sessions/{session.id}/answer/'
+
+        def submit(index):
+            client = APIClient()
+            client.force_authenticate(students[index])
+            payload = {'selected_option': option_ids[index % len(option_ids)], 'response_time': 1500}
+            started = time.perf_counter()
+            response = client.post(url, payload, format='json')
+            elapsed = (time.perf_counter() - started) * 1000
+            assert response.status_code == 201, response.content
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            latencies = list(executor.map(submit, range(len(students))))
+        wall = time.perf_counter() - started
+
+        result = summarize(latencies)
+        result['throughput'] = len(latencies) / wall
+        if settings.DB_POOL:
+            from core.db_pool.base import get_pool_stats
+            stats = get_pool_stats().get('default', {})
+            result['pool_wait_avg_ms'] = stats.get('requests_wait_avg_ms')
+        print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participants', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args)
+        return
+
+    from benchmarks._common import print_table
+    rows = []
+    for mode in args.modes.split(','):
+        env = {**os.environ, **MODES[mode]}
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.submit_answer_latency', '--child', mode,
+             '--participants', str(args.participants), '--concurrency', str(args.concurrency)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        rows.append({'mode': mode, **json.loads(output.strip().splitlines()[-1])})
+
+    print(f"submit_answer : {args.participants} réponses, {args.concurrency} clients concurrents (ms)")
+    print_table(rows, ['mode', 'count', 'mean', 'p50', 'p95', 'p99', 'max', 'throughput', 'pool_wait_avg_ms'])
+
+
+if __name__ == '__main__':
+    main()
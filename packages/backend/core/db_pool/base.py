@@ -0,0 +1,147 @@
+"""
+Backend PostgreSQL avec pool de connexions (psycopg_pool).
+
+Django 4.2 ne sait pas utiliser de pool : chaque requête ouvre une nouvelle
+connexion (CONN_MAX_AGE=0) ou en garde une par thread (CONN_MAX_AGE>0).
+Ce backend reprend le backend PostgreSQL standard mais emprunte ses connexions
+à un ConnectionPool partagé par tous les threads du processus, et les y rend
+au lieu de les fermer.
+
+Configuration (même forme que le pool natif de Django 5.1) :
+
+    DATABASES['default'] = {
+        'ENGINE': 'core.db_pool',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}},
+    }
+"""
+import logging
+import os
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Un pool par alias de base, propre au processus courant
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Pools hérités du processus parent après un fork (gunicorn --preload).
+# On garde une référence pour qu'ils ne soient jamais fermés ni collectés
+# dans l'enfant : fermer leurs connexions enverrait un "Terminate" sur des
+# sockets encore utilisés par le parent.
+_inherited_pools = []
+
+
+def _discard_inherited_pools():
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_discard_inherited_pools)
+
+
+def get_pool_stats():
+    """Statistiques de chaque pool du processus (attente, taille, erreurs)."""
+    stats = {}
+    for alias, pool in list(_pools.items()):
+        data = pool.get_stats()
+        waited = data.get('requests_num', 0)
+        data['requests_wait_avg_ms'] = (
+            data.get('requests_wait_ms', 0) / waited if waited else 0
+        )
+        stats[alias] = data
+    return stats
+
+
+def close_pools():
+    """Ferme proprement les pools (arrêt du worker ou avant un fork)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        # Les options du pool ne sont pas des paramètres de connexion psycopg
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @property
+    def pool_options(self):
+        options = self.settings_dict['OPTIONS'].get('pool') or {}
+        if options is True:
+            options = {}
+        return options
+
+    @property
+    def pool(self):
+        pool = _pools.get(self.alias)
+        if pool is not None:
+            return pool
+
+        with _pools_lock:
+            pool = _pools.get(self.alias)
+            if pool is None:
+                if self.settings_dict['CONN_MAX_AGE'] != 0:
+                    raise ImproperlyConfigured(
+                        "Le pool de connexions impose CONN_MAX_AGE = 0."
+                    )
+                options = dict(self.pool_options)
+                health_check = options.pop('check', True)
+                slow_wait_ms = options.pop('slow_wait_ms', None)
+                pool = ConnectionPool(
+                    kwargs=self.get_connection_params(),
+                    check=ConnectionPool.check_connection if health_check else None,
+                    name=f"{self.alias}-{os.getpid()}",
+                    open=True,
+                    **options,
+                )
+                pool.slow_wait_ms = slow_wait_ms
+                _pools[self.alias] = pool
+        return pool
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        isolation_level = options.get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} "
+                f"specified. Use one of the psycopg.IsolationLevel values."
+            )
+
+        pool = self.pool
+        started = time.monotonic()
+        connection = pool.getconn()
+        waited_ms = (time.monotonic() - started) * 1000
+        if pool.slow_wait_ms is not None and waited_ms > pool.slow_wait_ms:
+            logger.warning(
+                "Attente de %.1f ms pour une connexion du pool %s", waited_ms, pool.name
+            )
+
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            # On rend la connexion au pool au lieu de la fermer ; le pool
+            # annule une éventuelle transaction ouverte et jette les
+            # connexions cassées.
+            with self.wrap_database_errors:
+                return self.pool.putconn(self.connection)
@@ -1,15 +1,11 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
-from environs import Env
-
-env = Env()
-env.read_env()
-
-load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+# Une seule lecture du .env (les variables déjà définies l'emportent)
 load_dotenv(BASE_DIR / ".env")
 
 
@@ -35,6 +31,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Profilage à la demande (en-tête X-Profile signé, cf. api.profiling)
+    'api.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,6 +40,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Enregistrement du trafic des sessions marquées (manage.py record_traffic)
+    'api.traffic.TrafficRecorderMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -63,18 +63,124 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
+
+# Pool de connexions (psycopg_pool) : DB_POOL=True active le backend core.db_pool.
+# Sans pool, les connexions sont persistantes par thread pendant DB_CONN_MAX_AGE secondes.
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db_pool" if DB_POOL else "django.db.backends.postgresql",
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
         "HOST": os.environ.get("DB_HOST"),
         "PORT": os.environ.get("DB_PORT"),
+        # Avec le pool, Django "ferme" la connexion en fin de requête : elle retourne au pool
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        "CONN_HEALTH_CHECKS": os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        "OPTIONS": {},
     }
 }
 
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        "max_size": int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        # Temps d'attente max (s) d'une connexion libre avant erreur
+        "timeout": float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Vérifie la connexion (aller-retour vide) avant de la prêter
+        "check": os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # Journalise les attentes plus longues que ce seuil (ms)
+        "slow_wait_ms": float(os.getenv('DB_POOL_SLOW_WAIT_MS', '100')),
+    }
+
+# Réplica en lecture seule (classements, listes) : DB_REPLICA_HOST active l'alias 'replica'
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.getenv('DB_REPLICA_NAME', DATABASES["default"]["NAME"]),
+        "HOST": os.getenv('DB_REPLICA_HOST'),
+        "PORT": os.getenv('DB_REPLICA_PORT', DATABASES["default"]["PORT"]),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # En test, le réplica pointe sur la base de test de 'default'
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+DATABASE_REPLICA_ALIAS = 'replica'
+# Durée (s) pendant laquelle un utilisateur lit sur 'default' après une écriture
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '5'))
+
+# Cache partagé entre workers (Redis) ; mémoire locale par processus à défaut
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Moteur en mémoire des sessions en cours (cf. api.live_engine) : n'activer que si
+# toutes les requêtes d'une session arrivent au même processus
+LIVE_ENGINE_ENABLED = os.getenv('LIVE_ENGINE_ENABLED', 'False') == 'True'
+LIVE_ENGINE_FLUSH_INTERVAL = float(os.getenv('LIVE_ENGINE_FLUSH_INTERVAL', '0.2'))
+LIVE_ENGINE_FLUSH_BATCH_SIZE = int(os.getenv('LIVE_ENGINE_FLUSH_BATCH_SIZE', '500'))
+
+# Journal append-only des sessions (cf. api.event_log, manage.py replay_session)
+SESSION_EVENT_LOG_ENABLED = os.getenv('SESSION_EVENT_LOG_ENABLED', 'False') == 'True'
+SESSION_EVENT_LOG_DIR = os.getenv('SESSION_EVENT_LOG_DIR', str(BASE_DIR / 'var' / 'session_logs'))
+SESSION_EVENT_LOG_FSYNC_INTERVAL = float(os.getenv('SESSION_EVENT_LOG_FSYNC_INTERVAL', '0.05'))
+SESSION_EVENT_LOG_DURABLE = os.getenv('SESSION_EVENT_LOG_DURABLE', 'False') == 'True'
+
+# Bus d'événements entre workers (cf. api.bus) : 'postgres' (LISTEN/NOTIFY) ou 'inprocess'
+EVENT_BUS_BACKEND = os.getenv('EVENT_BUS_BACKEND', 'postgres')
+EVENT_BUS_CHANNEL = os.getenv('EVENT_BUS_CHANNEL', 'quiz_events')
+EVENT_BUS_COALESCE_INTERVAL = float(os.getenv('EVENT_BUS_COALESCE_INTERVAL', '0.1'))
+
+# Durée maximale d'attente de /api/async/sessions/{id}/wait/ (secondes)
+SESSION_WAIT_TIMEOUT = float(os.getenv('SESSION_WAIT_TIMEOUT', '25'))
+
+# Archivage des sessions terminées (cf. api.archive, manage.py archive_sessions)
+SESSION_ARCHIVE_DIR = os.getenv('SESSION_ARCHIVE_DIR', str(BASE_DIR / 'var' / 'session_archives'))
+SESSION_ARCHIVE_AFTER_DAYS = int(os.getenv('SESSION_ARCHIVE_AFTER_DAYS', '90'))
+
+# Suppression d'un quiz dans un thread après la réponse (202), cf. api.deletion
+QUIZ_DELETE_IN_BACKGROUND = os.getenv('QUIZ_DELETE_IN_BACKGROUND', 'False') == 'True'
+
+# Profilage à la demande (cf. api.profiling) : durée de validité des jetons et des résultats (s)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', '3600'))
+PROFILING_RESULT_TTL = int(os.getenv('PROFILING_RESULT_TTL', '86400'))
+PROFILING_TOP_FUNCTIONS = int(os.getenv('PROFILING_TOP_FUNCTIONS', '60'))
+
+# Cache des quiz sérialisés (cf. api.quiz_cache) : niveaux 'local' (processus) et 'shared' (CACHES)
+QUIZ_CACHE_TIERS = os.getenv('QUIZ_CACHE_TIERS', 'local,shared')
+QUIZ_CACHE_ALIAS = os.getenv('QUIZ_CACHE_ALIAS', 'default')
+QUIZ_CACHE_LOCAL_TTL = float(os.getenv('QUIZ_CACHE_LOCAL_TTL', '30'))
+QUIZ_CACHE_LOCAL_SIZE = int(os.getenv('QUIZ_CACHE_LOCAL_SIZE', '500'))
+QUIZ_CACHE_SHARED_TTL = int(os.getenv('QUIZ_CACHE_SHARED_TTL', '3600'))
+
+# Enregistrement du trafic des sessions (cf. api.traffic, manage.py record_traffic)
+TRAFFIC_RECORD_DIR = os.getenv('TRAFFIC_RECORD_DIR', str(BASE_DIR / 'var' / 'traffic'))
+
+# Envoi idempotent des réponses (cf. api.idempotency) : réponses gardées IDEMPOTENCY_TTL secondes
+IDEMPOTENCY_CACHE_ALIAS = os.getenv('IDEMPOTENCY_CACHE_ALIAS', 'default')
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '600'))
+
+# Détail d'une session : N premiers du classement ; liste complète paginée (cf. api.pagination)
+SESSION_PARTICIPANTS_TOP_N = int(os.getenv('SESSION_PARTICIPANTS_TOP_N', '20'))
+SESSION_PARTICIPANTS_PAGE_SIZE = int(os.getenv('SESSION_PARTICIPANTS_PAGE_SIZE', '50'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -87,6 +193,12 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Configuration de recherche plein texte PostgreSQL (cf. api.search), alignée sur LANGUAGE_CODE
+SEARCH_CONFIG = os.getenv(
+    'SEARCH_CONFIG',
+    {'fr': 'french', 'en': 'english'}.get(LANGUAGE_CODE.split('-')[0], 'simple')
+)
+
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
@@ -104,6 +216,8 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -111,8 +225,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON par défaut, MessagePack sur demande (Accept / Content-Type: application/msgpack)
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'api.parsers.MessagePackParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Seaux à jetons (cf. api.throttling) : "N/période" = rafale de N, puis N par période
+    'DEFAULT_THROTTLE_RATES': {
+        'session_poll': os.getenv('THROTTLE_SESSION_POLL', '60/min'),
+        'answer_submit': os.getenv('THROTTLE_ANSWER_SUBMIT', '20/min'),
+        'session_answers': os.getenv('THROTTLE_SESSION_ANSWERS', '3000/min'),
+    },
 }
 
 SIMPLE_JWT = {
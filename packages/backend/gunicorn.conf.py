@@ -0,0 +1,43 @@
+"""
+Configuration gunicorn : gunicorn -c gunicorn.conf.py core.wsgi:application
+
+En ASGI (vues async de api.async_views) :
+    gunicorn -c gunicorn.conf.py core.asgi:application -k uvicorn.workers.UvicornWorker
+
+Avec DB_POOL=True, chaque worker crée son propre pool à sa première requête ;
+un pool ouvert par le master avant le fork n'est jamais réutilisé par les
+workers (cf. core.db_pool.base).
+
+GUNICORN_PRELOAD=True : Django est importé et initialisé une seule fois dans
+le master, qui se préchauffe (api.warmup) avant de forker les workers.
+Sinon, avec GUNICORN_WARMUP=True, chaque worker se préchauffe avant sa
+première requête.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'False') == 'True'
+warmup = os.getenv('GUNICORN_WARMUP', 'True') == 'True'
+
+
+def when_ready(server):
+    # Master, application déjà chargée (preload), workers pas encore forkés
+    if preload_app and warmup:
+        from api.warmup import warm_up
+        server.log.info("Préchauffage du master : %s", warm_up())
+
+
+def post_worker_init(worker):
+    if warmup and not preload_app:
+        from api.warmup import warm_up
+        worker.log.info("Préchauffage du worker %s : %s", worker.pid, warm_up())
+
+
+def worker_exit(server, worker):
+    from django.conf import settings
+    if settings.configured and getattr(settings, 'DB_POOL', False):
+        from core.db_pool.base import close_pools
+        close_pools()
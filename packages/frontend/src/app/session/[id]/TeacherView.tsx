@@ -1,12 +1,12 @@
 'use client'
 
-import { useEffect } from 'react'
+import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { sessionService } from '@/services/session.service'
 import { Button } from '@/components/ui/Button'
 import { TimerBar } from '@/components/session/TimerBar'
 import { useSocket } from '@/hooks/useSocket'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 
 // --- DÉFINITION DE TYPE CORRIGÉE POUR TANSTACK QUERY ---
 // Ce type doit englober toutes les données utilisées dans le composant
@@ -14,8 +14,11 @@ interface SessionData {
     id: number;
     access_code: string;
     status: 'WAITING' | 'IN_PROGRESS' | 'FINISHED';
-    // Assurez-vous que le service retourne ces champs, sinon l'erreur persiste.
+    // Tête du classement seulement : la liste complète est paginée (sessionService.getParticipants)
     participants: Participant[]; 
+    participant_count: number;
+    // Participants ayant répondu à la question courante
+    answered_count: number;
     quiz?: { // Rendu optionnel au cas où le service ne le fournit pas toujours
         question_count: number;
     };
@@ -58,6 +61,21 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
         refetchInterval: 5000, 
     })
 
+    // Classement complet, chargé page par page à la demande (grandes sessions)
+    const [showAll, setShowAll] = useState(false)
+    const {
+        data: ranking,
+        fetchNextPage,
+        hasNextPage,
+        isFetchingNextPage,
+    } = useInfiniteQuery({
+        queryKey: ['session', sessionId, 'participants'],
+        queryFn: ({ pageParam }) => sessionService.getParticipants(sessionId, pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.next,
+        enabled: !!sessionId && showAll,
+    })
+
     // --- LOGIQUE SOCKET ---
     useEffect(() => {
         if (socket) {
@@ -125,8 +143,13 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
 
     // Données pour le rendu
     const participants = session.participants || []
-    const answersCount = participants.filter(p => p.has_answered).length
-    const totalPlayers = participants.length
+    const answersCount = session.answered_count ?? 0
+    const totalPlayers = session.participant_count ?? participants.length
+    // Participants au-delà de la tête du classement renvoyée avec la session
+    const hiddenCount = totalPlayers - participants.length
+    const rankedParticipants: Participant[] = showAll && ranking
+        ? ranking.pages.flatMap(page => page.results)
+        : participants
 
     // --- ÉTAT 1 : LOBBY (WAITING) ---
     if (session.status === 'WAITING') {
@@ -144,7 +167,7 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
 
                     <div className="bg-indigo-800/50 rounded-xl p-6 backdrop-blur-sm">
                         <h3 className="text-xl font-semibold mb-4">
-                            Participants ({participants.length})
+                            Participants ({totalPlayers})
                         </h3>
                         <div className="flex flex-wrap gap-2 justify-center">
                             {participants.map((p) => (
@@ -152,7 +175,12 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
                                     {p.username}
                                 </span>
                             ))}
-                            {(participants.length === 0) && (
+                            {hiddenCount > 0 && (
+                                <span className="px-3 py-1 text-sm text-indigo-300">
+                                    et {hiddenCount} autres
+                                </span>
+                            )}
+                            {(totalPlayers === 0) && (
                                 <p className="text-indigo-300 italic">En attente de joueurs...</p>
                             )}
                         </div>
@@ -161,7 +189,7 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
                     <div className="mt-8">
                         <Button 
                             onClick={handleStart} 
-                            disabled={participants.length === 0 || isActionLoading}
+                            disabled={totalPlayers === 0 || isActionLoading}
                             isLoading={startMutation.isPending}
                             className="bg-green-500 hover:bg-green-600 text-white px-12 py-4 text-xl rounded-full font-bold shadow-lg transition-transform hover:scale-105 disabled:opacity-50 disabled:scale-100"
                         >
@@ -211,7 +239,7 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
                                 <div className="w-full bg-gray-200 rounded-full h-4 overflow-hidden">
                                     <div 
                                         className="bg-blue-600 h-4 transition-all duration-300 ease-out"
-                                        style={{ width: `${(answersCount / totalPlayers) * 100}%` }}
+                                        style={{ width: `${totalPlayers ? (answersCount / totalPlayers) * 100 : 0}%` }}
                                     ></div>
                                 </div>
                             </div>
@@ -243,7 +271,7 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
                         <h3 className="font-bold text-gray-800">Classement en direct</h3>
                     </div>
                     <div className="flex-1 overflow-y-auto p-2 space-y-2">
-                        {participants.map((p, index: number) => (
+                        {rankedParticipants.map((p, index: number) => (
                             <div key={p.id} className="flex items-center p-3 rounded-lg bg-gray-50 border border-gray-100">
                                 <div className={`
                                     w-8 h-8 flex items-center justify-center rounded-full font-bold mr-3 text-sm
@@ -265,6 +293,23 @@ export default function TeacherSessionView({ sessionId }: { sessionId: string })
                                 </div>
                             </div>
                         ))}
+                        {!showAll && hiddenCount > 0 && (
+                            <button
+                                onClick={() => setShowAll(true)}
+                                className="w-full p-2 text-sm text-blue-600 hover:underline"
+                            >
+                                Voir les {totalPlayers} participants
+                            </button>
+                        )}
+                        {showAll && hasNextPage && (
+                            <button
+                                onClick={() => fetchNextPage()}
+                                disabled={isFetchingNextPage}
+                                className="w-full p-2 text-sm text-blue-600 hover:underline disabled:opacity-50"
+                            >
+                                {isFetchingNextPage ? 'Chargement...' : 'Afficher plus'}
+                            </button>
+                        )}
                     </div>
                 </div>
             </div>
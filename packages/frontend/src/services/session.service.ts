@@ -1,8 +1,26 @@
 import apiClient from '@/lib/api'
 
 // On définit l'interface ici pour la clarté
+export interface SessionParticipant {
+  id: number
+  username: string
+  score: number
+  answer_count: number
+  has_answered: boolean
+}
+
+// Page de GET /api/sessions/{id}/participants/ (next : URL de la page suivante)
+export interface ParticipantPage {
+  next: string | null
+  results: SessionParticipant[]
+}
+
 interface QuizSession {
-  participants: never[]
+  // Tête du classement seulement (SESSION_PARTICIPANTS_TOP_N) : le reste est paginé
+  participants: SessionParticipant[]
+  participant_count: number
+  // Participants ayant répondu à la question courante
+  answered_count: number
   id: number
   access_code: string
   status: 'WAITING' | 'IN_PROGRESS' | 'COMPLETED'
@@ -39,6 +57,12 @@ export const sessionService = {
     return response.data
   },
 
+  // Participants par ordre de classement, page par page (curseur opaque dans `next`)
+  async getParticipants(id: string | number, next?: string | null) {
+    const response = await apiClient.get<ParticipantPage>(next ?? `/api/sessions/${id}/participants/`)
+    return response.data
+  },
+
   // Démarrer la session (WAITING -> IN_PROGRESS)
   async start(id: string | number) {
     const response = await apiClient.post(`/api/sessions/${id}/start/`)